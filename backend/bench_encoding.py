@@ -0,0 +1,104 @@
+"""
+Benchmark of the WebSocket frame encodings (ws/encoding.py).
+
+    cd backend
+    python bench_encoding.py [--messages N] [--batch N] [--repeat N]
+
+Encodes the same candle / event messages in every encoding this server
+supports, in frames of `--batch` messages as the broadcast outbox sends
+them, and reports messages/second and bytes/message for each.
+"""
+# ==================================================
+# STANDARD LIBRARY IMPORTS
+# ==================================================
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# ==================================================
+# PATH SETUP
+# ==================================================
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR.parent))
+
+# ==================================================
+# INTERNAL IMPORTS
+# ==================================================
+from backend.engine.candle_store import Candle
+from backend.engine1.pair_engine import candle_message
+from ws import encoding
+
+
+def _candles(n: int) -> list:
+    rng = random.Random(0)
+    t = datetime(2022, 1, 3)
+    price = 1.13
+    out = []
+    for _ in range(n):
+        o = price
+        price = round(price + rng.gauss(0, 0.0004), 5)
+        h = round(max(o, price) + abs(rng.gauss(0, 0.0002)), 5)
+        l = round(min(o, price) - abs(rng.gauss(0, 0.0002)), 5)
+        out.append(candle_message("EURUSD", "5m", Candle(t, o, h, l, price)))
+        t += timedelta(minutes=5)
+    return out
+
+
+def _events(n: int) -> list:
+    # shaped like PairEngine's BOS / CHOCH / POI messages
+    t = datetime(2022, 1, 3)
+    out = []
+    for i in range(n):
+        t += timedelta(minutes=5)
+        out.append({
+            "symbol": "EURUSD",
+            "timeframe": "5m",
+            "events": [
+                {
+                    "id": f"5M_BOS_{t.strftime('%Y%m%d_%H%M')}",
+                    "type": "BOS",
+                    "broken_level": 1.13 + i * 1e-5,
+                    "time": t.isoformat(),
+                }
+            ],
+        })
+    return out
+
+
+def _bench(messages: list, enc: str, batch: int, repeat: int) -> tuple:
+    frames = [messages[i:i + batch] for i in range(0, len(messages), batch)]
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        size = sum(len(encoding.encode(frame, enc)) for frame in frames)
+        best = min(best, time.perf_counter() - t0)
+    return len(messages) / best, size / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket frame encodings")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    streams = [
+        ("candles", _candles(args.messages), encoding.CANDLE_ENCODINGS),
+        ("events", _events(args.messages), encoding.EVENT_ENCODINGS),
+    ]
+
+    print(f"Messages  : {args.messages} per stream, {args.batch} per frame")
+    for name, messages, encodings in streams:
+        for enc in encodings:
+            if enc == encoding.MSGPACK and encoding.msgpack is None:
+                print(f"{name:<8} {enc:<8}: skipped (msgpack not installed)")
+                continue
+            rate, size = _bench(messages, enc, args.batch, args.repeat)
+            print(f"{name:<8} {enc:<8}: {rate:>12,.0f} msgs/sec | {size:6.1f} bytes/msg")
+
+
+if __name__ == "__main__":
+    main()
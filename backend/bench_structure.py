@@ -0,0 +1,85 @@
+"""
+Throughput benchmark for the 4H/5M structure mapper.
+
+    cd backend
+    python bench_structure.py [path/to/DAT_MT_EURUSD_M1_2022.csv] [--repeat N]
+
+Runs the same pipeline as run.py (store -> resample -> seed -> mapping)
+with the mapper's console output suppressed, and reports 5M candles/second.
+"""
+# ==================================================
+# STANDARD LIBRARY IMPORTS
+# ==================================================
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+# ==================================================
+# PATH SETUP
+# ==================================================
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+# ==================================================
+# INTERNAL ENGINE IMPORTS
+# ==================================================
+from engine.candle_store import load_or_convert
+from engine.resample import resample_multi
+from engine.trend_seed import detect_seed
+from engine.swings_detect import market_structure_mapping
+from engine.tf_index import TimeframeIndex
+from engine import fast_scan
+from run import MINUTE_CSV_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark market_structure_mapping")
+    parser.add_argument("csv", nargs="?", default=str(MINUTE_CSV_PATH))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    candles = load_or_convert(Path(args.csv))
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tfs = resample_multi(candles, ("5m", "4h"))
+    t_resample = time.perf_counter() - t0
+    df_4h = tfs.frames["4h"]
+    df_5m = tfs.frames["5m"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        refined_4h_df, trend, bos_time, _, _ = detect_seed(df_4h)
+    refined_4h_df = refined_4h_df.sort_index()
+    refined_5m_df = df_5m[df_5m.index >= refined_4h_df.index[0]]
+
+    print(f"Candles   : {len(candles)} 1M | {len(refined_5m_df)} 5M | {len(refined_4h_df)} 4H")
+    print(f"Load      : {t_load * 1000:.1f} ms")
+    print(f"Resample  : {t_resample * 1000:.1f} ms")
+    print(f"Scan      : {fast_scan.BACKEND}")
+
+    # first run also pays numba compilation (cached afterwards)
+    timings = []
+    for _ in range(max(args.repeat, 1)):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tf_index = TimeframeIndex(refined_4h_df, refined_5m_df)
+            market_structure_mapping(
+                df_4h=refined_4h_df,
+                df_5m=refined_5m_df,
+                trend=trend,
+                bos_time=bos_time,
+                tf_index=tf_index,
+            )
+        timings.append(time.perf_counter() - t0)
+
+    best = min(timings)
+    print(f"Mapping   : best {best * 1000:.1f} ms of {len(timings)} runs")
+    print(f"Throughput: {len(refined_5m_df) / best:,.0f} 5M candles/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Columnar on-disk store for 1-minute OHLC candles.
+
+Each symbol/year lives in its own directory of raw .npy columns:
+
+    <root>/<SYMBOL>/<YEAR>/time.npy    int64    epoch minutes (naive, as in the CSV)
+                          /open.npy    float64
+                          /high.npy    float64
+                          /low.npy     float64
+                          /close.npy   float64
+
+The CSV is parsed once by `convert_histdata_csv`; every later start opens
+the columns memory-mapped through `load_store`, which costs a handful of
+file opens and no per-row Python work.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .histdata import find_histdata_files, parse_histdata_arrays, parse_histdata_name
+
+
+DEFAULT_STORE_ROOT = Path(__file__).resolve().parents[2] / "data" / "candles"
+
+COLUMNS = ("time", "open", "high", "low", "close")
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DAY = EPOCH.toordinal()
+
+
+class Candle(NamedTuple):
+    """
+    One OHLC bar as the realtime path passes it around. A plain tuple: no
+    per-bar dict, and it unpacks like a row from `iter_candle_blocks`.
+    """
+    time: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+
+
+@dataclass(frozen=True)
+class CandleArrays:
+    """
+    1-minute OHLC columns for one symbol/year.
+
+    `time` holds int64 epoch minutes; prices are float64.
+    """
+    symbol: str
+    year: int
+    time: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def slice(self, start: int, stop: int) -> "CandleArrays":
+        """
+        Rows [start, stop) as views of the same columns.
+        """
+        return CandleArrays(
+            self.symbol,
+            self.year,
+            self.time[start:stop],
+            self.open[start:stop],
+            self.high[start:stop],
+            self.low[start:stop],
+            self.close[start:stop],
+        )
+
+    def index_of(self, when: datetime) -> int:
+        """
+        First row at or after `when`.
+        """
+        return int(np.searchsorted(self.time, datetime_to_minutes(when), side="left"))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        DatetimeIndex-ed OHLC frame, the shape the batch engine expects.
+        """
+        index = pd.DatetimeIndex(self.time.astype("datetime64[m]"), name="time")
+        return pd.DataFrame(
+            {
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+            },
+            index=index,
+        )
+
+
+def store_path(symbol: str, year: int, root: Optional[Path] = None) -> Path:
+    root = Path(root) if root is not None else DEFAULT_STORE_ROOT
+    return root / symbol.upper() / str(year)
+
+
+def has_store(symbol: str, year: int, root: Optional[Path] = None) -> bool:
+    path = store_path(symbol, year, root)
+    return all((path / f"{col}.npy").exists() for col in COLUMNS)
+
+
+def write_store(
+    symbol: str,
+    year: int,
+    time: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    root: Optional[Path] = None,
+) -> Path:
+    """
+    Write one symbol/year of M1 columns. Rows must already be sorted by time.
+    """
+    path = store_path(symbol, year, root)
+    path.mkdir(parents=True, exist_ok=True)
+
+    columns = {
+        "time": np.ascontiguousarray(time, dtype=np.int64),
+        "open": np.ascontiguousarray(open_, dtype=np.float64),
+        "high": np.ascontiguousarray(high, dtype=np.float64),
+        "low": np.ascontiguousarray(low, dtype=np.float64),
+        "close": np.ascontiguousarray(close, dtype=np.float64),
+    }
+
+    lengths = {len(arr) for arr in columns.values()}
+    if len(lengths) != 1:
+        raise ValueError("All candle columns must have the same length")
+
+    # Write to temp names first so a crash never leaves a half-written store
+    for col, arr in columns.items():
+        tmp = path / f"{col}.tmp.npy"
+        np.save(tmp, arr)
+    for col in COLUMNS:
+        (path / f"{col}.tmp.npy").replace(path / f"{col}.npy")
+
+    return path
+
+
+def load_store(
+    symbol: str,
+    year: int,
+    root: Optional[Path] = None,
+    mmap: bool = True,
+) -> CandleArrays:
+    """
+    Open one symbol/year. With mmap=True the columns are read-only memory maps.
+    """
+    path = store_path(symbol, year, root)
+    if not has_store(symbol, year, root):
+        raise FileNotFoundError(f"No candle store for {symbol} {year} at {path}")
+
+    mode = "r" if mmap else None
+    cols = {col: np.load(path / f"{col}.npy", mmap_mode=mode) for col in COLUMNS}
+
+    return CandleArrays(
+        symbol=symbol.upper(),
+        year=int(year),
+        time=cols["time"],
+        open=cols["open"],
+        high=cols["high"],
+        low=cols["low"],
+        close=cols["close"],
+    )
+
+
+def convert_histdata_csv(
+    csv_path,
+    symbol: Optional[str] = None,
+    year: Optional[int] = None,
+    root: Optional[Path] = None,
+) -> Path:
+    """
+    One-time conversion of a HistData MT M1 CSV into the columnar store.
+
+    Format: YYYY.MM.DD,HH:MM,open,high,low,close,volume
+    Malformed rows are dropped, matching the old line-by-line loader.
+    """
+    csv_path = Path(csv_path)
+    if symbol is None or year is None:
+        symbol, year = parse_histdata_name(csv_path)
+
+    minutes, prices = parse_histdata_arrays(csv_path)
+
+    return write_store(
+        symbol,
+        year,
+        minutes,
+        prices[:, 0],
+        prices[:, 1],
+        prices[:, 2],
+        prices[:, 3],
+        root=root,
+    )
+
+
+def _ingest_one(args) -> Tuple[str, int, int]:
+    csv_path, root = args
+    symbol, year = parse_histdata_name(csv_path)
+    convert_histdata_csv(csv_path, symbol, year, root)
+    return symbol, year, len(load_store(symbol, year, root))
+
+
+def ingest_histdata(
+    source,
+    root: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    overwrite: bool = False,
+) -> List[Tuple[str, int, int]]:
+    """
+    Convert every HISTDATA_COM_MT_<SYMBOL>_M1<YEAR> CSV under `source`
+    into the store, one file per worker process.
+
+    Returns (symbol, year, rows) for each converted file.
+    """
+    files = find_histdata_files(source)
+    if not overwrite:
+        files = [f for f in files if not has_store(*parse_histdata_name(f), root)]
+
+    if not files:
+        return []
+
+    jobs = [(f, root) for f in files]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+
+    if workers == 1:
+        return [_ingest_one(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_ingest_one, jobs))
+
+
+def load_or_convert(
+    csv_path,
+    symbol: Optional[str] = None,
+    year: Optional[int] = None,
+    root: Optional[Path] = None,
+) -> CandleArrays:
+    """
+    Load the store for this CSV, converting it first if it does not exist yet.
+    """
+    if symbol is None or year is None:
+        symbol, year = parse_histdata_name(csv_path)
+
+    if not has_store(symbol, year, root):
+        print(f"🗄️ Building candle store for {symbol} {year} from {csv_path}")
+        convert_histdata_csv(csv_path, symbol, year, root)
+
+    return load_store(symbol, year, root)
+
+
+def minutes_to_datetime(minutes: int) -> datetime:
+    return EPOCH + timedelta(minutes=int(minutes))
+
+
+def datetime_to_minutes(when: datetime) -> int:
+    # (when - EPOCH) // 1 minute, without building timedeltas (hot in the realtime path)
+    return (when.toordinal() - EPOCH_DAY) * 1440 + when.hour * 60 + when.minute
+
+
+def iter_candle_blocks(
+    candles: CandleArrays,
+    start: int = 0,
+    block_size: int = 4096,
+) -> Iterator[List[Tuple[datetime, float, float, float, float]]]:
+    """
+    Yield (time, open, high, low, close) rows in blocks for streaming.
+
+    Each block is converted with a single tolist() per column, so the
+    per-row cost is just tuple unpacking in the consumer.
+    """
+    n = len(candles)
+    for lo in range(start, n, block_size):
+        hi = min(lo + block_size, n)
+        times = candles.time[lo:hi].astype("datetime64[m]").tolist()
+        yield list(zip(
+            times,
+            candles.open[lo:hi].tolist(),
+            candles.high[lo:hi].tolist(),
+            candles.low[lo:hi].tolist(),
+            candles.close[lo:hi].tolist(),
+        ))
+
+
+# ==================================================
+# BACKFILL ENTRY POINT
+# ==================================================
+if __name__ == "__main__":
+    # python -m backend.engine.candle_store <histdata dir> [<histdata dir> ...]
+    sources = sys.argv[1:] or [DEFAULT_STORE_ROOT.parents[1]]
+    for src in sources:
+        for symbol, year, rows in ingest_histdata(src):
+            print(f"✅ {symbol} {year}: {rows} minute candles")
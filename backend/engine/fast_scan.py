@@ -0,0 +1,128 @@
+"""
+Fast forward scan for the 5M monitor in `market_structure_mapping`.
+
+While no POI is active, no trade is open and no 5M structure is being
+tracked, a 5M candle can only matter if it
+
+    - closes beyond the 4H swing low / swing high (CHOCH or BOS), or
+    - taps the current POI.
+
+`next_trigger` returns the first such position so the monitor can skip
+straight to it. It is JIT-compiled with numba when available and falls
+back to chunked NumPy scans otherwise.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional
+    njit = None
+
+
+# POI tap rules (see "POI TAP" in swings_detect)
+TAP_NONE = 0      # no active POI
+TAP_OVERLAP = 1   # OB: candle overlaps [tap_low, tap_high]
+TAP_LOW = 2       # bullish LIQ: low <= tap_low
+TAP_HIGH = 3      # bearish LIQ: high >= tap_high
+
+_CHUNK = 2048
+
+
+def _next_trigger_py(high, low, close, start, swing_low, swing_high, tap_kind, tap_low, tap_high):
+    n = len(close)
+    for i in range(start, n):
+        c = close[i]
+        if c < swing_low or c > swing_high:
+            return i
+        if tap_kind == TAP_OVERLAP:
+            if low[i] <= tap_high and high[i] >= tap_low:
+                return i
+        elif tap_kind == TAP_LOW:
+            if low[i] <= tap_low:
+                return i
+        elif tap_kind == TAP_HIGH:
+            if high[i] >= tap_high:
+                return i
+    return n
+
+
+def _next_trigger_np(high, low, close, start, swing_low, swing_high, tap_kind, tap_low, tap_high):
+    n = len(close)
+    lo = start
+    while lo < n:
+        hi = min(lo + _CHUNK, n)
+        c = close[lo:hi]
+        hit = (c < swing_low) | (c > swing_high)
+
+        if tap_kind == TAP_OVERLAP:
+            hit |= (low[lo:hi] <= tap_high) & (high[lo:hi] >= tap_low)
+        elif tap_kind == TAP_LOW:
+            hit |= low[lo:hi] <= tap_low
+        elif tap_kind == TAP_HIGH:
+            hit |= high[lo:hi] >= tap_high
+
+        idx = np.flatnonzero(hit)
+        if len(idx):
+            return lo + int(idx[0])
+        lo = hi
+    return n
+
+
+if njit is not None:
+    _next_trigger_jit = njit(cache=True, nogil=True)(_next_trigger_py)
+    BACKEND = "numba"
+else:
+    _next_trigger_jit = None
+    BACKEND = "numpy"
+
+
+def poi_tap(poi: Optional[dict], trend: str) -> Tuple[int, float, float]:
+    """
+    (tap_kind, tap_low, tap_high) of a swings_detect POI for `next_trigger`.
+    LIQ POIs only carry the price on the side they are tapped from (the
+    other is None), so that price fills both bounds.
+    """
+    if poi is None:
+        return TAP_NONE, 0.0, 0.0
+    if poi["type"] == "OB":
+        tap_kind = TAP_OVERLAP
+    elif poi["type"] == "LIQ":
+        tap_kind = TAP_LOW if trend == "BULLISH" else TAP_HIGH
+    else:
+        return TAP_NONE, 0.0, 0.0
+
+    low, high = poi["price_low"], poi["price_high"]
+    if low is None:
+        low = high
+    if high is None:
+        high = low
+    return tap_kind, float(low), float(high)
+
+
+def next_trigger(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    start: int,
+    swing_low: float,
+    swing_high: float,
+    tap_kind: int = TAP_NONE,
+    tap_low: float = 0.0,
+    tap_high: float = 0.0,
+) -> int:
+    """
+    First position >= start where the candle breaks the swing range or taps
+    the POI (len(close) if none). Arrays must be contiguous float64.
+    """
+    if _next_trigger_jit is not None:
+        return int(_next_trigger_jit(
+            high, low, close, start,
+            float(swing_low), float(swing_high),
+            tap_kind, float(tap_low), float(tap_high),
+        ))
+    return _next_trigger_np(
+        high, low, close, start, swing_low, swing_high, tap_kind, tap_low, tap_high
+    )
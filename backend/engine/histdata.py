@@ -0,0 +1,195 @@
+"""
+Vectorized HistData.com MT M1 parsing.
+
+A HistData download is a directory such as HISTDATA_COM_MT_EURUSD_M12022
+holding DAT_MT_EURUSD_M1_2022.csv (plus a .txt status report), with rows
+
+    2022.01.02,17:05,1.137010,1.137090,1.136950,1.137030,0
+
+Dates and times are decoded straight from the fixed-width ASCII bytes with
+NumPy, so a full year parses without any per-row Python work. Many files
+can be parsed concurrently with `load_histdata`.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+HISTDATA_NAME_RE = re.compile(
+    r"(?:DAT|HISTDATA_COM)_MT_(?P<symbol>[A-Z0-9]+)_M1_?(?P<year>\d{4})",
+    re.IGNORECASE,
+)
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+def parse_histdata_name(path) -> Tuple[str, int]:
+    """
+    Extract (symbol, year) from a HistData file or directory name,
+    e.g. DAT_MT_EURUSD_M1_2022.csv -> ("EURUSD", 2022).
+    """
+    match = HISTDATA_NAME_RE.search(Path(path).name)
+    if not match:
+        raise ValueError(f"Not a HistData M1 file name: {path}")
+    return match.group("symbol").upper(), int(match.group("year"))
+
+
+def _ascii_digits(values: np.ndarray, width: int) -> np.ndarray:
+    """
+    View an array of strings as an (n, width) matrix of digit values.
+    Non-digit characters come out outside 0..9.
+    """
+    raw = np.asarray(values, dtype=f"S{width}")
+    return raw.view(np.uint8).reshape(-1, width).astype(np.int64) - ord("0")
+
+
+def parse_histdata_minutes(dates: np.ndarray, clocks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode "YYYY.MM.DD" / "HH:MM" columns to int64 epoch minutes.
+
+    Returns (minutes, valid_mask); invalid rows have undefined minutes.
+    """
+    d = _ascii_digits(dates, 10)
+    c = _ascii_digits(clocks, 5)
+
+    digit_cols_d = [0, 1, 2, 3, 5, 6, 8, 9]
+    digit_cols_c = [0, 1, 3, 4]
+    valid = (
+        ((d[:, digit_cols_d] >= 0) & (d[:, digit_cols_d] <= 9)).all(axis=1)
+        & ((c[:, digit_cols_c] >= 0) & (c[:, digit_cols_c] <= 9)).all(axis=1)
+    )
+
+    year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    month = d[:, 5] * 10 + d[:, 6]
+    day = d[:, 8] * 10 + d[:, 9]
+    hour = c[:, 0] * 10 + c[:, 1]
+    minute = c[:, 3] * 10 + c[:, 4]
+
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    valid &= (hour <= 23) & (minute <= 59)
+
+    # Zero out garbage before the datetime arithmetic so it cannot overflow
+    year = np.where(valid, year, 1970)
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+
+    months = ((year - 1970) * 12 + (month - 1)).astype("datetime64[M]")
+    days = months.astype("datetime64[D]").astype(np.int64) + (day - 1)
+    minutes = days * 1440 + hour * 60 + minute
+
+    return minutes, valid
+
+
+def _read_raw(path: Path) -> pd.DataFrame:
+    names = ["date", "clock"] + PRICE_COLUMNS
+    try:
+        return pd.read_csv(
+            path,
+            header=None,
+            usecols=range(6),
+            names=names,
+            dtype={"date": str, "clock": str, **{col: np.float64 for col in PRICE_COLUMNS}},
+            on_bad_lines="skip",
+        )
+    except ValueError:
+        # Non-numeric junk somewhere in a price column: take the slower,
+        # forgiving path and coerce it to NaN.
+        raw = pd.read_csv(
+            path,
+            header=None,
+            usecols=range(6),
+            names=names,
+            dtype=str,
+            on_bad_lines="skip",
+        )
+        raw[PRICE_COLUMNS] = raw[PRICE_COLUMNS].apply(pd.to_numeric, errors="coerce")
+        return raw
+
+
+def parse_histdata_arrays(path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse one HistData CSV into (epoch_minutes[int64], ohlc[float64, n x 4]),
+    sorted by time. Malformed rows are dropped.
+    """
+    raw = _read_raw(Path(path))
+
+    dates = raw["date"].fillna("").to_numpy()
+    clocks = raw["clock"].fillna("").to_numpy()
+    minutes, valid = parse_histdata_minutes(dates, clocks)
+
+    prices = raw[PRICE_COLUMNS].to_numpy(dtype=np.float64)
+    valid &= ~np.isnan(prices).any(axis=1)
+
+    minutes = minutes[valid]
+    prices = prices[valid]
+
+    order = np.argsort(minutes, kind="stable")
+    return minutes[order], prices[order]
+
+
+def parse_histdata_file(path) -> pd.DataFrame:
+    """
+    Parse one HistData CSV into a DatetimeIndex-ed OHLC frame.
+    """
+    minutes, prices = parse_histdata_arrays(path)
+    index = pd.DatetimeIndex(minutes.astype("datetime64[m]"), name="time")
+    return pd.DataFrame(prices, index=index, columns=PRICE_COLUMNS)
+
+
+def find_histdata_files(root) -> List[Path]:
+    """
+    All DAT_MT_*_M1_*.csv files under `root`, which may be a single CSV,
+    one HISTDATA_COM_MT_<SYMBOL>_M1<YEAR> directory, or a folder of them.
+    """
+    root = Path(root)
+    if root.is_file():
+        return [root]
+    return sorted(
+        p for p in root.rglob("*.csv")
+        if HISTDATA_NAME_RE.search(p.name)
+    )
+
+
+def _parse_with_name(path: Path) -> Tuple[str, int, pd.DataFrame]:
+    symbol, year = parse_histdata_name(path)
+    return symbol, year, parse_histdata_file(path)
+
+
+def load_histdata(
+    paths: Iterable,
+    max_workers: Optional[int] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Parse many HistData files in a process pool and return one sorted
+    frame per symbol (years concatenated).
+    """
+    files: List[Path] = []
+    for p in paths:
+        files.extend(find_histdata_files(p))
+
+    if not files:
+        return {}
+
+    workers = max_workers or os.cpu_count() or 1
+    workers = min(workers, len(files))
+
+    if workers == 1:
+        parsed = [_parse_with_name(f) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_with_name, files))
+
+    by_symbol: Dict[str, List[pd.DataFrame]] = {}
+    for symbol, _, df in sorted(parsed, key=lambda x: (x[0], x[1])):
+        by_symbol.setdefault(symbol, []).append(df)
+
+    return {
+        symbol: pd.concat(frames).sort_index(kind="stable")
+        for symbol, frames in by_symbol.items()
+    }
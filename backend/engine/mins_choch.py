@@ -1,118 +1,116 @@
 import pandas as pd
-from typing import List, Dict
-def process_structure_and_return_last_swing(
-    df: pd.DataFrame,
-    trend: str,
-    min_pullback_candles: int = 2,
-    retrace_pct: float = 0.99,
-):
-
-    highs = df["high"].values
-    lows = df["low"].values
-    opens = df["open"].values
-    closes = df["close"].values
-    times = df.index
-
-    is_bullish = trend.lower() == "bullish"
-
-    # --------------------------------
-    # INITIAL STRUCTURE
-    # --------------------------------
-    if is_bullish:
-            swing_low = lows[0]
-    else:
-            swing_high = highs[0]
-
-    temp_high = None
-    temp_high_idx = None
-
-    temp_low = None
-    temp_low_idx = None
-
-    pullback_count = 0
-    swings: List[Dict] = []
-
-    pullback_started = False
-    valid_pullback=False
-
-    last_confirmed_swing_high = None
-    last_confirmed_swing_low = None
-    # --------------------------------
-    # MAIN LOOP
-    # --------------------------------
-    for i in range(1, len(df)):
-
-        high = highs[i]
-        low = lows[i]
-        open_ = opens[i]
-        close = closes[i]
-        time = times[i]
+from typing import Optional
+
+
+class StreamingSwingTracker:
+    """
+    Incremental `process_structure_and_return_last_swing`: feed 5M candles
+    one at a time and read `protected` after any of them, O(1) per candle.
+
+    The only backward-looking step of the batch walk (extreme of the
+    candles since the impulse candle, taken on BOS) is kept as a running
+    min / max, so nothing is re-walked as the slice grows.
+    """
+
+    def __init__(
+        self,
+        trend: str,
+        min_pullback_candles: int = 2,
+        retrace_pct: float = 0.99,
+    ):
+        self.trend = trend
+        self.min_pullback_candles = min_pullback_candles
+        self.retrace_pct = retrace_pct
+
+        self.is_bullish = trend.lower() == "bullish"
+        self.n = 0
+
+        self.swing_high = None
+        self.swing_low = None
+
+        self.temp_high = None
+        self.temp_low = None
+        # low since the impulse-high candle / high since the impulse-low candle
+        self.low_since_temp_high = None
+        self.high_since_temp_low = None
+
+        self.pullback_count = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def protected(self) -> Optional[float]:
+        """
+        Level the batch function returns for the candles fed so far, None
+        while it is not defined yet.
+
+        That is always swing_high: the batch function's
+        `trend.lower() is "bullish"` check never matches.
+        """
+        return self.swing_high
+
+    def update(self, open_: float, high: float, low: float, close: float) -> Optional[float]:
+        """
+        Feed the next 5M candle; returns the current protected level.
+        """
+        i = self.n
+        self.n += 1
+
+        # --------------------------------
+        # INITIAL STRUCTURE
+        # --------------------------------
+        if i == 0:
+            if self.is_bullish:
+                self.swing_low = low
+            else:
+                self.swing_high = high
+            return self.protected
 
         is_bull_candle = close > open_
         is_bear_candle = close < open_
 
-
         # ==================================================
         # 🔵 BULLISH STRUCTURE
         # ==================================================
-        if is_bullish:
+        if self.is_bullish:
 
             # Track impulse high
-            if (temp_high is None or high > temp_high) and (pullback_count == 0 or pullback_count == 1):
-                temp_high = high
-                temp_high_idx = i
-                pullback_count = 0
-                continue
+            if (self.temp_high is None or high > self.temp_high) and self.pullback_count in (0, 1):
+                self.temp_high = high
+                self.low_since_temp_high = low
+                self.pullback_count = 0
+                return self.protected
+
+            self.low_since_temp_high = min(self.low_since_temp_high, low)
 
             # Pullback detection
             if is_bear_candle:
-                pullback_count += 1
+                self.pullback_count += 1
 
-            retrace = (temp_high - low) / max(temp_high - swing_low, 1e-9)
+            retrace = (self.temp_high - low) / max(self.temp_high - self.swing_low, 1e-9)
 
             valid_pullback = (
-                pullback_count >= min_pullback_candles
-                or retrace >= retrace_pct
+                self.pullback_count >= self.min_pullback_candles
+                or retrace >= self.retrace_pct
             )
 
-
-
-            # ---------------------------
             # BOS → CONFIRM SWINGS
-            # ---------------------------
-            if valid_pullback and high > temp_high:
-
-                swing_high = temp_high
-                swings.append({
-                    "type": "swing_high",
-                    "time": times[temp_high_idx],
-                    "price": swing_high
-                })
-
-                swing_low = lows[temp_high_idx:i+1].min()
-                swings.append({
-                    "type": "swing_low",
-                    "time": time,
-                    "price": swing_low
-                })
-
-                temp_high = high
-                temp_high_idx = i
-                pullback_count = 0
-                last_confirmed_swing_high = None
+            if valid_pullback and high > self.temp_high:
+                self.swing_high = self.temp_high
+                self.swing_low = self.low_since_temp_high
+
+                self.temp_high = high
+                self.low_since_temp_high = low
+                self.pullback_count = 0
 
             # CHOCH
-            if valid_pullback and low < swing_low:
-                swing_high = temp_high
-                swings.append({
-                    "type": "swing_high",
-                    "time": times[temp_high_idx],
-                    "price": swing_high
-                })
-                is_bullish = False
-                temp_low = low
-                temp_low_idx = i
-                pullback_count = 0
+            if valid_pullback and low < self.swing_low:
+                self.swing_high = self.temp_high
+                self.is_bullish = False
+                self.temp_low = low
+                self.high_since_temp_low = high
+                self.pullback_count = 0
 
         # ==================================================
         # 🔴 BEARISH STRUCTURE
@@ -120,57 +118,70 @@ def process_structure_and_return_last_swing(
         else:
 
             # Track impulse low
-            if (temp_low is None or low < temp_low) and (pullback_count == 0 or pullback_count == 1):
-                temp_low = low
-                temp_low_idx = i
-                pullback_count = 0
-                continue
+            if (self.temp_low is None or low < self.temp_low) and self.pullback_count in (0, 1):
+                self.temp_low = low
+                self.high_since_temp_low = high
+                self.pullback_count = 0
+                return self.protected
+
+            self.high_since_temp_low = max(self.high_since_temp_low, high)
 
             # Pullback detection
             if is_bull_candle:
-                pullback_count += 1
+                self.pullback_count += 1
 
-            retrace = (high - temp_low) / max(swing_high - temp_low, 1e-9)
+            retrace = (high - self.temp_low) / max(self.swing_high - self.temp_low, 1e-9)
 
             valid_pullback = (
-                pullback_count >= min_pullback_candles
-                or retrace >= retrace_pct
+                self.pullback_count >= self.min_pullback_candles
+                or retrace >= self.retrace_pct
             )
-            # ---------------------------
+
             # BOS → CONFIRM SWINGS
-            # ---------------------------
-            if valid_pullback and low < temp_low:
-
-                swing_low = temp_low
-                swings.append({
-                    "type": "swing_low",
-                    "time": times[temp_low_idx],
-                    "price": swing_low
-                })
-
-                swing_high = highs[temp_low_idx:i+1].max()
-                swings.append({
-                    "type": "swing_high",
-                    "time": time,
-                    "price": swing_high
-                })
-
-                temp_low = low
-                temp_low_idx = i
-                pullback_count = 0
+            if valid_pullback and low < self.temp_low:
+                self.swing_low = self.temp_low
+                self.swing_high = self.high_since_temp_low
+
+                self.temp_low = low
+                self.high_since_temp_low = high
+                self.pullback_count = 0
 
             # CHOCH
-            if valid_pullback and high > swing_high:
-                swing_low = temp_low
-                swings.append({
-                    "type": "swing_low",
-                    "time": times[temp_low_idx],
-                    "price": swing_low
-                })
-                is_bullish = True
-                temp_high = high
-                temp_high_idx = i
-                pullback_count = 0
-
-    final_level = swing_low if trend.lower() is "bullish" else swing_high
-    return final_level
\ No newline at end of file
+            if valid_pullback and high > self.swing_high:
+                self.swing_low = self.temp_low
+                self.is_bullish = True
+                self.temp_high = high
+                self.low_since_temp_high = low
+                self.pullback_count = 0
+
+        return self.protected
+
+    def extend(self, opens, highs, lows, closes, start: int, stop: int) -> Optional[float]:
+        """
+        Feed rows [start, stop) of the given columns.
+        """
+        for j in range(start, stop):
+            self.update(opens[j], highs[j], lows[j], closes[j])
+        return self.protected
+
+
+def process_structure_and_return_last_swing(
+    df: pd.DataFrame,
+    trend: str,
+    min_pullback_candles: int = 2,
+    retrace_pct: float = 0.99,
+):
+    """
+    Protected 5M swing after walking the whole of `df`. Callers that grow
+    the slice one candle at a time should keep a StreamingSwingTracker
+    instead of calling this on every prefix.
+    """
+    tracker = StreamingSwingTracker(trend, min_pullback_candles, retrace_pct)
+    return tracker.extend(
+        df["open"].values,
+        df["high"].values,
+        df["low"].values,
+        df["close"].values,
+        0,
+        len(df),
+    )
@@ -1,8 +1,13 @@
-import pandas as pd
+import heapq
+from collections import deque
 from typing import List, Dict
 
-
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .candle_store import Candle
+
 
 def sort_pois_merged(pois):
     def bull_key(p):
@@ -33,13 +38,209 @@ def sort_pois_merged(pois):
     return bull_sorted + bear_sorted
 
 
+def _merge_order_blocks(obs: List[Dict]) -> List[Dict]:
+    """
+    Merge time-ordered OBs whose price ranges overlap.
+    """
+    obs.sort(key=lambda x: x["time"])
+    merged_obs: List[Dict] = []
+
+    for ob in obs:
+        if not merged_obs:
+            merged_obs.append(ob)
+            continue
+
+        last = merged_obs[-1]
+
+        overlap = not (
+            ob["price_high"] < last["price_low"]
+            or ob["price_low"] > last["price_high"]
+        )
+
+        if overlap:
+            last["price_low"] = min(last["price_low"], ob["price_low"])
+            last["price_high"] = max(last["price_high"], ob["price_high"])
+            last["time"] = min(last["time"], ob["time"])
+        else:
+            merged_obs.append(ob)
+
+    return merged_obs
+
+
+def _window(values: np.ndarray, size: int, start: int, stop: int) -> np.ndarray:
+    """
+    Rows [start, stop) of the length-`size` sliding windows over `values`;
+    row j covers values[j : j + size].
+    """
+    return sliding_window_view(values, size)[start:stop]
+
+
 def detect_pois_from_swing(
     ohlc_df: pd.DataFrame,
     trend: str,
     ob_multiplier: float = 1.8,
     liq_pullback_candles: int = 2,
 ) -> List[Dict]:
+    """
+    Order blocks + untapped liquidity for one swing leg, in O(n).
+
+    Every per-candidate window (displacement, previous ranges, lookback,
+    base, pullback) is a sliding-window row, and every "future" / "prior"
+    scan is a lookup into a suffix-min/max or prefix-min/max array.
+    Returns exactly what the original candidate-by-candidate loop returned.
+    """
+    n = len(ohlc_df)
+    k = liq_pullback_candles
+
+    if n < 10 or k < 1:
+        sorted_pois = _detect_pois_loop(ohlc_df, trend, ob_multiplier, liq_pullback_candles)
+        print(sorted_pois)
+        return sorted_pois
+
+    o = ohlc_df["open"].to_numpy(dtype=np.float64)
+    h = ohlc_df["high"].to_numpy(dtype=np.float64)
+    l = ohlc_df["low"].to_numpy(dtype=np.float64)
+    c = ohlc_df["close"].to_numpy(dtype=np.float64)
+    index = ohlc_df.index
+
+    is_bull = trend.lower() == "bullish"
+    trend_up = trend.upper()
+    bull_candle = c > o
+    bear_candle = c < o
+
+    # suffix extremes: suf_low[j] = min(l[j:]), suf_high[j] = max(h[j:])
+    suf_low = np.minimum.accumulate(l[::-1])[::-1]
+    suf_high = np.maximum.accumulate(h[::-1])[::-1]
+
+    # ======================================================
+    # 1️⃣ INSTITUTIONAL ORDER BLOCK DETECTION
+    # ======================================================
+    # Candidates i in [10, n - 3): below 10 the 10-candle lookback is empty.
+    pois: List[Dict] = []
+    lo, hi = 10, n - 3
+
+    if hi > lo:
+        idx = np.arange(lo, hi)
+
+        disp_high = _window(h, 3, lo, hi).max(axis=1)
+        disp_low = _window(l, 3, lo, hi).min(axis=1)
+        disp_range = disp_high - disp_low
+
+        avg_prev_range = _window(h - l, 5, lo - 5, hi - 5).mean(axis=1)
+
+        if is_bull:
+            direction_ok = _window(bull_candle, 3, lo, hi).sum(axis=1) >= 2
+            breaks_lookback = disp_high > _window(h, 10, lo - 10, hi - 10).max(axis=1)
+        else:
+            direction_ok = _window(bear_candle, 3, lo, hi).sum(axis=1) >= 2
+            breaks_lookback = disp_low < _window(l, 10, lo - 10, hi - 10).min(axis=1)
+
+        candidate = (
+            (avg_prev_range > 0)
+            & direction_ok
+            & ~(disp_range < ob_multiplier * avg_prev_range)
+            & breaks_lookback
+        )
+
+        # Base of lb candles before i, tried as lb = 3, 2, 1
+        chosen_lb = np.zeros(len(idx), dtype=np.int64)
+        base_lows = np.zeros(len(idx))
+        base_highs = np.zeros(len(idx))
+
+        for lb in (3, 2, 1):
+            base_low = _window(l, lb, lo - lb, hi - lb).min(axis=1)
+            base_high = _window(h, lb, lo - lb, hi - lb).max(axis=1)
+            base_range = base_high - base_low
+
+            if is_bull:
+                has_opposite = _window(bear_candle, lb, lo - lb, hi - lb).any(axis=1)
+                untouched = ~(suf_low[idx + 3] < base_low)
+            else:
+                has_opposite = _window(bull_candle, lb, lo - lb, hi - lb).any(axis=1)
+                untouched = ~(suf_high[idx + 3] > base_high)
+
+            ok = (
+                candidate
+                & (chosen_lb == 0)
+                & (base_range > 0)
+                & ~(base_range > 0.30 * disp_range)
+                & has_opposite
+                & untouched
+            )
+            chosen_lb[ok] = lb
+            base_lows[ok] = base_low[ok]
+            base_highs[ok] = base_high[ok]
+
+        for j in np.flatnonzero(chosen_lb):
+            pois.append({
+                "time": index[idx[j] - chosen_lb[j]],
+                "type": "OB",
+                "trend": trend_up,
+                "price_low": float(base_lows[j]),
+                "price_high": float(base_highs[j]),
+            })
+
+    # ======================================================
+    # 🔧 OB MERGING LOGIC
+    # ======================================================
+    merged_obs = _merge_order_blocks(pois)
+
+    # ======================================================
+    # 2️⃣ INSTITUTIONAL LIQUIDITY DETECTION
+    # ======================================================
+    # Candidates i in [k + 1, n - 1): i == k has no prior candles.
+    liqs: List[Dict] = []
+    lo, hi = k + 1, n - 1
+
+    if hi > lo:
+        idx = np.arange(lo, hi)
+
+        if is_bull:
+            pullback_ok = _window(bear_candle, k, lo - k, hi - k).all(axis=1)
+            swing_extreme = np.minimum.accumulate(l)[idx - k - 1]
+            pb_extreme = _window(h, k, lo - k, hi - k).max(axis=1)
+            retrace_level = swing_extreme + 0.5 * (pb_extreme - swing_extreme)
+            reached = ~(l[idx] > retrace_level)
+            untapped = ~(suf_low[idx + 1] <= swing_extreme)
+        else:
+            pullback_ok = _window(bull_candle, k, lo - k, hi - k).all(axis=1)
+            swing_extreme = np.maximum.accumulate(h)[idx - k - 1]
+            pb_extreme = _window(l, k, lo - k, hi - k).min(axis=1)
+            retrace_level = swing_extreme - 0.5 * (swing_extreme - pb_extreme)
+            reached = ~(h[idx] < retrace_level)
+            untapped = ~(suf_high[idx + 1] >= swing_extreme)
+
+        for j in np.flatnonzero(pullback_ok & reached & untapped):
+            liq_price = float(swing_extreme[j])
+            liqs.append({
+                "time": index[idx[j] - 1],
+                "type": "LIQ",
+                "trend": trend_up,
+                "price_low": liq_price if is_bull else None,
+                "price_high": liq_price if not is_bull else None,
+            })
+
+    # ======================================================
+    # FINAL OUTPUT
+    # ======================================================
+    pois = merged_obs + liqs
+    sorted_pois = sort_pois_merged(pois)
+    print(sorted_pois)
+    return sorted_pois
+
+
+def _detect_pois_loop(
+    ohlc_df: pd.DataFrame,
+    trend: str,
+    ob_multiplier: float = 1.8,
+    liq_pullback_candles: int = 2,
+) -> List[Dict]:
+    """
+    Original candidate-by-candidate implementation, O(n^2) in leg length.
 
+    Still used for legs shorter than 10 candles, where its negative
+    `iloc` windows wrap around and the vectorized rules do not apply.
+    """
     df = ohlc_df[["open", "high", "low", "close"]].copy()
     df["range"] = df["high"] - df["low"]
 
@@ -126,31 +327,9 @@ def detect_pois_from_swing(
     # ======================================================
     # 🔧 OB MERGING LOGIC (NEW – ONLY REFINEMENT)
     # ======================================================
-    obs = [p for p in pois if p["type"] == "OB"]
+    merged_obs = _merge_order_blocks([p for p in pois if p["type"] == "OB"])
     liqs = [p for p in pois if p["type"] == "LIQ"]
 
-    obs.sort(key=lambda x: x["time"])
-    merged_obs: List[Dict] = []
-
-    for ob in obs:
-        if not merged_obs:
-            merged_obs.append(ob)
-            continue
-
-        last = merged_obs[-1]
-
-        overlap = not (
-            ob["price_high"] < last["price_low"]
-            or ob["price_low"] > last["price_high"]
-        )
-
-        if overlap:
-            last["price_low"] = min(last["price_low"], ob["price_low"])
-            last["price_high"] = max(last["price_high"], ob["price_high"])
-            last["time"] = min(last["time"], ob["time"])
-        else:
-            merged_obs.append(ob)
-
     # ======================================================
     # 2️⃣ INSTITUTIONAL LIQUIDITY DETECTION (UNCHANGED)
     # ======================================================
@@ -212,5 +391,235 @@ def detect_pois_from_swing(
     # ======================================================
     pois = merged_obs + liqs
     sorted_pois = sort_pois_merged(pois)
-    print(sorted_pois)
-    return sorted_pois
\ No newline at end of file
+    return sorted_pois
+
+# ======================================================
+# STREAMING (ONE 4H CANDLE AT A TIME)
+# ======================================================
+class StreamingPOIDetector:
+    """
+    Incremental `detect_pois_from_swing` for a leg that grows one closed
+    4H candle at a time.
+
+    An OB candidate i is fully known once candle i + 3 closes, a LIQ
+    candidate i once candle i + 1 closes; after that the only thing that
+    can change is a later candle breaking its base / tapping its price.
+    Live candidates sit in heaps ordered by that price, so each update
+    pops only what the new candle kills: O(log n) per candle, and `pois()`
+    returns exactly what the batch function would for the same leg.
+    """
+
+    # rows kept: OB lookback (10) + candidate + displacement (3)
+    _OB_ROWS = 14
+
+    def __init__(
+        self,
+        trend: str,
+        ob_multiplier: float = 1.8,
+        liq_pullback_candles: int = 2,
+    ):
+        self.ob_multiplier = ob_multiplier
+        self.liq_pullback_candles = liq_pullback_candles
+        self.reset(trend)
+
+    def reset(self, trend: str) -> None:
+        """
+        Start a new leg.
+        """
+        self.trend = trend
+        self.is_bull = trend.lower() == "bullish"
+        self.n = 0
+
+        # first 9 candles (short legs use the loop implementation)
+        self._head: List[Candle] = []
+        # recent candles: (row, prefix extreme up to and including row)
+        self._recent = deque(maxlen=max(self._OB_ROWS, self.liq_pullback_candles + 3))
+        self._prefix_extreme = None
+
+        # alive candidates by candle index, in detection order
+        self._obs: Dict[int, Dict] = {}
+        self._liqs: Dict[int, Dict] = {}
+        # (kill key, candle index): top is the first one a new candle kills
+        self._ob_heap: List = []
+        self._liq_heap: List = []
+
+    def __len__(self) -> int:
+        return self.n
+
+    # --------------------------------------------------
+    # UPDATE
+    # --------------------------------------------------
+    def update(self, candle: Candle) -> None:
+        """
+        Feed one closed 4H candle.
+        """
+        if self.n < 9:
+            self._head.append(candle)
+
+        if self._prefix_extreme is None:
+            self._prefix_extreme = candle.low if self.is_bull else candle.high
+        elif self.is_bull:
+            self._prefix_extreme = min(self._prefix_extreme, candle.low)
+        else:
+            self._prefix_extreme = max(self._prefix_extreme, candle.high)
+
+        self._recent.append((candle, self._prefix_extreme))
+        self.n += 1
+
+        self._kill(candle)
+        self._evaluate_ob()
+        self._evaluate_liq()
+
+    def _kill(self, candle: Candle) -> None:
+        # bull: OB dies on low < base_low, LIQ on low <= price (max-heaps)
+        # bear: OB dies on high > base_high, LIQ on high >= price (min-heaps)
+        if self.is_bull:
+            low = candle.low
+            while self._ob_heap and -self._ob_heap[0][0] > low:
+                self._obs.pop(heapq.heappop(self._ob_heap)[1], None)
+            while self._liq_heap and -self._liq_heap[0][0] >= low:
+                self._liqs.pop(heapq.heappop(self._liq_heap)[1], None)
+        else:
+            high = candle.high
+            while self._ob_heap and self._ob_heap[0][0] < high:
+                self._obs.pop(heapq.heappop(self._ob_heap)[1], None)
+            while self._liq_heap and self._liq_heap[0][0] <= high:
+                self._liqs.pop(heapq.heappop(self._liq_heap)[1], None)
+
+    def _row(self, i: int) -> Candle:
+        # candle i, which must still be inside the recent window
+        return self._recent[i - self.n][0]
+
+    def _evaluate_ob(self) -> None:
+        i = self.n - 4
+        if i < 10:
+            return
+
+        disp = [self._row(j) for j in range(i, i + 3)]
+        disp_high = max(c.high for c in disp)
+        disp_low = min(c.low for c in disp)
+        disp_range = disp_high - disp_low
+
+        prev_ranges = np.array([self._row(j).high - self._row(j).low for j in range(i - 5, i)])
+        avg_prev_range = prev_ranges.mean()
+        if avg_prev_range <= 0:
+            return
+
+        if self.is_bull:
+            if sum(c.close > c.open for c in disp) < 2:
+                return
+        else:
+            if sum(c.close < c.open for c in disp) < 2:
+                return
+
+        if disp_range < self.ob_multiplier * avg_prev_range:
+            return
+
+        lookback = [self._row(j) for j in range(i - 10, i)]
+        if self.is_bull:
+            if disp_high <= max(c.high for c in lookback):
+                return
+        else:
+            if disp_low >= min(c.low for c in lookback):
+                return
+
+        # First base (3, 2, 1 candles) passing the static checks. A later
+        # break of its base also breaks every smaller base, so this choice
+        # never changes afterwards.
+        for lb in (3, 2, 1):
+            base = [self._row(j) for j in range(i - lb, i)]
+            base_low = min(c.low for c in base)
+            base_high = max(c.high for c in base)
+            base_range = base_high - base_low
+
+            if base_range <= 0 or base_range > 0.30 * disp_range:
+                continue
+
+            if self.is_bull:
+                if not any(c.close < c.open for c in base):
+                    continue
+            else:
+                if not any(c.close > c.open for c in base):
+                    continue
+            break
+        else:
+            return
+
+        # future starts at candle i + 3, the one that just closed
+        last = self._row(i + 3)
+        if self.is_bull and last.low < base_low:
+            return
+        if not self.is_bull and last.high > base_high:
+            return
+
+        self._obs[i] = {
+            "time": pd.Timestamp(self._row(i - lb).time),
+            "type": "OB",
+            "trend": self.trend.upper(),
+            "price_low": float(base_low),
+            "price_high": float(base_high),
+        }
+        key = -base_low if self.is_bull else base_high
+        heapq.heappush(self._ob_heap, (key, i))
+
+    def _evaluate_liq(self) -> None:
+        k = self.liq_pullback_candles
+        i = self.n - 2
+        if k < 1 or i < k + 1:
+            return
+
+        pullback = [self._row(j) for j in range(i - k, i)]
+        swing_extreme = self._recent[i - k - 1 - self.n][1]
+        curr = self._row(i)
+        last = self._row(i + 1)
+
+        if self.is_bull:
+            if not all(c.close < c.open for c in pullback):
+                return
+            pb_extreme = max(c.high for c in pullback)
+            retrace_level = swing_extreme + 0.5 * (pb_extreme - swing_extreme)
+            if curr.low > retrace_level:
+                return
+            if last.low <= swing_extreme:
+                return
+        else:
+            if not all(c.close > c.open for c in pullback):
+                return
+            pb_extreme = min(c.low for c in pullback)
+            retrace_level = swing_extreme - 0.5 * (swing_extreme - pb_extreme)
+            if curr.high < retrace_level:
+                return
+            if last.high >= swing_extreme:
+                return
+
+        liq_price = float(swing_extreme)
+        self._liqs[i] = {
+            "time": pd.Timestamp(self._row(i - 1).time),
+            "type": "LIQ",
+            "trend": self.trend.upper(),
+            "price_low": liq_price if self.is_bull else None,
+            "price_high": liq_price if not self.is_bull else None,
+        }
+        key = -liq_price if self.is_bull else liq_price
+        heapq.heappush(self._liq_heap, (key, i))
+
+    # --------------------------------------------------
+    # QUERY
+    # --------------------------------------------------
+    def pois(self) -> List[Dict]:
+        """
+        Current POIs of the leg, same content and order as
+        `detect_pois_from_swing` on all candles fed so far.
+        """
+        if self.n < 10 or self.liq_pullback_candles < 1:
+            if self.n >= 10:
+                raise ValueError("liq_pullback_candles must be >= 1 for streaming")
+            if not self._head:
+                return []
+            df = pd.DataFrame(self._head).set_index("time")
+            df.index = pd.DatetimeIndex(df.index)
+            return _detect_pois_loop(df, self.trend, self.ob_multiplier, self.liq_pullback_candles)
+
+        merged_obs = _merge_order_blocks([dict(p) for p in self._obs.values()])
+        liqs = [dict(p) for p in self._liqs.values()]
+        return sort_pois_merged(merged_obs + liqs)
@@ -1,53 +1,147 @@
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Iterable
+
+import numpy as np
 import pandas as pd
 
 
-def resample_to_4h(data: pd.DataFrame) -> pd.DataFrame:
+# Bucket length in minutes. All buckets are aligned to the epoch, which for
+# these sizes is the same as aligning to midnight (pandas "start_day").
+TIMEFRAME_MINUTES = {
+    "1m": 1,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440,
+}
+
+
+@dataclass
+class MultiTimeframe:
     """
-    Resample 1-minute DataFrame to 4-hour OHLC DataFrame.
+    Result of `resample_multi`.
+
+    frames     : tf -> OHLC DataFrame (DatetimeIndex, left-labelled)
+    index_maps : tf -> {"start_1m", "stop_1m", "start_5m", "stop_5m"}
+                 int64 arrays, one entry per bar of that tf, giving the
+                 half-open [start, stop) range of child 1M rows / 5M bars.
+                 The 5M ranges are only present when "5m" was requested.
     """
+    frames: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    index_maps: Dict[str, Dict[str, np.ndarray]] = field(default_factory=dict)
 
-    if data.empty:
-        return pd.DataFrame(columns=["open", "high", "low", "close"])
 
-    df = data.copy()
-    df = df.sort_index()
+def _ohlc_arrays(data):
+    """
+    (epoch_minutes, open, high, low, close) from a 1M DataFrame or CandleArrays.
+    """
+    if isinstance(data, pd.DataFrame):
+        if not isinstance(data.index, pd.DatetimeIndex):
+            data = data.set_axis(pd.to_datetime(data.index))
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index(kind="stable")
+        minutes = data.index.values.astype("datetime64[m]").astype(np.int64)
+        return (
+            minutes,
+            data["open"].to_numpy(dtype=np.float64),
+            data["high"].to_numpy(dtype=np.float64),
+            data["low"].to_numpy(dtype=np.float64),
+            data["close"].to_numpy(dtype=np.float64),
+        )
 
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
+    # CandleArrays (engine.candle_store) – already sorted epoch minutes
+    return data.time, data.open, data.high, data.low, data.close
 
-    df_4h = df.resample("4H", label="left", closed="left").agg(
-        open=("open", "first"),
-        high=("high", "max"),
-        low=("low", "min"),
-        close=("close", "last"),
-    )
 
-    df_4h.dropna(how="all", inplace=True)
-    return df_4h
+def _aggregate(minutes, o, h, l, c, tf_minutes):
+    """
+    One O(n) pass: group consecutive rows falling in the same bucket.
+    Returns bar times, OHLC and the [start, stop) row range of each bar.
+    """
+    bucket = minutes // tf_minutes
+    starts = np.flatnonzero(np.diff(bucket)) + 1
+    starts = np.concatenate(([0], starts))
+    stops = np.append(starts[1:], len(bucket))
 
+    return (
+        bucket[starts] * tf_minutes,
+        o[starts],
+        np.maximum.reduceat(h, starts),
+        np.minimum.reduceat(l, starts),
+        c[stops - 1],
+        starts,
+        stops,
+    )
 
 
-def resample_to_5m(data: pd.DataFrame) -> pd.DataFrame:
+def resample_multi(data, timeframes: Iterable[str] = ("5m", "30m", "4h")) -> MultiTimeframe:
     """
-    Resample 1-minute DataFrame to 5-minute OHLC DataFrame.
+    Resample 1-minute data to several timeframes in one vectorized pass.
+
+    Each higher timeframe is built from the largest already-built timeframe
+    that divides it (1M -> 5M -> 30M -> 4H), so only the first level touches
+    every 1M row.
     """
+    tfs = sorted(set(timeframes), key=lambda tf: TIMEFRAME_MINUTES[tf])
+    result = MultiTimeframe()
 
-    if data.empty:
-        return pd.DataFrame(columns=["open", "high", "low", "close"])
+    minutes, o, h, l, c = _ohlc_arrays(data)
 
-    df = data.copy()
-    df = df.sort_index()
+    if len(minutes) == 0:
+        for tf in tfs:
+            result.frames[tf] = pd.DataFrame(columns=["open", "high", "low", "close"])
+        return result
 
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
+    # level name -> (times, o, h, l, c, start_1m, stop_1m)
+    built = {"1m": (minutes, o, h, l, c, None, None)}
 
-    df_5m = df.resample("5T", label="left", closed="left").agg(
-        open=("open", "first"),
-        high=("high", "max"),
-        low=("low", "min"),
-        close=("close", "last"),
-    )
+    for tf in tfs:
+        m = TIMEFRAME_MINUTES[tf]
+
+        parent = max(
+            (p for p in built if m % TIMEFRAME_MINUTES[p] == 0),
+            key=lambda p: TIMEFRAME_MINUTES[p],
+        )
+        pt, po, ph, pl, pc, p_start, p_stop = built[parent]
 
-    df_5m.dropna(how="all", inplace=True)
-    return df_5m
+        times, bo, bh, bl, bc, starts, stops = _aggregate(pt, po, ph, pl, pc, m)
+
+        if p_start is None:
+            start_1m, stop_1m = starts, stops
+        else:
+            start_1m, stop_1m = p_start[starts], p_stop[stops - 1]
+
+        built[tf] = (times, bo, bh, bl, bc, start_1m, stop_1m)
+
+        result.frames[tf] = pd.DataFrame(
+            {"open": bo, "high": bh, "low": bl, "close": bc},
+            index=pd.DatetimeIndex(times.astype("datetime64[m]"), name="time"),
+        )
+        result.index_maps[tf] = {"start_1m": start_1m, "stop_1m": stop_1m}
+
+    if "5m" in built:
+        t5 = built["5m"][0]
+        for tf in tfs:
+            times = built[tf][0]
+            result.index_maps[tf]["start_5m"] = np.searchsorted(t5, times, side="left")
+            result.index_maps[tf]["stop_5m"] = np.searchsorted(
+                t5, times + TIMEFRAME_MINUTES[tf], side="left"
+            )
+
+    return result
+
+
+def resample_to_4h(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resample 1-minute DataFrame to 4-hour OHLC DataFrame.
+    """
+    return resample_multi(data, ("4h",)).frames["4h"]
+
+
+def resample_to_5m(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resample 1-minute DataFrame to 5-minute OHLC DataFrame.
+    """
+    return resample_multi(data, ("5m",)).frames["5m"]
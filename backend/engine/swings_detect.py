@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -9,8 +10,10 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'debug'))
 
 from engine.poi_detection import detect_pois_from_swing
-from engine.mins_choch import process_structure_and_return_last_swing
+from engine.mins_choch import StreamingSwingTracker
 from engine.plan_trade_5mins import plan_trade_from_choch_leg
+from engine.tf_index import TimeframeIndex
+from engine.fast_scan import next_trigger, poi_tap
 
 
 
@@ -25,6 +28,17 @@ from engine.plan_trade_5mins import plan_trade_from_choch_leg
 # 🔐 CENTRALIZED EVENT LOGGER
 
 
+@dataclass
+class StructureLeg:
+    """
+    One structure leg: where it starts in the full 4H / 5M frames,
+    its trend and the BOS / CHOCH time that opened it.
+    """
+    start_4h: int
+    start_5m: int
+    trend: str
+    bos_time: pd.Timestamp
+
 
 def market_structure_mapping(
     df_4h: pd.DataFrame,
@@ -33,29 +47,77 @@ def market_structure_mapping(
     bos_time,
     pullback_pct: float = 0.90,
     min_pullback_candles: int = 10,
-    depth: int = 0,
-    max_depth: int = 50,
+    tf_index: Optional[TimeframeIndex] = None,
 ) -> None:
+    """
+    Walk the 4H / 5M history leg by leg. Every CHOCH or BOS hands the next
+    leg back to this loop instead of recursing, so there is no depth limit
+    and only the current leg's state is alive at any time.
+    """
+    if tf_index is None:
+        tf_index = TimeframeIndex(df_4h, df_5m)
+
+    leg = StructureLeg(start_4h=0, start_5m=0, trend=trend.upper(), bos_time=bos_time)
+    depth = 0
+
+    while leg is not None:
+        leg = _map_structure_leg(
+            df_4h,
+            df_5m,
+            tf_index,
+            leg,
+            depth=depth,
+            pullback_pct=pullback_pct,
+            min_pullback_candles=min_pullback_candles,
+        )
+        depth += 1
+
+
+def _map_structure_leg(
+    full_4h: pd.DataFrame,
+    full_5m: pd.DataFrame,
+    tf_index: TimeframeIndex,
+    leg: StructureLeg,
+    depth: int,
+    pullback_pct: float,
+    min_pullback_candles: int,
+) -> Optional[StructureLeg]:
+    """
+    Map a single leg. Returns the next leg on CHOCH / BOS, else None.
+    """
+    indent = "    " * depth
+    trend = leg.trend
+    bos_time = leg.bos_time
+    print(f"\n{indent}🚀 MARKET STRUCTURE START")
 
+    # Each leg works on a suffix of the full frames; local positions are
+    # the tf_index (full-frame) positions minus the leg's offsets.
+    off_4h = leg.start_4h
+    off_5m = leg.start_5m
+    df_4h = full_4h.iloc[off_4h:]
+    df_5m = full_5m.iloc[off_5m:]
 
+    if len(df_4h) < 5:
+        print(f"{indent}❌ Not enough 4H data after BOS")
+        return None
 
+    def ffill_5m(ts) -> int:
+        pos = tf_index.ffill_5m(ts)
+        return pos - off_5m if pos >= off_5m else -1
 
+    def bfill_5m(ts) -> int:
+        pos = tf_index.bfill_5m(ts)
+        return max(pos, off_5m) - off_5m if pos >= 0 else -1
 
+    def ffill_4h(ts) -> int:
+        pos = tf_index.ffill_4h(ts)
+        return pos - off_4h if pos >= off_4h else -1
 
-    indent = "    " * depth
-    trend = trend.upper()
-    print(f"\n{indent}🚀 MARKET STRUCTURE START")
-        
-
-
-
-    if depth >= max_depth:
-        print(f"{indent}⛔ Max recursion depth reached")
-        return
+    def start_5m(ts) -> int:
+        # first 5M position at or after ts, i.e. df_5m.index >= ts
+        pos = bfill_5m(ts)
+        return pos if pos >= 0 else len(df_5m)
 
-    if len(df_4h) < 5:
-        print(f"{indent}❌ Not enough 4H data after BOS")
-        return
     first_candle = df_4h.iloc[0]
 
     if trend == "BULLISH":
@@ -70,14 +132,21 @@ def market_structure_mapping(
     # PULLBACK VALIDATION (STARTS FROM BOS ONLY)
     candidate_high = None
     candidate_low = None
+    candidate_high_pos = None
+    candidate_low_pos = None
 
     bearish_count = 0
     bullish_count = 0
 
     pullback_confirmed = False
     pullback_time = None
-    swinh_high_time=None
-    swing_low_time=None
+    # Swings are tracked by 4H position (local to df_4h) + timestamp, so the
+    # next leg (the `StructureLeg` handed back to the loop) is sliced directly
+    # instead of searching by price.
+    swing_high_pos = None
+    swing_low_pos = None
+    swing_high_time = None
+    swing_low_time = None
     protected_5m_point = None
     protected_5m_time = None
 
@@ -89,9 +158,8 @@ def market_structure_mapping(
 
     opp_pullback_count = 0
 
-    pullback_df = df_4h.loc[df_4h.index >= bos_time]
-
-    start_idx = df_4h.index.get_loc(pullback_df.index[0]) if not df_4h.empty else 0
+    start_idx = int(df_4h.index.searchsorted(bos_time, side="left"))
+    pullback_df = df_4h.iloc[start_idx:]
 
     for offset_idx, (t, c) in enumerate(pullback_df.iterrows()):
         idx = start_idx + offset_idx  # correct 4H index for logging
@@ -99,6 +167,7 @@ def market_structure_mapping(
         if trend == "BULLISH":
             if candidate_high is None or c.high > candidate_high:
                 candidate_high = c.high
+                candidate_high_pos = idx
                 bearish_count = 0
                 if protected_low is None or candidate_high is None:
                     continue
@@ -136,6 +205,8 @@ def market_structure_mapping(
                 pullback_time = t
                 swing_high = candidate_high
                 swing_low = protected_low
+                swing_high_pos = candidate_high_pos
+                swing_low_pos = 0
 
                 # Determine reason based on depth or candle count
                 if bearish_count >= min_pullback_candles:
@@ -158,6 +229,7 @@ def market_structure_mapping(
 
             if candidate_low is None or c.low < candidate_low:
                 candidate_low = c.low
+                candidate_low_pos = idx
                 bullish_count = 0
                 if protected_high is None or candidate_low is None:
                     continue
@@ -191,6 +263,8 @@ def market_structure_mapping(
                 pullback_time = t
                 swing_low = candidate_low
                 swing_high = protected_high
+                swing_low_pos = candidate_low_pos
+                swing_high_pos = 0
                 
                 if bullish_count >= min_pullback_candles:
                     reason = f"confirmed_by_candle_count ({bullish_count})"
@@ -207,6 +281,13 @@ def market_structure_mapping(
 
                 break  
         
+    if pullback_time is None:
+        print(f"{indent}❌ No 4H pullback confirmed after BOS")
+        return None
+
+    swing_high_time = df_4h.index[swing_high_pos]
+    swing_low_time = df_4h.index[swing_low_pos]
+
     # ==================================================
     # PHASE 3 — POI DETECTION (FULL LEG)
     # ==================================================
@@ -215,9 +296,9 @@ def market_structure_mapping(
     leg_end_4h = pullback_time      # end of swing_df
 
     # Align 4H swing to nearest 5M candles
-    idx_start = df_5m.index.get_indexer([leg_start_4h], method="ffill")[0]
+    idx_start = ffill_5m(leg_start_4h)
     leg_start_5m = df_5m.index[idx_start]
-    idx_end = df_5m.index.get_indexer([leg_end_4h], method="ffill")[0]
+    idx_end = ffill_5m(leg_end_4h)
     leg_end_5m = df_5m.index[idx_end]
 
     # Detect POIs
@@ -246,25 +327,27 @@ def market_structure_mapping(
     # -----------------------------
     for poi_idx, poi in enumerate(unique_pois, 1):
         # Align POI time to nearest 5M candle
-        nearest_idx = df_5m.index.get_indexer([poi["time"]], method="ffill")[0]
-        start_time = df_5m.index[nearest_idx]
+        start_pos = ffill_5m(poi["time"])
+        if start_pos < 0:
+            # POI older than the leg's first 5M candle: nothing to map it to
+            continue
+        start_time = df_5m.index[start_pos]
 
         # End time for POI rectangle (4H window)
         end_time = start_time + pd.Timedelta(hours=4)
         if end_time > df_5m.index[-1]:
             end_time = df_5m.index[-1]
 
-        # Select 5M candles for this POI
-        mask = (df_5m.index >= start_time) & (df_5m.index <= end_time)
-        df_range = df_5m.loc[mask]
-        if df_range.empty:
+        # 5M candles for this POI are [start_pos, end_pos]
+        end_pos = ffill_5m(end_time)
+        if end_pos < start_pos:
             continue
 
         mapped = {
             "type": poi["type"],
             "trend": poi["trend"],
-            "start_time": df_range.index[0],
-            "end_time": df_range.index[-1],
+            "start_time": start_time,
+            "end_time": df_5m.index[end_pos],
             "leg_start_5m": leg_start_5m,
             "leg_end_5m": leg_end_5m
         }
@@ -298,12 +381,19 @@ def market_structure_mapping(
     # PHASE 4 — POST-PULLBACK MONITORING (5M DRIVEN)
     # ==================================================
 
-    df_4h_post = df_4h.loc[df_4h.index > pullback_time]
-    df_5m_post = df_5m.loc[df_5m.index > pullback_time]
+    post_start = ffill_5m(pullback_time) + 1
+    n5 = len(df_5m)
 
-    if df_5m_post.empty:
+    if post_start >= n5:
         print(f"{indent}❌ No 5M data after pullback")
-        return
+        return None
+
+    # Raw 5M columns for the monitor (no per-candle Series)
+    times_5m = df_5m.index
+    open_5m = df_5m["open"].to_numpy(dtype=np.float64)
+    high_5m = df_5m["high"].to_numpy(dtype=np.float64)
+    low_5m = df_5m["low"].to_numpy(dtype=np.float64)
+    close_5m = df_5m["close"].to_numpy(dtype=np.float64)
 
     poi_active = False
     trade_details = None
@@ -313,6 +403,11 @@ def market_structure_mapping(
     protected_5m_point = None
     protected_5m_time = None
 
+    # 5M structure of the opposite trend from the leg's swing point, fed
+    # lazily up to each POI tap instead of re-walked from the start
+    swing_tracker = StreamingSwingTracker("BEARISH" if trend == "BULLISH" else "BULLISH")
+    swing_tracker_pos = start_5m(swing_high_time if trend == "BULLISH" else swing_low_time)
+
     opp_pullback_count = 0
     choch_validated = False
     entry_filled = False
@@ -323,7 +418,36 @@ def market_structure_mapping(
     temp_pullback_low = None
 
 
-    for t5, c5 in df_5m_post.iterrows():
+    pos5 = post_start - 1
+    while pos5 < n5 - 1:
+        pos5 += 1
+
+        # Idle (no POI / trade / 5M structure in play): jump straight to the
+        # next candle that can break the swing range or tap the POI.
+        if (
+            not trade_active
+            and not poi_active
+            and not poi_tapped
+            and not choch_validated
+            and protected_5m_point is None
+        ):
+            idle_poi = next((p for p in pois if p.get("state") != "INVALIDATED"), None)
+            # floats on both sides, also for LIQ POIs (one side is None)
+            tap_kind, tap_low, tap_high = poi_tap(idle_poi, trend)
+
+            pos5 = next_trigger(
+                high_5m, low_5m, close_5m, pos5,
+                swing_low, swing_high, tap_kind,
+                tap_low, tap_high,
+            )
+            if pos5 >= n5:
+                break
+
+        t5 = times_5m[pos5]
+        open5 = open_5m[pos5]
+        high5 = high_5m[pos5]
+        low5 = low_5m[pos5]
+        close5 = close_5m[pos5]
 
         if trade_active and trade_details:
 
@@ -332,7 +456,7 @@ def market_structure_mapping(
                 # Check entry fill FIRST (before TP/SL)
                 entry_filled_this_candle = False
                 
-                if c5.low <= trade_details["entry"] <= c5.high:
+                if low5 <= trade_details["entry"] <= high5:
                     entry_filled_this_candle = True
 
                 if entry_filled_this_candle:
@@ -352,7 +476,7 @@ def market_structure_mapping(
                     if trade_details["direction"] == "BUY":
                         tp_2pct_level = entry + 0.02 * (tp - entry)
 
-                        if c5.high >= tp_2pct_level:
+                        if high5 >= tp_2pct_level:
                             print(
                                 f"{indent}🟩 TP WITHOUT ENTRY (2% LEVEL HIT @ {tp_2pct_level}) → TRADE INVALID"
                             )
@@ -372,7 +496,7 @@ def market_structure_mapping(
                     else:  # SELL
                         tp_2pct_level = entry - 0.02 * (entry - tp)
 
-                        if c5.low <= tp_2pct_level:
+                        if low5 <= tp_2pct_level:
                             print(
                                 f"{indent}🟩 TP WITHOUT ENTRY (2% LEVEL HIT @ {tp_2pct_level}) → TRADE INVALID"
                             )
@@ -395,7 +519,7 @@ def market_structure_mapping(
 
                 if trade_details["direction"] == "BUY":
 
-                    if c5.low <= trade_details["sl"]:
+                    if low5 <= trade_details["sl"]:
                         print(f"{indent}🟥 SL HIT")
 
                         trade_active = False
@@ -410,7 +534,7 @@ def market_structure_mapping(
                         continue
 
                     # TAKE PROFIT
-                    elif c5.high >= trade_details["tp"]:
+                    elif high5 >= trade_details["tp"]:
                         print(f"{indent}🟩 TP HIT")
 
                         trade_active = False
@@ -426,7 +550,7 @@ def market_structure_mapping(
 
                 else:  # SELL
 
-                    if c5.high >= trade_details["sl"]:
+                    if high5 >= trade_details["sl"]:
                         print(f"{indent}🟥 SL HIT")
 
                         trade_active = False
@@ -441,7 +565,7 @@ def market_structure_mapping(
                         continue
 
                     # TAKE PROFIT
-                    elif c5.low <= trade_details["tp"]:
+                    elif low5 <= trade_details["tp"]:
                         print(f"{indent}🟩 TP HIT")
 
                         trade_active = False
@@ -462,51 +586,36 @@ def market_structure_mapping(
         # --------------------------------------------------
         if not trade_active:
 
-            if trend == "BULLISH" and c5.close < swing_low:
+            if trend == "BULLISH" and close5 < swing_low:
                 print(f"{indent}🟥 CHOCH @ {t5} in 4h")
-                htf_idx = df_4h.index.get_indexer([t5], method="ffill")[0]
+                htf_idx = ffill_4h(t5)
                 htf_time = df_4h.index[htf_idx]
                 reason = "price closed below previous swing low → structure invalidated"
 
 
 
-                # trim before swing_high
-                df_4h_new = df_4h.loc[df_4h.index >= df_4h.loc[df_4h['high'] == swing_high].index[0]]
-                # 🔁 Align 5M with HTF swing HIGH
-                swing_high_time = df_4h.loc[df_4h['high'] == swing_high].index[0]
-                df_5m_new = df_5m.loc[df_5m.index >= swing_high_time]
-
-
-
-                market_structure_mapping(
-                    df_4h=df_4h_new,
-                    df_5m=df_5m_new,
+                # trim before swing_high, align 5M with HTF swing HIGH
+                return StructureLeg(
+                    start_4h=off_4h + swing_high_pos,
+                    start_5m=off_5m + start_5m(swing_high_time),
                     trend="BEARISH",
                     bos_time=t5,
-                    depth=depth + 1,
                 )
-                return
 
-            if trend == "BEARISH" and c5.close > swing_high:
+            if trend == "BEARISH" and close5 > swing_high:
                 print(f"{indent}🟥 CHOCH @ {t5} in 4h")
-                htf_idx = df_4h.index.get_indexer([t5], method="ffill")[0]
+                htf_idx = ffill_4h(t5)
                 htf_time = df_4h.index[htf_idx]
                 reason = "price closed above previous swing high → structure invalidated"
 
 
 
-                df_4h_new = df_4h.loc[df_4h.index >= df_4h.loc[df_4h['low'] == swing_low].index[0]]
-                # 🔁 Align 5M with HTF swing HIGH
-                swing_low_time = df_4h.loc[df_4h['low'] == swing_low].index[0]
-                df_5m_new = df_5m.loc[df_5m.index >= swing_low_time]
-
-
-                return market_structure_mapping(
-                    df_4h=df_4h_new,
-                    df_5m=df_5m_new,
+                # trim before swing_low, align 5M with HTF swing LOW
+                return StructureLeg(
+                    start_4h=off_4h + swing_low_pos,
+                    start_5m=off_5m + start_5m(swing_low_time),
                     trend="BULLISH",
                     bos_time=t5,
-                    depth=depth + 1,
                 )
 
         # --------------------------------------------------
@@ -514,93 +623,56 @@ def market_structure_mapping(
         # --------------------------------------------------
         if not poi_active:
 
-            if trend == "BULLISH" and c5.close > swing_high:
+            if trend == "BULLISH" and close5 > swing_high:
                 print(f"{indent}🟦 BOS WITHOUT POI @ {t5} in 4h")
-                htf_idx = df_4h.index.get_indexer([t5], method="ffill")[0]
+                htf_idx = ffill_4h(t5)
                 htf_time = df_4h.index[htf_idx]
                 reason = "price closed above previous swing high → BOS triggered without prior POI"
 
 
     
                 # lowest low from swing_high → BOS
-                # 1️⃣ Find the swing high time (timestamp of candle that formed swing high)
-                swing_high_time = df_4h.loc[df_4h['high'] == swing_high].index[0]
-
                 # slice from swing_high to BOS
-                slice_df = df_4h.loc[swing_high_time:t5]
+                slice_df = df_4h.iloc[swing_high_pos:htf_idx + 1]
 
                 if not slice_df.empty:
-                    lowest_low_time = slice_df['low'].idxmin()   # safest
-                    df_4h_new = df_4h.loc[df_4h.index >= lowest_low_time]
+                    lowest_low_pos = swing_high_pos + int(slice_df["low"].to_numpy().argmin())
                 else:
-                    df_4h_new = df_4h.copy()   # fallback
+                    lowest_low_pos = 0   # fallback
+                lowest_low_time = df_4h.index[lowest_low_pos]
 
                 # 5M — align to SAME swing low time
-                start_5m_idx = df_5m.index.get_indexer(
-                    [lowest_low_time], method="bfill"
-                )[0]
-
-                df_5m_new = df_5m.iloc[start_5m_idx:]
-
-
-
-                
-                market_structure_mapping(
-                    df_4h=df_4h_new,
-                    df_5m=df_5m_new,
+                return StructureLeg(
+                    start_4h=off_4h + lowest_low_pos,
+                    start_5m=off_5m + start_5m(lowest_low_time),
                     trend="BULLISH",
                     bos_time=t5,
-                    depth=depth + 1,
                 )
-                return
 
-            if trend == "BEARISH" and c5.close < swing_low:
+            if trend == "BEARISH" and close5 < swing_low:
                 print(f"{indent}🟦 BOS WITHOUT POI @ {t5} in 4h")
-                htf_idx = df_4h.index.get_indexer([t5], method="ffill")[0]
+                htf_idx = ffill_4h(t5)
                 htf_time = df_4h.index[htf_idx]
                 reason = "price closed below previous swing low → BOS triggered without prior POI"
 
 
 
             
-                # 1️⃣ Find the swing low time (timestamp of candle that formed swing low)
-                swing_low_time = df_4h.loc[df_4h['low'] == swing_low].index[0]
                 # slice from swing_low to BOS
-                slice_df = df_4h.loc[swing_low_time:t5]
+                slice_df = df_4h.iloc[swing_low_pos:htf_idx + 1]
 
                 if not slice_df.empty:
-                    highest_high_time = slice_df['high'].idxmax()
-                    df_4h_new = df_4h.loc[df_4h.index >= highest_high_time]
+                    highest_high_pos = swing_low_pos + int(slice_df["high"].to_numpy().argmax())
                 else:
-                    df_4h_new = df_4h.copy()   # fallback
-
-
-                # 1️⃣ Find the swing low time (timestamp of candle that formed swing low)
-                swing_low_time = df_4h.loc[df_4h['low'] == swing_low].index[0]
-                # slice from swing_low to BOS
-                slice_df = df_4h.loc[swing_low_time:t5]
+                    highest_high_pos = 0   # fallback
 
-                if not slice_df.empty:
-                    highest_high_time = slice_df['high'].idxmax()
-                    df_4h_new = df_4h.loc[df_4h.index >= highest_high_time]
-                else:
-                    df_4h_new = df_4h.copy()   # fallback
-
-
-                # ✅ Refine 5M as well (usual)
-                df_5m_new = df_5m.loc[df_5m.index >= t5]   # t5 = BOS time
-
-
-
-                                
-                market_structure_mapping( 
-                    df_4h=df_4h_new,
-                    df_5m=df_5m_new,
+                # ✅ Refine 5M as well (usual) — t5 = BOS time
+                return StructureLeg(
+                    start_4h=off_4h + highest_high_pos,
+                    start_5m=off_5m + pos5,
                     trend="BEARISH",
                     bos_time=t5,
-                    depth=depth + 1,
                 )
-                return
       
         # --------------------------------------------------
         # 3️⃣ POI TAP (TREND + TYPE BASED)
@@ -617,52 +689,43 @@ def market_structure_mapping(
 
                 if poi_type == "OB":
                     # OB tapped if candle overlaps with OB range
-                    if c5.low <= poi_high and c5.high >= poi_low:
+                    if low5 <= poi_high and high5 >= poi_low:
                         poi_tapped = True
 
                 elif poi_type == "LIQ":
                     # LIQ tapped if candle touches or breaks below LIQ low
-                    if c5.low <= poi_low:
+                    if low5 <= poi_low:
                         poi_tapped = True
 
             else:
 
                 if poi_type == "OB":
                     # OB tapped if candle overlaps with OB range
-                    if c5.high >= poi_low and c5.low <= poi_high:
+                    if high5 >= poi_low and low5 <= poi_high:
                         poi_tapped = True
 
                 elif poi_type == "LIQ":
                     # LIQ tapped if candle touches or breaks above LIQ high
-                    if c5.high >= poi_high:
+                    if high5 >= poi_high:
                         poi_tapped = True
 
             if poi_tapped:
                 poi_active = True
                 active_poi["activation_time"] = t5
-                active_poi["activation_idx"] = df_5m.index.get_indexer(
-                    [t5], method="nearest"
-                )[0]
+                active_poi["activation_idx"] = pos5
 
                 print(f"{indent}🔥 POI TAPPED ({poi_type}) @ {t5}")
                 poi_time_4h = active_poi["time"]
-                poi_5m_idx = df_5m.index.get_indexer([poi_time_4h], method="bfill")[0]
+                poi_5m_idx = bfill_5m(poi_time_4h)
                 active_poi["start_5m_time"] = df_5m.index[poi_5m_idx]
 
                 
-                # 🔹 CALL 5M STRUCTURE FUNCTION HERE
-                opp_trend = "BEARISH" if trend == "BULLISH" else "BULLISH"
-                if trend == "BULLISH":
-                    swing_high_time = df_4h.loc[df_4h['high'] == swing_high].index[0]
-                    m5_slice = df_5m.loc[swing_high_time:t5]
-                else:
-                    swing_low_time = df_4h.loc[df_4h['low'] == swing_low].index[0]
-                    m5_slice = df_5m.loc[swing_low_time:t5]
-
-                protected_5m_point = process_structure_and_return_last_swing(
-                    df=m5_slice,
-                    trend=opp_trend,
+                # 🔹 ADVANCE 5M STRUCTURE TO THIS CANDLE
+                protected_5m_point = swing_tracker.extend(
+                    open_5m, high_5m, low_5m, close_5m,
+                    swing_tracker_pos, pos5 + 1,
                 )
+                swing_tracker_pos = max(swing_tracker_pos, pos5 + 1)
                 protected_5m_time = t5
                 print(
                     f"[DEBUG SET] from process_structure | "
@@ -703,7 +766,7 @@ def market_structure_mapping(
         # --------------------------------------------------
         if poi_active and active_poi:
 
-            current_idx = df_5m.index.get_indexer([t5], method="nearest")[0]
+            current_idx = pos5
             # ⛔ DO NOT invalidate on the tap candle
             if current_idx <= active_poi["activation_idx"]:
                 pass
@@ -750,7 +813,7 @@ def market_structure_mapping(
                         else:  # LIQ
                             invalidation_level = (p0_low + swing_low) / 2
 
-                    if invalidation_level is not None and c5.low < invalidation_level:
+                    if invalidation_level is not None and low5 < invalidation_level:
                         print(f"{indent}❌ POI INVALIDATED @ {t5}")
                         print(f"{indent}   Level broken: {invalidation_level}")
 
@@ -793,7 +856,7 @@ def market_structure_mapping(
                         else:  # LIQ
                             invalidation_level = (p0_high + swing_high) / 2
 
-                    if invalidation_level is not None and c5.high > invalidation_level:
+                    if invalidation_level is not None and high5 > invalidation_level:
                         print(f"{indent}❌ POI INVALIDATED @ {t5}")
                         print(f"{indent}   Level broken: {invalidation_level}")
 
@@ -816,7 +879,7 @@ def market_structure_mapping(
             if trend == "BULLISH":
                 # opp_trend is BEARISH, so protected_5m_point is a SWING HIGH
                 # CHOCH = break above swing high
-                if c5.close > protected_5m_point:
+                if close5 > protected_5m_point:
                     broken_level = protected_5m_point
                     choch_validated = True
                     poi_active = False
@@ -843,22 +906,22 @@ def market_structure_mapping(
                     temp_pullback_low = None
                     opp_pullback_count = 0   
 
-                elif c5.close > c5.open and swing_low_5m is None and not choch_validated:
+                elif close5 > open5 and swing_low_5m is None and not choch_validated:
                     # GREEN candle = pullback candle in bearish leg
                     if not in_pullback:
                         in_pullback = True
                         opp_pullback_count = 1
-                        temp_pullback_high = c5.high
-                        temp_pullback_low = c5.low
+                        temp_pullback_high = high5
+                        temp_pullback_low = low5
                     else:
                         opp_pullback_count += 1
-                        temp_pullback_high = max(temp_pullback_high, c5.high)
-                        temp_pullback_low = min(temp_pullback_low, c5.low)
+                        temp_pullback_high = max(temp_pullback_high, high5)
+                        temp_pullback_low = min(temp_pullback_low, low5)
 
                     print("5m opp pullback count (bullish leg) with time", opp_pullback_count, t5)
 
                 # ❌ INVALID pullback → bearish continuation before confirmation
-                elif in_pullback and c5.low < temp_pullback_low and opp_pullback_count < 2:
+                elif in_pullback and low5 < temp_pullback_low and opp_pullback_count < 2:
                     in_pullback = False
                     opp_pullback_count = 0
                     temp_pullback_high = None
@@ -886,7 +949,7 @@ def market_structure_mapping(
                 # ----------------------------------------------
                 # 4️⃣ BOS = break below calculated swing LOW
                 # ----------------------------------------------
-                if swing_low_5m is not None and c5.low <swing_low_5m:
+                if swing_low_5m is not None and low5 <swing_low_5m:
                     bos_time = t5
                     print("5m BOS time:", bos_time)
 
@@ -920,7 +983,7 @@ def market_structure_mapping(
             else:
                 # opp_trend is BULLISH, so protected_5m_point is a SWING LOW
                 # CHOCH = break below swing low
-                if c5.close < protected_5m_point:
+                if close5 < protected_5m_point:
                     broken_level = protected_5m_point
                     choch_validated = True
                     poi_active = False
@@ -947,22 +1010,22 @@ def market_structure_mapping(
                     temp_pullback_low = None
                     opp_pullback_count = 0
                                 
-                elif c5.close < c5.open and swing_high_5m is None and not choch_validated:
+                elif close5 < open5 and swing_high_5m is None and not choch_validated:
                     # RED candle = pullback candle in bullish leg
                     if not in_pullback:
                         in_pullback = True
                         opp_pullback_count = 1
-                        temp_pullback_high = c5.high
-                        temp_pullback_low = c5.low
+                        temp_pullback_high = high5
+                        temp_pullback_low = low5
                     else:
                         opp_pullback_count += 1
-                        temp_pullback_high = max(temp_pullback_high, c5.high)
-                        temp_pullback_low = min(temp_pullback_low, c5.low)
+                        temp_pullback_high = max(temp_pullback_high, high5)
+                        temp_pullback_low = min(temp_pullback_low, low5)
 
                     print("5m opp pullback count (bullish leg) with time", opp_pullback_count, t5)
 
                 # ❌ INVALID pullback → bullish continuation before confirmation
-                elif in_pullback and c5.high > temp_pullback_high and opp_pullback_count < 2:
+                elif in_pullback and high5 > temp_pullback_high and opp_pullback_count < 2:
                     in_pullback = False
                     opp_pullback_count = 0
                     temp_pullback_high = None
@@ -990,7 +1053,7 @@ def market_structure_mapping(
                 # ----------------------------------------------
                 # 4️⃣ BOS = break above calculated swing HIGH
                 # ----------------------------------------------
-                if swing_high_5m is not None and c5.high > swing_high_5m:
+                if swing_high_5m is not None and high5 > swing_high_5m:
                     bos_time = t5
                     print("5m BOS time:", bos_time)
 
@@ -1104,4 +1167,4 @@ def market_structure_mapping(
                 choch_validated = False
 
 
-    return
+    return None
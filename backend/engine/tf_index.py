@@ -0,0 +1,105 @@
+"""
+Precomputed 4H <-> 5M position maps for the structure mapper.
+
+Built once per run from the full 4H / 5M frames, so lookups inside the
+5M monitoring loop are array indexing (or a dict hit) instead of a
+`DatetimeIndex.get_indexer` binary search per call.
+
+All positions are into the frames the index was built from.
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+_NS_PER_MINUTE = 60_000_000_000
+
+
+def _to_minutes(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.values.astype("datetime64[m]").astype(np.int64)
+
+
+def ts_to_minutes(ts) -> int:
+    return pd.Timestamp(ts).value // _NS_PER_MINUTE
+
+
+class TimeframeIndex:
+    def __init__(self, df_4h: pd.DataFrame, df_5m: pd.DataFrame, bar_minutes_4h: int = 240):
+        self.t4 = _to_minutes(df_4h.index)
+        self.t5 = _to_minutes(df_5m.index)
+
+        # exact timestamp -> position
+        self.pos_4h: Dict[int, int] = {int(m): i for i, m in enumerate(self.t4)}
+        self.pos_5m: Dict[int, int] = {int(m): i for i, m in enumerate(self.t5)}
+
+        # 4H bar -> 5M positions
+        #   ffill_5m : last 5M bar at or before the 4H open (-1 if none)
+        #   bfill_5m : first 5M bar at or after the 4H open (len if none)
+        #   first_5m / last_5m : 5M bars inside the 4H bar
+        self.ffill_5m_of_4h = np.searchsorted(self.t5, self.t4, side="right") - 1
+        self.bfill_5m_of_4h = np.searchsorted(self.t5, self.t4, side="left")
+        self.first_5m_of_4h = self.bfill_5m_of_4h
+        self.last_5m_of_4h = np.searchsorted(self.t5, self.t4 + bar_minutes_4h, side="left") - 1
+
+        # 5M bar -> 4H bar containing it (ffill)
+        self.ffill_4h_of_5m = np.searchsorted(self.t4, self.t5, side="right") - 1
+
+    # --------------------------------------------------
+    # 5M LOOKUPS
+    # --------------------------------------------------
+    def loc_5m(self, ts) -> int:
+        return self.pos_5m[ts_to_minutes(ts)]
+
+    def ffill_5m(self, ts) -> int:
+        """
+        Position of the last 5M bar at or before `ts` (-1 if none),
+        i.e. get_indexer([ts], method="ffill").
+        """
+        m = ts_to_minutes(ts)
+        p = self.pos_5m.get(m)
+        if p is not None:
+            return p
+        p = self.pos_4h.get(m)
+        if p is not None:
+            return int(self.ffill_5m_of_4h[p])
+        return int(np.searchsorted(self.t5, m, side="right")) - 1
+
+    def bfill_5m(self, ts) -> int:
+        """
+        Position of the first 5M bar at or after `ts` (-1 if none),
+        i.e. get_indexer([ts], method="bfill").
+        """
+        m = ts_to_minutes(ts)
+        p = self.pos_5m.get(m)
+        if p is not None:
+            return p
+        p = self.pos_4h.get(m)
+        if p is not None:
+            p = int(self.bfill_5m_of_4h[p])
+        else:
+            p = int(np.searchsorted(self.t5, m, side="left"))
+        return p if p < len(self.t5) else -1
+
+    def after_5m(self, ts) -> int:
+        """
+        Position of the first 5M bar strictly after `ts` (len if none).
+        """
+        return self.ffill_5m(ts) + 1
+
+    # --------------------------------------------------
+    # 4H LOOKUPS
+    # --------------------------------------------------
+    def loc_4h(self, ts) -> int:
+        return self.pos_4h[ts_to_minutes(ts)]
+
+    def ffill_4h(self, ts) -> int:
+        """
+        Position of the 4H bar containing `ts` (-1 if before the first bar).
+        """
+        m = ts_to_minutes(ts)
+        p = self.pos_5m.get(m)
+        if p is not None:
+            return int(self.ffill_4h_of_5m[p])
+        return int(np.searchsorted(self.t4, m, side="right")) - 1
@@ -0,0 +1,118 @@
+"""
+Clock-aligned OHLC aggregation for the realtime path.
+
+A bar of `minutes` covers [start, start + minutes) with `start` a multiple
+of `minutes` from the epoch (so 4H bars start at 00:00, 04:00, ... and 1D
+bars at midnight, in the feed's clock). Bars are built incrementally, O(1)
+per input, from shorter closed bars: 1M rows, or e.g. 5M bars for 4H.
+
+A bar closes as soon as its last input arrives. When that input is
+missing (weekend, gap in the feed) it closes when the first input of a
+later bar arrives instead, and the gap never shifts the bars after it.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.engine.candle_store import Candle, datetime_to_minutes, minutes_to_datetime
+
+TIMEFRAME_MINUTES = {
+    "1m": 1,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440,
+}
+
+
+class BarAggregator:
+    """
+    Bars of `minutes` from closed inputs of `input_minutes`, in time order.
+    """
+
+    def __init__(self, minutes: int, input_minutes: int = 1):
+        if minutes % input_minutes:
+            raise ValueError(f"{minutes}m bars cannot be built from {input_minutes}m inputs")
+        self.minutes = minutes
+        self.input_minutes = input_minutes
+
+        # forming bar: start (epoch minutes), open, high, low, close
+        self._start: Optional[int] = None
+        self._open = self._high = self._low = self._close = 0.0
+
+    @property
+    def current(self) -> Optional[Candle]:
+        """
+        The bar still forming, None between bars.
+        """
+        if self._start is None:
+            return None
+        return self._bar()
+
+    def _bar(self) -> Candle:
+        return Candle(minutes_to_datetime(self._start), self._open, self._high, self._low, self._close)
+
+    def update(self, candle: Candle) -> Tuple[Candle, ...]:
+        """
+        `roll` + `add`: the bars `candle` closes, oldest first (usually none).
+        """
+        return self._update(candle, datetime_to_minutes(candle.time))
+
+    # m: the input's time in epoch minutes, computed once per input
+    def _roll(self, m: int) -> Optional[Candle]:
+        if self._start is None or m < self._start + self.minutes:
+            return None
+        bar = self._bar()
+        self._start = None
+        return bar
+
+    def _add(self, candle: Candle, m: int) -> Optional[Candle]:
+        _, o, h, l, c = candle
+
+        if self._start is None:
+            self._start = m - m % self.minutes
+            self._open, self._high, self._low = o, h, l
+        else:
+            if h > self._high:
+                self._high = h
+            if l < self._low:
+                self._low = l
+        self._close = c
+
+        if m + self.input_minutes < self._start + self.minutes:
+            return None
+        bar = self._bar()
+        self._start = None
+        return bar
+
+    def _update(self, candle: Candle, m: int) -> Tuple[Candle, ...]:
+        rolled = self._roll(m)
+        closed = self._add(candle, m)
+        if rolled is None:
+            return () if closed is None else (closed,)
+        return (rolled,) if closed is None else (rolled, closed)
+
+
+class MultiTimeframeAggregator:
+    """
+    Several timeframes from one stream of 1M candles.
+    """
+
+    def __init__(self, timeframes: Iterable[str]):
+        self.bars: Dict[str, BarAggregator] = {
+            tf: BarAggregator(TIMEFRAME_MINUTES[tf]) for tf in timeframes
+        }
+
+    def update(self, candle: Candle) -> List[Tuple[str, Candle]]:
+        """
+        (timeframe, bar) of every bar `candle` closes, in the order they
+        end; shorter timeframes first for bars ending together.
+        """
+        m = datetime_to_minutes(candle.time)
+        closed = [(tf, bar) for tf, agg in self.bars.items() for bar in agg._update(candle, m)]
+        if len(closed) > 1:
+            closed.sort(key=lambda x: (
+                datetime_to_minutes(x[1].time) + self.bars[x[0]].minutes,
+                self.bars[x[0]].minutes,
+            ))
+        return closed
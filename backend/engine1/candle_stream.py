@@ -1,12 +1,159 @@
-from dataclasses import dataclass
-from datetime import datetime
-
-@dataclass
-class Candle:
-    symbol: str
-    timeframe: str   # "1m"
-    time: datetime
-    open: float
-    high: float
-    low: float
-    close: float
+import asyncio
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from backend.engine.candle_store import Candle, load_or_convert, iter_candle_blocks
+
+
+# (time, open, high, low, close) of one closed 1M candle: a Candle or a plain tuple
+Row = Tuple[datetime, float, float, float, float]
+
+
+# ==================================================
+# RATE CONTROL
+# ==================================================
+class Pacer:
+    """
+    Holds a replay to `speed` x market time and/or `max_rate` candles per
+    second. Deadlines are absolute (from the first candle), so time spent
+    in the engine counts towards the wait and a slow engine just runs
+    without sleeping; sleeps shorter than `slack` are skipped.
+    """
+
+    def __init__(
+        self,
+        speed: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        slack: float = 0.002,
+    ):
+        self.speed = speed
+        self.max_rate = max_rate
+        self.slack = slack
+        self._wall0: Optional[float] = None
+        self._t0: Optional[datetime] = None
+        self._n = 0
+
+    def wait(self, t: datetime) -> None:
+        now = time.perf_counter()
+        if self._wall0 is None:
+            self._wall0 = now
+            self._t0 = t
+
+        due = self._wall0
+        if self.speed:
+            due += (t - self._t0).total_seconds() / self.speed
+        if self.max_rate:
+            due = max(due, self._wall0 + self._n / self.max_rate)
+        self._n += 1
+
+        ahead = due - now
+        if ahead > self.slack:
+            time.sleep(ahead)
+
+
+# ==================================================
+# SOURCES
+# ==================================================
+class CandleSource:
+    """
+    Closed 1M candles of one symbol, in time order. Iterating blocks until
+    the next candle is available and stops when the feed ends.
+    """
+
+    # True when the source cannot be sent to a scheduler worker process
+    in_process_only = False
+
+    def __iter__(self) -> Iterator[Row]:
+        raise NotImplementedError
+
+    def resume_after(self, t: datetime) -> "CandleSource":
+        """
+        This source without the candles at or before `t` (the last one a
+        restored engine has seen). Sources that can seek should override
+        this instead of reading and dropping the rows.
+        """
+        return _ResumedSource(self, t)
+
+
+class _ResumedSource(CandleSource):
+    def __init__(self, source: CandleSource, after: datetime):
+        self.source = source
+        self.after = after
+        self.in_process_only = source.in_process_only
+
+    def __iter__(self) -> Iterator[Row]:
+        for row in self.source:
+            if row[0] > self.after:
+                yield row
+
+
+class CsvReplaySource(CandleSource):
+    """
+    Replay of a HistData M1 CSV through the columnar store.
+
+    `speed` replays at that multiple of market time (60 = one market
+    minute per second), `max_rate` caps candles per second; with neither
+    set the replay runs as fast as the engine consumes it. `start` skips
+    the rows before it (e.g. the ones a warm-up already consumed).
+    """
+
+    def __init__(
+        self,
+        csv_path,
+        speed: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        start: Optional[datetime] = None,
+    ):
+        self.csv_path = Path(csv_path)
+        self.speed = speed
+        self.max_rate = max_rate
+        self.start = start
+
+    def __iter__(self) -> Iterator[Row]:
+        candles = load_or_convert(self.csv_path)
+        first = candles.index_of(self.start) if self.start is not None else 0
+
+        if not self.speed and not self.max_rate:
+            for block in iter_candle_blocks(candles, first):
+                yield from block
+            return
+
+        pacer = Pacer(self.speed, self.max_rate)
+        for block in iter_candle_blocks(candles, first):
+            for row in block:
+                pacer.wait(row[0])
+                yield row
+
+    def resume_after(self, t: datetime) -> "CsvReplaySource":
+        # rows fall on whole minutes: the first at or after t + 1m is the first after t
+        return CsvReplaySource(self.csv_path, self.speed, self.max_rate, t + timedelta(minutes=1))
+
+
+class AsyncQueueSource(CandleSource):
+    """
+    Live feed: an adapter running on `loop` awaits `put(row)` per closed
+    candle and `close()` at the end. The queue is bounded, so a lagging
+    engine makes `put` wait instead of buffering without limit.
+    """
+
+    in_process_only = True
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 1024):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def put(self, row: Row) -> None:
+        await self.queue.put(row)
+
+    async def close(self) -> None:
+        await self.queue.put(None)
+
+    def __iter__(self) -> Iterator[Row]:
+        # consumed from the engine thread, not from `loop`
+        while True:
+            row = asyncio.run_coroutine_threadsafe(self.queue.get(), self.loop).result()
+            if row is None:
+                return
+            yield row
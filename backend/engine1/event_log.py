@@ -0,0 +1,271 @@
+"""
+Append-only log of the events a `PairEngine` publishes.
+
+Each symbol has a directory of JSONL segments, one line per published
+event message, stamped with the 1M candle being processed when it was
+published (so a backtest sees an event exactly when the engine knew it):
+
+    <root>/<SYMBOL>/00000000.jsonl    {"t": "2022-01-25T08:04:00", "m": {...}}
+                   /00000001.jsonl    ...
+
+Lines are in time order. A segment is closed after `segment_events`
+lines; only a sparse (time, segment, offset) index is kept in memory, so
+range queries seek straight to the first segment / line they need and
+memory stays small however long the log grows. Lines are flushed before
+the message goes out to clients.
+"""
+import json
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+DEFAULT_EVENT_LOG_ROOT = Path(__file__).resolve().parents[2] / "data" / "events"
+
+SEGMENT_EVENTS = 10_000
+# one in-memory index entry per this many lines (and per segment start)
+INDEX_EVERY = 64
+
+
+class EventLog:
+    """
+    The event log of one symbol. The engine side `append`s; readers (e.g.
+    the server process) open the same directory and `refresh()` to pick up
+    what was appended since, then `query` time ranges.
+    """
+
+    def __init__(self, symbol: str, root: Optional[Path] = None, segment_events: int = SEGMENT_EVENTS):
+        root = Path(root) if root is not None else DEFAULT_EVENT_LOG_ROOT
+        self.symbol = symbol
+        self.path = root / symbol
+        self.segment_events = segment_events
+
+        self.last_time: Optional[datetime] = None
+        self._writer = None
+
+        self._index_t: List[datetime] = []
+        self._index_pos: List[Tuple[int, int]] = []   # (segment, byte offset)
+        # scan position: segment, byte offset, lines of that segment so far
+        self._segment = 0
+        self._offset = 0
+        self._lines = 0
+        # (segment, end offset, bytes) of the last line indexed
+        self._last: Optional[Tuple[int, int, bytes]] = None
+
+        self.refresh()
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.path / f"{segment:08d}.jsonl"
+
+    def __len__(self) -> int:
+        return self._segment * self.segment_events + self._lines
+
+    # ==================================================
+    # INDEX
+    # ==================================================
+    def refresh(self) -> None:
+        """
+        Index the lines appended since the last refresh (by any process).
+        A log cut back elsewhere (`truncate_from`) is indexed from scratch.
+        """
+        if self._stale():
+            self._reset()
+
+        while True:
+            path = self._segment_path(self._segment)
+            if not path.exists():
+                return
+
+            with open(path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break   # being written
+                    self._index_line(datetime.fromisoformat(json.loads(line)["t"]), line)
+
+            if self._lines < self.segment_events or not self._segment_path(self._segment + 1).exists():
+                return
+            self._segment += 1
+            self._offset = 0
+            self._lines = 0
+
+    def _stale(self) -> bool:
+        # lines indexed here that are no longer on disk: the last one was
+        # rewritten (cut back, then appended past it again), or the scan
+        # segment shrank below the scan offset / was unlinked
+        if self._last is not None:
+            segment, end, line = self._last
+            try:
+                with open(self._segment_path(segment), "rb") as f:
+                    f.seek(end - len(line))
+                    if f.read(len(line)) != line:
+                        return True
+            except FileNotFoundError:
+                return True
+
+        path = self._segment_path(self._segment)
+        try:
+            return path.stat().st_size < self._offset
+        except FileNotFoundError:
+            return self._segment > 0 or self._offset > 0
+
+    def _reset(self) -> None:
+        del self._index_t[:]
+        del self._index_pos[:]
+        self._segment = 0
+        self._offset = 0
+        self._lines = 0
+        self._last = None
+        self.last_time = None
+
+    def _index_line(self, t: datetime, line: bytes) -> None:
+        if self._lines % INDEX_EVERY == 0:
+            self._index_t.append(t)
+            self._index_pos.append((self._segment, self._offset))
+        self._offset += len(line)
+        self._lines += 1
+        self._last = (self._segment, self._offset, line)
+        self.last_time = t
+
+    # ==================================================
+    # WRITE
+    # ==================================================
+    def append(self, t: datetime, message: dict) -> None:
+        if self.last_time is not None and t < self.last_time:
+            raise ValueError(f"{self.symbol} event at {t} is older than the log ({self.last_time})")
+
+        if self._lines >= self.segment_events:
+            self._close_writer()
+            self._segment += 1
+            self._offset = 0
+            self._lines = 0
+
+        if self._writer is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._writer = open(self._segment_path(self._segment), "ab")
+
+        line = (json.dumps({"t": t.isoformat(), "m": message}) + "\n").encode()
+        self._writer.write(line)
+        self._writer.flush()
+        self._index_line(t, line)
+
+    def truncate_from(self, t: datetime) -> None:
+        """
+        Drop every line at or after `t`, e.g. the ones a restarted engine
+        is about to publish again.
+        """
+        if self.last_time is None or self.last_time < t:
+            return
+        self._close_writer()
+
+        # first line at or after t is at or after this index entry
+        k = max(bisect_right(self._index_t, t) - 1, 0)
+        while k > 0 and self._index_t[k] >= t:
+            k -= 1
+        segment, offset = self._index_pos[k]
+
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if datetime.fromisoformat(json.loads(line)["t"]) >= t:
+                    break
+                offset += len(line)
+
+        with open(self._segment_path(segment), "r+b") as f:
+            f.truncate(offset)
+        later = segment + 1
+        while self._segment_path(later).exists():
+            self._segment_path(later).unlink()
+            later += 1
+
+        # re-index from the start of the cut segment
+        k = bisect_right(self._index_pos, (segment, -1))
+        del self._index_t[k:]
+        del self._index_pos[k:]
+        self._segment = segment
+        self._offset = 0
+        self._lines = 0
+        self._last = None
+        self.last_time = self._index_t[-1] if self._index_t else None
+        self.refresh()
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> None:
+        self._close_writer()
+
+    # ==================================================
+    # READ
+    # ==================================================
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[Tuple[datetime, dict]]:
+        """
+        (time, message) of the indexed lines with start <= time <= end, in
+        order. Call `refresh()` first to see lines appended elsewhere; a log
+        truncated elsewhere is refreshed here.
+        """
+        if self._stale():
+            self.refresh()
+        if not self._index_t:
+            return
+
+        k = 0
+        if start is not None:
+            k = max(bisect_right(self._index_t, start) - 1, 0)
+            # equal times may continue from the entry before
+            while k > 0 and self._index_t[k] >= start:
+                k -= 1
+        segment, offset = self._index_pos[k]
+        last_segment, last_offset = self._segment, self._offset
+
+        while segment <= last_segment:
+            try:
+                f = open(self._segment_path(segment), "rb")
+            except FileNotFoundError:
+                return   # truncated elsewhere since the check above
+            with f:
+                f.seek(offset)
+                for line in f:
+                    if segment == last_segment and offset >= last_offset:
+                        return
+                    offset += len(line)
+
+                    entry = json.loads(line)
+                    t = datetime.fromisoformat(entry["t"])
+                    if start is not None and t < start:
+                        continue
+                    if end is not None and t > end:
+                        return
+                    yield t, entry["m"]
+            segment += 1
+            offset = 0
+
+
+class LoggedPublish:
+    """
+    `publish` that appends every "event" message to `log` before passing
+    it on, stamped with the candle set by `at(t)`. The first `at` drops
+    whatever the log holds from that candle on (a previous run's output
+    for candles about to be replayed).
+    """
+
+    def __init__(self, publish, log: EventLog):
+        self.publish = publish
+        self.log = log
+        self.time: Optional[datetime] = None
+
+    def at(self, t: datetime) -> None:
+        if self.time is None:
+            self.log.truncate_from(t)
+        self.time = t
+
+    def __call__(self, channel: str, message: dict) -> None:
+        if channel == "event" and self.time is not None:
+            self.log.append(self.time, message)
+        self.publish(channel, message)
@@ -0,0 +1,74 @@
+"""
+Live updates of the bars still forming, for charts.
+
+After each 1M candle, `LiveBars` reports every timeframe's forming bar,
+at most once per `interval` seconds (wall clock), as a "candle_update"
+message on the "candle" channel. The first update of a bar carries all
+of open / high / low / close; later ones only the fields that changed
+since the last update sent. A bar with nothing new sends nothing. The
+closed bar still goes out as a full "candle" message, which supersedes
+its updates.
+
+    {"type": "candle_update", "symbol": "EURUSD", "tf": "4h",
+     "timestamp": 1643083200000, "close": 1.13012}
+"""
+import time
+from typing import Dict, List, Optional
+
+from backend.engine.candle_store import Candle
+from .aggregator import MultiTimeframeAggregator
+from .pair_engine import candle_message
+
+CANDLE_UPDATE = "candle_update"
+
+# fields an update may carry; open never changes once a bar has started
+DELTA_FIELDS = ("high", "low", "close")
+
+
+def update_message(symbol: str, tf: str, bar: Candle, last: Optional[Candle]) -> Optional[dict]:
+    """
+    The update taking a client from `last` (the previous update sent for
+    this timeframe) to `bar`; None when nothing changed.
+    """
+    message = candle_message(symbol, tf, bar)
+    message["type"] = CANDLE_UPDATE
+    if last is None or last.time != bar.time:
+        return message
+
+    delta = {
+        "type": CANDLE_UPDATE,
+        "symbol": symbol,
+        "tf": tf,
+        "timestamp": message["timestamp"],
+    }
+    for name in DELTA_FIELDS:
+        if getattr(bar, name) != getattr(last, name):
+            delta[name] = message[name]
+    return delta if len(delta) > 4 else None
+
+
+class LiveBars:
+    def __init__(self, interval: float):
+        self.interval = interval
+        # timeframe → forming bar as last sent
+        self._sent: Dict[str, Candle] = {}
+        self._due = 0.0
+
+    def updates(self, symbol: str, bars: MultiTimeframeAggregator) -> List[dict]:
+        now = time.monotonic()
+        if now < self._due:
+            return []
+        self._due = now + self.interval
+
+        messages = []
+        for tf, agg in bars.bars.items():
+            bar = agg.current
+            if bar is None:
+                continue
+
+            message = update_message(symbol, tf, bar, self._sent.get(tf))
+            if message is None:
+                continue
+            self._sent[tf] = bar
+            messages.append(message)
+        return messages
@@ -0,0 +1,1401 @@
+"""
+Realtime engine for one symbol.
+
+`PairEngine` owns the 1M → 5M → 4H aggregation buffers and the current
+leg's POI detector, and drives the symbol's `PairState` from closed 1M
+candles. Outbound candles / events go through the `publish(channel,
+message)` callback ("candle" or "event"), so the same engine runs in the
+server thread or in a scheduler worker process.
+"""
+from typing import Callable, Optional, Sequence
+
+import pandas as pd
+
+from backend.engine.candle_store import Candle
+from backend.engine.poi_detection import StreamingPOIDetector
+from .aggregator import MultiTimeframeAggregator
+from .state import PairState
+
+
+Publish = Callable[[str, dict], None]
+
+ENGINE_TIMEFRAMES = ("5m", "4h")
+
+
+def candle_message(symbol: str, tf: str, candle: Candle) -> dict:
+    # payload of the "candle" channel
+    return {
+        "type": "candle",
+        "symbol": symbol,
+        "tf": tf,
+        "timestamp": int(candle.time.timestamp() * 1000),
+        "open": candle.open,
+        "high": candle.high,
+        "low": candle.low,
+        "close": candle.close,
+    }
+
+
+def reset_on_4h_structure(state):
+    # -----------------------------
+    # POI state
+    # -----------------------------
+    state.mapped_pois = []
+    state.active_poi = None
+    state.poi_tapped = False
+    state.poi_tapped_level = None
+    state.poi_tapped_time = None
+
+    # -----------------------------
+    # 5M structure state
+    # -----------------------------
+    state.trend_5m = None
+
+    state.swing_high_5m = None
+    state.swing_high_5m_time = None
+    state.swing_low_5m = None
+    state.swing_low_5m_time = None
+
+    state.candidate_high_5m = None
+    state.candidate_low_5m = None
+    state.pullback_count_5m = 0
+    state.choch_5m_this_candle = False
+
+    state.buffer_5m_sh.clear()
+    state.buffer_5m_sl.clear()
+
+    # -----------------------------
+    # 5M protected point
+    # -----------------------------
+    state.protected_5m_point = None
+    state.protected_5m_time = None
+
+    # -----------------------------
+    # Clear 4H → 5M mapping buffers
+    # -----------------------------
+    state.active_pois = []
+
+    state.trade = None
+    state.trade_planned = False
+    state.entry_filled = False
+
+
+# ==================================================
+# PAIR ENGINE
+# ==================================================
+class PairEngine:
+    def __init__(self, state: PairState, publish: Publish, chart_timeframes: Sequence[str] = ()):
+        self.state = state
+        self.publish = publish
+
+        # 1M → 5M / 4H bars (plus any chart-only timeframes, published as they close)
+        self.bars = MultiTimeframeAggregator(ENGINE_TIMEFRAMES + tuple(chart_timeframes))
+
+        # Buffers (the fixed-size ones live on the state)
+        self.buffer_5m_poi = state.buffer_5m_poi    # only for POI mapping (cleared after poi mapping)
+        self.leg_buffer_4h = state.buffer_4h        # Holds 4H candles from BOS → pullback
+        self.candle_5m: Optional[Candle] = None  # last completed 5M candle
+
+        # POIs of the current leg, updated as each 4H candle closes
+        self.poi_stream = StreamingPOIDetector(state.trend_4h)
+
+        # live updates of the forming bars (`LiveBars`); set by the scheduler
+        self.live = None
+
+    @property
+    def symbol(self) -> str:
+        return self.state.symbol
+
+    def on_candle_1m(self, t, o, h, l, c) -> None:
+        """
+        Feed one closed 1M candle (time, open, high, low, close).
+        """
+        state = self.state
+        try:
+            if t.minute % 5 == 1:
+                print(f"📥 Received 1M Candle @ {t}")
+
+            closed = self.bars.update(Candle(t, o, h, l, c))
+            if not closed:
+                self._step_5m(self.candle_5m)
+                return
+
+            # 5M step of the last 5M candle, run once the 4H candle it
+            # closes (if any) is done
+            pending_5m = None
+            for tf, candle in closed:
+                # ---------------- 5M CANDLE ----------------
+                if tf == "5m":
+                    if pending_5m is not None:
+                        self._step_5m(pending_5m)
+                    candle_5m = candle
+                    self.candle_5m = candle_5m
+                    print(f"--- 5M GATE CHECK @ {candle_5m.time} | PB: {state.pullback_confirmed} | H4_EV: {state.h4_structure_event}")
+                    self.publish("candle", candle_message(self.symbol, "5m", candle_5m))
+                    self.buffer_5m_poi.append(candle_5m)
+                    pending_5m = candle_5m
+
+                # ---------------- 4H CANDLE ----------------
+                elif tf == "4h":
+                    self.publish("candle", candle_message(self.symbol, "4h", candle))
+                    if not self._close_4h(candle):
+                        pending_5m = None
+
+                else:
+                    self.publish("candle", candle_message(self.symbol, tf, candle))
+
+            if pending_5m is not None:
+                self._step_5m(pending_5m)
+        except ValueError:
+            return
+        finally:
+            if self.live is not None:
+                for message in self.live.updates(self.symbol, self.bars):
+                    self.publish("candle", message)
+
+    def _close_4h(self, candle_4h: Candle) -> bool:
+        """
+        4H structure / pullback / POI step for a just-closed 4H candle.
+        False when the candle is pre-BOS history and nothing else should run.
+        """
+        state = self.state
+
+        # --------------------------------------------------
+        # IGNORE HISTORICAL (PRE-BOS)
+        # --------------------------------------------------
+        if candle_4h.time <= state.bos_time_4h:
+            return False
+
+        self.leg_buffer_4h.append(candle_4h)
+        self.poi_stream.update(candle_4h)
+        # -----------------------------
+        # 3A. Update Pullback State
+        # ----------------------------- 
+
+        if state.trend_4h == "BULLISH":
+            if state.candidate_high is None or candle_4h.high > state.candidate_high:
+                state.candidate_high = candle_4h.high
+                state.bearish_count = 0
+
+            if candle_4h.close < candle_4h.open and candle_4h.high < state.candidate_high:
+                state.bearish_count += 1
+
+            if state.swing_low and state.candidate_high:
+                depth_ratio = (state.candidate_high - min(candle_4h.low, candle_4h.close)) / max(state.candidate_high - state.swing_low, 1e-9)
+                if state.bearish_count >= state.min_pullback_candles or depth_ratio >= state.pullback_pct:
+                    state.pullback_confirmed = True
+                    state.pullback_time = candle_4h.time
+                    print(f"🌊 4H PULLBACK CONFIRMED (BULLISH) @ {state.pullback_time} | Depth: {depth_ratio:.2f}")
+                    state.h4_structure_event=None
+                    state.swing_high = state.candidate_high
+
+                    if state.pullback_confirmed and state.pullback_time and state.swing_high:
+                        event_payload = {
+                            "symbol": self.symbol,
+                            "timeframe": "4h",
+                            "events": [
+                                {
+                                    "id": f"4H_PB_{state.pullback_time.strftime('%Y%m%d_%H%M')}",
+                                    "type": "PULLBACK_CONFIRMED",
+                                    "broken_level": state.swing_high,
+                                    "time": state.pullback_time.isoformat()
+                                }
+                            ]
+                        }
+
+                        # Debug print
+                        print(f"📡 Sending 4H Pullback Event: {event_payload}")
+
+                        self.publish("event", event_payload)
+
+                    state.candidate_high = None
+                    state.bearish_count = 0
+
+                    #POIs of the leg so far (kept up to date per 4H candle)
+                    state.active_pois = self.poi_stream.pois()
+                    print(f"🔍 DETECTED {len(state.active_pois)} POIs in swing leg")
+                    # Deduplicate POIs
+                    seen = set()
+                    unique_pois = []
+                    for poi in state.active_pois:
+                        key = (poi["time"], poi.get("price_low"), poi.get("price_high"), poi["type"])
+                        if key not in seen:
+                            seen.add(key)
+                            unique_pois.append(poi)
+
+                    # 📡 Broadcast POIs
+                    if unique_pois:
+                        liq_events = []
+                        ob_events = []
+                        for p in unique_pois:
+                            if p.get('time') is None or not hasattr(p['time'], 'strftime'):
+                                continue
+                            ts_str = p['time'].strftime('%Y%m%d_%H%M')
+                            iso_time = p['time'].isoformat()
+                            if p['type'] == 'LIQ':
+                                liq_events.append({
+                                    "id": f"4H_POI_LIQ_{ts_str}",
+                                    "type": "POI-LIQ",
+                                    "price": p['price_low'] if p['price_low'] is not None else p['price_high'],
+                                    "time": iso_time
+                                })
+                            elif p['type'] == 'OB':
+                                ob_events.append({
+                                    "id": f"4H_POI_OB_{ts_str}",
+                                    "type": "POI-OB",
+                                    "time_start": iso_time,
+                                    "time_end": (p['time'] + pd.Timedelta(hours=4)).isoformat(),
+                                    "low": p['price_low'],
+                                    "high": p['price_high']
+                                })
+
+                        if liq_events:
+                            payload = {"symbol": self.symbol, "timeframe": "4H", "events": liq_events}
+                            print(f"📡 Sending 4H LIQ POIs: {len(liq_events)} events")
+                            self.publish("event", payload)
+
+                        if ob_events:
+                            payload = {"symbol": self.symbol, "timeframe": "4h", "events": ob_events}
+                            print(f"📡 Sending 4H OB POIs: {len(ob_events)} events")
+                            self.publish("event", payload)
+
+                    mapped_pois = []
+
+                    # Map POIs to 5M candles in self.leg_buffer_4h
+                    for poi in unique_pois:
+                        nearest_candle = self.buffer_5m_poi.last_at_or_before(poi["time"])
+                        if nearest_candle is None:
+                            if not self.buffer_5m_poi:
+                                print("⚠️ Warning: self.buffer_5m_poi is empty! Skipping POI mapping.")
+                                continue
+                            nearest_candle = self.buffer_5m_poi[0]
+
+                        start_time = nearest_candle.time
+                        end_time = start_time + pd.Timedelta(hours=4)
+                        if end_time > self.buffer_5m_poi[-1].time:
+                            end_time = self.buffer_5m_poi[-1].time
+
+                        mapped = {
+                            "type": poi["type"],
+                            "trend": poi["trend"],
+                            "start_time": start_time,
+                            "end_time": end_time,
+                            "leg_start_5m": self.leg_buffer_4h[0].time,
+                            "leg_end_5m": self.leg_buffer_4h[-1].time
+                        }
+
+                        if poi["type"] == "OB":
+                            mapped.update({
+                                "price_low": poi["price_low"],
+                                "price_high": poi["price_high"],
+                            })
+                        elif poi["type"] == "LIQ":
+                            mapped.update({
+                                "price": poi["price_low"] if poi["price_low"] is not None else poi["price_high"]
+                            })
+
+                        mapped_pois.append(mapped)
+
+                    state.mapped_pois = mapped_pois
+                    self.buffer_5m_poi.clear()
+
+            if state.pullback_confirmed:
+                if state.swing_low and candle_4h.close < state.swing_low:
+                    print(f"🟥 BEARISH CHOCH @ {candle_4h.time} in BULLISH trend")
+                    state.bos_time_4h = candle_4h.time
+                    state.choch_level_4h = candle_4h.close
+                    state.h4_structure_event = "CHOCH"
+                    reset_on_4h_structure(state)
+                    state.swing_high = self.leg_buffer_4h.max_high()
+                    state.candidate_high = None
+                    state.swing_low = None
+                    state.candidate_low = candle_4h.low
+                    state.trend_4h = "BEARISH"
+                    state.pullback_confirmed = False
+                    state.pullback_time = None
+                    state.bullish_count = 0
+                    state.bearish_count = 0
+
+                    # 📡 Broadcast CHOCH
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "4h",
+                        "events": [
+                            {
+                                "id": f"4H_CHOCH_{candle_4h.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "CHOCH",
+                                "broken_level": state.choch_level_4h,
+                                "time": candle_4h.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 4H CHOCH Event: {event_payload}")
+                    self.publish("event", event_payload)
+
+                    self.leg_buffer_4h.clear()
+                    self.poi_stream.reset(state.trend_4h)
+
+            if state.pullback_confirmed:
+                if state.trend_4h == "BULLISH" and state.swing_high is not None and candle_4h.close > state.swing_high:
+                    print(f"🟦 BOS WITHOUT POI @ {candle_4h.time} in 4H")
+                    state.bos_level_4h = candle_4h.close
+                    state.bos_time_4h= candle_4h.time
+                    state.h4_structure_event="BOS"
+                    reset_on_4h_structure(state)                
+                    # 🔹 Calculate new swing LOW from old leg
+                    if self.leg_buffer_4h:
+                        state.swing_low= self.leg_buffer_4h.min_low()
+                    state.pullback_confirmed = False
+                    state.pullback_time = None
+                    state.bullish_count = 0
+                    state.bearish_count = 0
+
+                    # 📡 Broadcast BOS
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "4h",
+                        "events": [
+                            {
+                                "id": f"4H_BOS_{candle_4h.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "BOS",
+                                "broken_level": state.bos_level_4h,
+                                "time": candle_4h.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 4H BOS Event: {event_payload}")
+                    self.publish("event", event_payload)
+
+                    self.leg_buffer_4h.clear()
+                    self.poi_stream.reset(state.trend_4h)
+
+        elif state.trend_4h == "BEARISH":
+            if state.candidate_low is None or candle_4h.low < state.candidate_low:
+                state.candidate_low = candle_4h.low
+                state.bullish_count = 0
+
+            if candle_4h.close > candle_4h.open and candle_4h.low > state.candidate_low:
+                state.bullish_count += 1
+
+            if state.swing_high and state.candidate_low:
+                depth_ratio = (candle_4h.high - state.candidate_low) / max(state.swing_high - state.candidate_low, 1e-9)
+                if state.bullish_count >= state.min_pullback_candles or depth_ratio >= state.pullback_pct:
+                    state.pullback_confirmed = True
+                    state.pullback_time = candle_4h.time
+                    print(f"🌊 4H PULLBACK CONFIRMED (BEARISH) @ {state.pullback_time} | Depth: {depth_ratio:.2f}")
+                    state.h4_structure_event=None
+                    state.swing_low = state.candidate_low
+                    state.bullish_count = 0
+
+                    if state.pullback_confirmed and state.pullback_time and state.swing_low:
+                        event_payload = {
+                            "symbol": self.symbol,
+                            "timeframe": "4h",
+                            "events": [
+                                {
+                                    "id": f"4H_PB_{state.pullback_time.strftime('%Y%m%d_%H%M')}",
+                                    "type": "PULLBACK_CONFIRMED",
+                                    "broken_level": state.swing_low,
+                                    "time": state.pullback_time.isoformat()
+                                }
+                            ]
+                        }
+
+                        # Debug print
+                        print(f"📡 Sending 4H Pullback Event: {event_payload}")
+
+                        self.publish("event", event_payload)
+
+                    state.active_pois = self.poi_stream.pois()
+                    print(f"🔍 DETECTED {len(state.active_pois)} POIs in swing leg")
+
+                    # Deduplicate POIs
+                    seen = set()
+                    unique_pois = []
+                    for poi in state.active_pois:
+                        key = (poi["time"], poi.get("price_low"), poi.get("price_high"), poi["type"])
+                        if key not in seen:
+                            seen.add(key)
+                            unique_pois.append(poi)
+
+                    # 📡 Broadcast POIs
+                    if unique_pois:
+                        liq_events = []
+                        ob_events = []
+                        for p in unique_pois:
+                            if p.get('time') is None or not hasattr(p['time'], 'strftime'):
+                                continue
+                            ts_str = p['time'].strftime('%Y%m%d_%H%M')
+                            iso_time = p['time'].isoformat()
+                            if p['type'] == 'LIQ':
+                                liq_events.append({
+                                    "id": f"4H_POI_LIQ_{ts_str}",
+                                    "type": "POI-LIQ",
+                                    "price": p['price_low'] if p['price_low'] is not None else p['price_high'],
+                                    "time": iso_time
+                                })
+                            elif p['type'] == 'OB':
+                                ob_events.append({
+                                    "id": f"4H_POI_OB_{ts_str}",
+                                    "type": "POI-OB",
+                                    "time_start": iso_time,
+                                    "time_end": (p['time'] + pd.Timedelta(hours=4)).isoformat(),
+                                    "low": p['price_low'],
+                                    "high": p['price_high']
+                                })
+
+                        if liq_events:
+                            payload = {"symbol": self.symbol, "timeframe": "4H", "events": liq_events}
+                            print(f"📡 Sending 4H LIQ POIs: {len(liq_events)} events")
+                            self.publish("event", payload)
+
+                        if ob_events:
+                            payload = {"symbol": self.symbol, "timeframe": "4h", "events": ob_events}
+                            print(f"📡 Sending 4H OB POIs: {len(ob_events)} events")
+                            self.publish("event", payload)
+
+                    mapped_pois = []
+
+                    for poi in unique_pois:
+                        nearest_candle = self.buffer_5m_poi.last_at_or_before(poi["time"])
+                        if nearest_candle is None:
+                            if not self.buffer_5m_poi:
+                                print("⚠️ Warning: self.buffer_5m_poi is empty! Skipping POI mapping.")
+                                continue
+                            nearest_candle = self.buffer_5m_poi[0]
+
+                        start_time = nearest_candle.time
+                        end_time = start_time + pd.Timedelta(hours=4)
+                        if end_time > self.buffer_5m_poi[-1].time:
+                            end_time = self.buffer_5m_poi[-1].time
+
+                        mapped = {
+                            "type": poi["type"],
+                            "trend": poi["trend"],
+                            "start_time": start_time,
+                            "end_time": end_time,
+                            "leg_start_5m": self.leg_buffer_4h[0].time,
+                            "leg_end_5m": self.leg_buffer_4h[-1].time,
+                        }
+
+                        if poi["type"] == "OB":
+                            mapped.update({
+                                "price_low": poi["price_low"],
+                                "price_high": poi["price_high"],
+                            })
+                        elif poi["type"] == "LIQ":
+                            mapped.update({
+                                "price": poi["price_low"] if poi["price_low"] is not None else poi["price_high"]
+                            })
+
+                        mapped_pois.append(mapped)
+
+                    state.mapped_pois = mapped_pois
+                    self.buffer_5m_poi.clear()
+
+            if state.pullback_confirmed:
+                if state.swing_high and candle_4h.close > state.swing_high:
+                    print(f"🟩 BULLISH CHOCH @ {candle_4h.time} in BEARISH trend")
+                    state.bos_time_4h = candle_4h.time
+                    state.choch_level_4h = candle_4h.close
+                    state.h4_structure_event="CHOCH"
+                    reset_on_4h_structure(state)
+                    state.swing_low = self.leg_buffer_4h.min_low()
+                    state.candidate_high = candle_4h.high
+                    state.trend_4h = "BULLISH"
+                    state.pullback_confirmed = False
+                    state.pullback_time = None
+                    state.bullish_count = 0
+                    state.bearish_count = 0
+
+                    # 📡 Broadcast CHOCH
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "4h",
+                        "events": [
+                            {
+                                "id": f"4H_CHOCH_{candle_4h.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "CHOCH",
+                                "broken_level": state.choch_level_4h,
+                                "time": candle_4h.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 4H CHOCH Event: {event_payload}")
+                    self.publish("event", event_payload)
+
+                    self.leg_buffer_4h.clear()
+                    self.poi_stream.reset(state.trend_4h)
+
+            if state.pullback_confirmed:
+                if state.trend_4h == "BEARISH" and state.swing_low is not None and candle_4h.close < state.swing_low:
+                    print(f"🟦 BOS WITHOUT POI @ {candle_4h.time} in 4H")
+                    state.bos_level_4h = candle_4h.close
+                    state.bos_time_4h = candle_4h.time
+                    state.h4_structure_event="BOS"
+                    reset_on_4h_structure(state)
+                    # 🔹 New swing HIGH from previous leg
+                    if self.leg_buffer_4h:
+                        state.swing_high = self.leg_buffer_4h.max_high()
+                    state.pullback_confirmed = False
+                    state.pullback_time = None
+                    state.bullish_count = 0
+                    state.bearish_count = 0
+
+                    # 📡 Broadcast BOS
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "4h",
+                        "events": [
+                            {
+                                "id": f"4H_BOS_{candle_4h.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "BOS",
+                                "broken_level": state.bos_level_4h,
+                                "time": candle_4h.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 4H BOS Event: {event_payload}")
+                    self.publish("event", event_payload)
+
+                    self.leg_buffer_4h.clear()
+                    self.poi_stream.reset(state.trend_4h)
+
+        return True
+
+    def _step_5m(self, candle_5m: Candle) -> None:
+        """
+        5M structure / POI tap / trade step, run on every 1M candle with the
+        last closed 5M candle.
+        """
+        state = self.state
+
+        # --------------------------------------------------
+        # 5M GATING LOGIC
+        # --------------------------------------------------
+
+        # ❌ Gate 1: Ignore all 5M candles until 4H pullback is confirmed
+        if not state.pullback_confirmed:
+            return
+
+        print(f"🕯️ Processing 5M Candle @ {candle_5m.time} | Trend 4H: {state.trend_4h}")
+        bull_candle_5m = candle_5m.close > candle_5m.open
+        bear_candle_5m = candle_5m.close < candle_5m.open
+        if state.trend_4h == "BULLISH":
+            state.trend_5m = "BEARISH"
+
+            if state.candidate_low_5m is None:
+                state.candidate_low_5m = candle_5m.low
+                state.pullback_count_5m = 0
+                if state.swing_high_5m is None:
+                    state.swing_high_5m = candle_5m.high
+                    state.swing_high_5m_time = candle_5m.time
+                return
+
+            if bull_candle_5m and (state.pullback_count_5m == 0 or state.pullback_count_5m == 1):
+                state.pullback_count_5m += 1
+
+            if candle_5m.low < state.candidate_low_5m:
+                state.candidate_low_5m = candle_5m.low
+
+            retrace = (candle_5m.high - state.candidate_low_5m) / max(state.swing_high_5m - state.candidate_low_5m, 1e-9)
+            valid_pullback_5m = state.pullback_count_5m >= 2 or retrace >= 0.99
+            print(f"   5M Pullback Check: Count={state.pullback_count_5m}, Retrace={retrace:.2f}, Valid={valid_pullback_5m}")
+
+            if valid_pullback_5m:
+                state.buffer_5m_sh.append(candle_5m)    
+                #BOS 5m                        
+                if candle_5m.low < state.candidate_low_5m:
+                    swing_candle = state.buffer_5m_sh.highest()
+
+                    state.swing_high_5m = swing_candle.high
+                    state.swing_high_5m_time = swing_candle.time 
+                    state.protected_5m_point = state.swing_high_5m
+                    state.protected_5m_time  = state.swing_high_5m_time  
+
+                    state.candidate_low_5m = candle_5m.low
+                    state.pullback_count_5m=0
+                    state.buffer_5m_sh.clear()
+
+                    # 📡 Broadcast 5M BOS
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_BOS_{candle_5m.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "BOS",
+                                "direction": "BEARISH",
+                                "broken_level": candle_5m.low,
+                                "time": candle_5m.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 5M BOS (BEARISH): {event_payload}")
+                    self.publish("event", event_payload)
+                #CHOCH 5m
+                if candle_5m.high > state.swing_high_5m:
+                    state.trend_5m = "BULLISH"
+                    state.swing_low_5m = state.candidate_low_5m
+                    state.pullback_count_5m=0
+                    state.candidate_high_5m= candle_5m.high
+                    state.choch_5m_this_candle = True
+                    print(f"🚀 5M BULLISH CHOCH @ {candle_5m.time} | Broken High: {state.swing_high_5m}")
+                    state.buffer_5m_sh.clear()
+
+                    # 📡 Broadcast 5M CHOCH
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_CHOCH_{candle_5m.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "CHOCH",
+                                "broken_level": state.swing_high_5m,
+                                "time": candle_5m.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 5M CHOCH (BULLISH): {event_payload}")
+                    self.publish("event", event_payload)
+                # --------------------------------------------------
+                # 5M POI TAP CHECK (Realtime)
+                # --------------------------------------------------
+                if state.mapped_pois and not state.poi_tapped and state.active_poi is None:
+                    for poi in state.mapped_pois:
+                        if poi.get("state") == "INVALIDATED":
+                            continue
+                        poi_type = poi["type"]
+                        poi_trend = poi["trend"]
+
+                        if poi_trend == "BULLISH":
+                            if poi_type == "OB":
+                                # OB overlap
+                                if candle_5m.low <= poi["price_high"] and candle_5m.high >= poi["price_low"]:
+                                    state.poi_tapped = True
+                                    state.active_poi=poi
+                                    print(f"🎯 POI TAPPED (OB) @ {candle_5m.time} | Level: {poi['price_low']}-{poi['price_high']}")
+                                    state.poi_tapped_level=candle_5m.low
+                                    state.poi_tapped_time=candle_5m.time
+
+                                    break
+                            elif poi_type == "LIQ":
+                                # LIQ sweep
+                                if candle_5m.low <= poi["price"]:
+                                    state.poi_tapped = True
+                                    state.active_poi=poi
+                                    print(f"🎯 POI TAPPED (LIQ) @ {candle_5m.time} | Level: {poi['price']}")
+                                    state.poi_tapped_level=candle_5m.low
+                                    state.poi_tapped_time=candle_5m.time
+
+                                    break
+                # POST POI TAP                
+                if state.poi_tapped:
+
+                    # --------------------------------------------------
+                    #  POI INVALIDATION (Realtime)
+                    # --------------------------------------------------
+                    poi_invalidated = False
+
+                    active_poi = state.active_poi
+
+                    # ⛔ Do NOT invalidate on tap candle
+                    if candle_5m.time > state.poi_tapped_time and state.active_poi:
+
+                        active_poi = state.active_poi
+                        invalidation_level = None
+
+                        # Find next POI (order-aware) if it exists
+                        next_poi = None
+                        for poi in state.mapped_pois:
+                            if poi is active_poi:
+                                continue
+                            if poi.get("state") != "INVALIDATED":
+                                next_poi = poi
+                                break  # first non-invalidated POI after current active POI
+
+                        p0_type = active_poi["type"]
+                        trend = state.trend_4h
+
+                        # =========================
+                        # BULLISH TREND
+                        # =========================
+                        if trend == "BULLISH":
+
+                            if next_poi:
+                                p1_type = next_poi["type"]
+
+                                if p0_type == "OB" and p1_type == "OB":
+                                    invalidation_level = (active_poi["price_high"] + next_poi["price_high"]) / 2
+
+                                elif p0_type == "OB" and p1_type == "LIQ":
+                                    invalidation_level = (active_poi["price_high"] + next_poi["price"]) / 2
+
+                                elif p0_type == "LIQ" and p1_type == "LIQ":
+                                    invalidation_level = (active_poi["price"] + next_poi["price"]) / 2
+
+                            else:
+                                # No next POI → fallback to 4H swing low
+                                if p0_type == "OB":
+                                    invalidation_level = (active_poi["price_high"] + state.swing_low) / 2
+                                else:
+                                    invalidation_level = (active_poi["price"] + state.swing_low) / 2
+
+                            if invalidation_level is not None and candle_5m.low < invalidation_level:
+                                poi_invalidated = True
+                                state.active_poi["state"] = "INVALIDATED"
+
+                    # --------------------------------------------------
+                    # 🔥 APPLY INVALIDATION
+                    # --------------------------------------------------
+                    if poi_invalidated:
+                        print(f"❌ POI INVALIDATED @ {candle_5m.time}")
+
+                        state.active_poi["state"] = "INVALIDATED"
+
+                        state.active_poi = None
+                        state.poi_tapped = False
+                        state.poi_tapped_level = None
+                        state.poi_tapped_time = None
+
+                        state.protected_5m_point = None
+                        state.protected_5m_time = None
+
+                        return
+
+
+                    # --------------------------------------------------
+                    # TRADE SETUP (CHOCH + POI)
+                    # --------------------------------------------------
+                    if (
+                        state.choch_5m_this_candle
+                        and state.active_poi is not None
+                        and not poi_invalidated
+                        and not state.trade_planned
+                    ):
+
+                        # ==================================================
+                        # DETERMINE RANGE FOR 50% CALCULATION
+                        # ==================================================
+                        if state.trend_4h == "BULLISH":
+                            # 4H bullish → 5M CHOCH is bullish break
+                            range_high = candle_5m.high           # CHOCH candle high
+                            range_low = state.swing_low_5m            # last bearish swing low
+                            direction = "BUY"
+                        else:
+                            # 4H bearish → 5M CHOCH is bearish break
+                            range_low = candle_5m.low              # CHOCH candle low
+                            range_high = state.swing_high_5m           # last bullish swing high
+                            direction = "SELL"
+
+                        # Safety check
+                        if range_high is None or range_low is None:
+                            print("❌ Invalid range — trade skipped")
+                            return
+
+                        # ==================================================
+                        # 50% RETRACEMENT ENTRY
+                        # ==================================================
+                        entry = (range_high + range_low) / 2
+
+                        pip = 0.0001
+
+                        if direction == "BUY":
+                            stop_loss = range_low - 4 * pip
+                            risk = entry - stop_loss
+                            take_profit = entry + 3 * risk
+                        else:
+                            stop_loss = range_high + 4 * pip
+                            risk = stop_loss - entry
+                            take_profit = entry - 3 * risk
+
+                        # Risk validation
+                        if risk <= 0:
+                            print("❌ Invalid risk — trade skipped")
+                            return
+
+                        # ==================================================
+                        # STORE TRADE IN STATE (FOR PLOTTING / EXECUTION)
+                        # ==================================================
+                        state.trade = {
+                            "direction": direction,
+                            "entry": float(entry),
+                            "sl": float(stop_loss),
+                            "tp": float(take_profit),
+                            "rr": 3.0,
+
+                            # Context
+                            "htf_trend": state.trend_4h,
+                            "poi_type": state.active_poi["type"],
+                            "poi_price_low": state.active_poi.get("price_low"),
+                            "poi_price_high": state.active_poi.get("price_high"),
+                            "poi_time": state.poi_tapped_time,
+
+                            "choch_time": candle_5m.time,
+                            "range_high": float(range_high),
+                            "range_low": float(range_low),
+
+                            # Lifecycle
+                            "planned_time": candle_5m.time,
+                            "status": "PLANNED",
+                        }
+
+                        state.trade_planned = True
+
+                        # 📡 Broadcast 5M Retracement & Trade Plan
+                        ts_str = candle_5m.time.strftime('%Y%m%d_%H%M')
+                        iso_start = candle_5m.time.isoformat()
+                        iso_end = (candle_5m.time + pd.Timedelta(minutes=25)).isoformat()
+
+                        # Retracement payload
+                        retr_event = {
+                            "symbol": self.symbol,
+                            "timeframe": "5m",
+                            "events": [
+                                {
+                                    "id": f"5m_RETR_{ts_str}",
+                                    "type": "RETRACEMENT",
+                                    "start": float(range_low),
+                                    "end": float(range_high),
+                                    "mid": float(entry),
+                                    "time_start": iso_start,
+                                    "time_end": iso_end,
+                                    "extend_candles": 5
+                                }
+                            ]
+                        }
+
+                        # Trade Plan payload
+                        plan_event = {
+                            "symbol": self.symbol,
+                            "timeframe": "5m",
+                            "events": [
+                                {
+                                    "id": f"5m_RETR_{ts_str}",
+                                    "type": "TRADE_PLAN",
+                                    "plan_direction": "LONG" if direction == "BUY" else "SHORT",
+                                    "SL": float(stop_loss),
+                                    "TP": float(take_profit),
+                                    "Entry": float(entry),
+                                    "time_start": iso_start,
+                                    "time_end": iso_end
+                                }
+                            ]
+                        }
+
+                        print(f"📡 Sending 5M Retracement & Trade Plan: {ts_str}")
+                        self.publish("event", retr_event)
+                        self.publish("event", plan_event)
+
+                        print("🚀 TRADE PLANNED & STORED")
+                        print(f"   Direction : {direction}")
+                        print(f"   Entry     : {entry}")
+                        print(f"   SL        : {stop_loss}")
+                        print(f"   TP        : {take_profit}")
+
+
+                    # --------------------------------------------------
+                    # TRADE MANAGEMENT (BUY ONLY - Realtime 5M)
+                    # --------------------------------------------------
+                    if state.trade_planned and state.trade is not None:
+
+                        trade = state.trade
+
+                        # Safety: only manage BUY trades here
+                        if trade["direction"] != "BUY":
+                            pass
+                        else:
+                            entry = trade["entry"]
+                            sl = trade["sl"]
+                            tp = trade["tp"]
+
+                            candle_high = candle_5m.high
+                            candle_low = candle_5m.low
+                            candle_time = candle_5m.time
+
+                            # ==================================================
+                            # ENTRY NOT FILLED YET
+                            # ==================================================
+                            if not state.entry_filled:
+
+                                entry_filled_this_candle = False
+
+                                # -----------------------------
+                                # ENTRY CHECK FIRST
+                                # -----------------------------
+                                if candle_low <= entry <= candle_high:
+                                    entry_filled_this_candle = True
+
+                                if entry_filled_this_candle:
+                                    state.entry_filled = True
+                                    trade["status"] = "OPEN"
+                                    trade["entry_time"] = candle_time
+
+                                    print(f"🟢 BUY ENTRY FILLED @ {entry} | {candle_time}")
+
+                                else:
+                                    # --------------------------------------------------
+                                    # 2% TP MOVE WITHOUT ENTRY → INVALIDATE TRADE
+                                    # --------------------------------------------------
+                                    tp_2pct_level = entry + 0.02 * (tp - entry)
+
+                                    if candle_high >= tp_2pct_level:
+                                        print(
+                                            f"🟩 TP MOVE WITHOUT ENTRY (2% HIT @ {tp_2pct_level}) → TRADE INVALID"
+                                        )
+
+                                        # 🔥 RESET TRADE STATE
+                                        state.trade = None
+                                        state.trade_planned = False
+                                        state.entry_filled = False
+
+                                        return
+
+                            # ==================================================
+                            # ENTRY FILLED → CHECK SL / TP
+                            # ==================================================
+                            else:
+
+                                # -----------------------------
+                                # STOP LOSS
+                                # -----------------------------
+                                if candle_low <= sl:
+                                    print(f"🟥 BUY SL HIT @ {sl}")
+
+                                    trade["status"] = "SL"
+                                    trade["exit_time"] = candle_time
+                                    trade["exit_price"] = sl
+
+                                    state.trade = None
+                                    state.trade_planned = False
+                                    state.entry_filled = False
+
+                                    return
+
+                                # -----------------------------
+                                # TAKE PROFIT
+                                # -----------------------------
+                                elif candle_high >= tp:
+                                    print(f"🟩 BUY TP HIT @ {tp}")
+
+                                    trade["status"] = "TP"
+                                    trade["exit_time"] = candle_time
+                                    trade["exit_price"] = tp
+
+                                    state.trade = None
+                                    state.trade_planned = False
+                                    state.entry_filled = False
+
+                                    return
+
+
+
+
+
+
+
+        elif state.trend_4h == "BEARISH":
+            state.trend_5m = "BULLISH"
+
+            if state.candidate_high_5m is None:
+                state.candidate_high_5m = candle_5m.high
+                state.pullback_count_5m = 0
+                if state.swing_low_5m is None:
+                    state.swing_low_5m = candle_5m.low
+                    state.swing_low_5m_time = candle_5m.time
+                return
+
+            if bear_candle_5m and (state.pullback_count_5m == 0 or state.pullback_count_5m == 1):
+                state.pullback_count_5m += 1
+
+            if candle_5m.high > state.candidate_high_5m:
+                state.candidate_high_5m = candle_5m.high
+
+            retrace = (state.candidate_high_5m - candle_5m.low) / max(
+                state.candidate_high_5m - state.swing_low_5m, 1e-9
+            )
+            valid_pullback_5m = state.pullback_count_5m >= 2 or retrace >= 0.99
+
+            if valid_pullback_5m:
+                state.buffer_5m_sl.append(candle_5m)
+
+                # BOS 5m
+                if candle_5m.high > state.candidate_high_5m:
+                    swing_candle = state.buffer_5m_sl.lowest()
+
+                    state.swing_low_5m = swing_candle.low
+                    state.swing_low_5m_time = swing_candle.time
+                    state.protected_5m_point = state.swing_low_5m
+                    state.protected_5m_time = state.swing_low_5m_time
+
+                    state.candidate_high_5m = candle_5m.high
+                    state.pullback_count_5m = 0
+                    state.buffer_5m_sl.clear()
+
+                    # 📡 Broadcast 5M BOS
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_BOS_{candle_5m.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "BOS",
+                                "direction": "BULLISH",
+                                "broken_level": candle_5m.high,
+                                "time": candle_5m.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 5M BOS (BULLISH): {event_payload}")
+                    self.publish("event", event_payload)
+
+                # CHOCH 5m
+                if candle_5m.low < state.swing_low_5m:
+                    state.trend_5m = "BEARISH"
+                    state.swing_high_5m = state.candidate_high_5m
+                    state.pullback_count_5m = 0
+                    state.candidate_low_5m = candle_5m.low
+                    state.choch_5m_this_candle = True
+                    state.buffer_5m_sl.clear()
+
+                    # 📡 Broadcast 5M CHOCH
+                    event_payload = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_CHOCH_{candle_5m.time.strftime('%Y%m%d_%H%M')}",
+                                "type": "CHOCH",
+                                "broken_level": state.swing_low_5m,
+                                "time": candle_5m.time.isoformat()
+                            }
+                        ]
+                    }
+                    print(f"📡 Sending 5M CHOCH (BEARISH): {event_payload}")
+                    self.publish("event", event_payload)
+
+            # --------------------------------------------------
+            # 5M POI TAP CHECK (Realtime)
+            # --------------------------------------------------
+            if state.mapped_pois and not state.poi_tapped and state.active_poi is None:
+                for poi in state.mapped_pois:
+                    if poi.get("state") == "INVALIDATED":
+                        continue
+
+                    poi_type = poi["type"]
+                    poi_trend = poi["trend"]
+
+                    if poi_trend == "BEARISH":
+                        if poi_type == "OB":
+                            if candle_5m.high >= poi["price_low"] and candle_5m.low <= poi["price_high"]:
+                                state.poi_tapped = True
+                                state.active_poi = poi
+                                state.poi_tapped_level = candle_5m.high
+                                state.poi_tapped_time = candle_5m.time
+                                break
+
+                        elif poi_type == "LIQ":
+                            if candle_5m.high >= poi["price"]:
+                                state.poi_tapped = True
+                                state.active_poi = poi
+                                state.poi_tapped_level = candle_5m.high
+                                state.poi_tapped_time = candle_5m.time
+                                break
+            # POST POI TAP                
+            if state.poi_tapped:
+
+                # --------------------------------------------------
+                #  POI INVALIDATION (Realtime)
+                # --------------------------------------------------
+                poi_invalidated = False
+
+                active_poi = state.active_poi
+
+                # ⛔ Do NOT invalidate on tap candle
+                if candle_5m.time > state.poi_tapped_time and state.active_poi:
+
+                    active_poi = state.active_poi
+                    invalidation_level = None
+
+                    # Find next POI (order-aware) if it exists
+                    next_poi = None
+                    for poi in state.mapped_pois:
+                        if poi is active_poi:
+                            continue
+                        if poi.get("state") != "INVALIDATED":
+                            next_poi = poi
+                            break  # first non-invalidated POI after current active POI
+
+                    p0_type = active_poi["type"]
+                    trend = state.trend_4h
+
+                    # =========================
+                    # BEARISH TREND
+                    # =========================
+                    if trend == "BEARISH":
+
+                        if next_poi:
+                            p1_type = next_poi["type"]
+
+                            if p0_type == "OB" and p1_type == "OB":
+                                invalidation_level = (active_poi["price_low"] + next_poi["price_low"]) / 2
+
+                            elif p0_type == "OB" and p1_type == "LIQ":
+                                invalidation_level = (active_poi["price_low"] + next_poi["price"]) / 2
+
+                            elif p0_type == "LIQ" and p1_type == "LIQ":
+                                invalidation_level = (active_poi["price"] + next_poi["price"]) / 2
+
+                        else:
+                            # No next POI → fallback to 4H swing high
+                            if p0_type == "OB":
+                                invalidation_level = (active_poi["price_low"] + state.swing_high) / 2
+                            else:
+                                invalidation_level = (active_poi["price"] + state.swing_high) / 2
+
+                        if invalidation_level is not None and candle_5m.high > invalidation_level:
+                            poi_invalidated = True
+                            state.active_poi["state"] = "INVALIDATED"
+
+                # --------------------------------------------------
+                # 🔥 APPLY INVALIDATION
+                # --------------------------------------------------
+                if poi_invalidated:
+                    print(f"❌ POI INVALIDATED @ {candle_5m.time}")
+
+                    state.active_poi["state"] = "INVALIDATED"
+
+                    state.active_poi = None
+                    state.poi_tapped = False
+                    state.poi_tapped_level = None
+                    state.poi_tapped_time = None
+
+                    state.protected_5m_point = None
+                    state.protected_5m_time = None
+
+                    return
+
+
+                # --------------------------------------------------
+                # TRADE SETUP (CHOCH + POI)
+                # --------------------------------------------------
+                if (
+                    state.choch_5m_this_candle
+                    and state.active_poi is not None
+                    and not poi_invalidated
+                    and not state.trade_planned
+                ):
+
+                    # ==================================================
+                    # DETERMINE RANGE FOR 50% CALCULATION
+                    # ==================================================
+                    if state.trend_4h == "BEARISH":
+                        # 4H bearish → 5M CHOCH is bearish break
+                        range_low = candle_5m.low              # CHOCH candle low
+                        range_high = state.swing_high_5m           # last bullish swing high
+                        direction = "SELL"
+                    else:
+                        # 4H bullish → 5M CHOCH is bullish break
+                        range_high = candle_5m.high
+                        range_low = state.swing_low_5m
+                        direction = "BUY"
+
+                    # Safety check
+                    if range_high is None or range_low is None:
+                        print("❌ Invalid range — trade skipped")
+                        return
+
+                    # ==================================================
+                    # 50% RETRACEMENT ENTRY
+                    # ==================================================
+                    entry = (range_high + range_low) / 2
+
+                    pip = 0.0001
+
+                    if direction == "BUY":
+                        stop_loss = range_low - 4 * pip
+                        risk = entry - stop_loss
+                        take_profit = entry + 3 * risk
+                    else:
+                        stop_loss = range_high + 4 * pip
+                        risk = stop_loss - entry
+                        take_profit = entry - 3 * risk
+
+                    # Risk validation
+                    if risk <= 0:
+                        print("❌ Invalid risk — trade skipped")
+                        return
+
+                    # ==================================================
+                    # STORE TRADE IN STATE (FOR PLOTTING / EXECUTION)
+                    # ==================================================
+                    state.trade = {
+                        "direction": direction,
+                        "entry": float(entry),
+                        "sl": float(stop_loss),
+                        "tp": float(take_profit),
+                        "rr": 3.0,
+
+                        # Context
+                        "htf_trend": state.trend_4h,
+                        "poi_type": state.active_poi["type"],
+                        "poi_price_low": state.active_poi.get("price_low"),
+                        "poi_price_high": state.active_poi.get("price_high"),
+                        "poi_time": state.poi_tapped_time,
+
+                        "choch_time": candle_5m.time,
+                        "range_high": float(range_high),
+                        "range_low": float(range_low),
+
+                        # Lifecycle
+                        "planned_time": candle_5m.time,
+                        "status": "PLANNED",
+                    }
+
+                    state.trade_planned = True
+
+                    # 📡 Broadcast 5M Retracement & Trade Plan
+                    ts_str = candle_5m.time.strftime('%Y%m%d_%H%M')
+                    iso_start = candle_5m.time.isoformat()
+                    iso_end = (candle_5m.time + pd.Timedelta(minutes=25)).isoformat()
+
+                    # Retracement payload
+                    retr_event = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_RETR_{ts_str}",
+                                "type": "RETRACEMENT",
+                                "start": float(range_low),
+                                "end": float(range_high),
+                                "mid": float(entry),
+                                "time_start": iso_start,
+                                "time_end": iso_end,
+                                "extend_candles": 5
+                            }
+                        ]
+                    }
+
+                    # Trade Plan payload
+                    plan_event = {
+                        "symbol": self.symbol,
+                        "timeframe": "5m",
+                        "events": [
+                            {
+                                "id": f"5m_RETR_{ts_str}",
+                                "type": "TRADE_PLAN",
+                                "plan_direction": "LONG" if direction == "BUY" else "SHORT",
+                                "SL": float(stop_loss),
+                                "TP": float(take_profit),
+                                "Entry": float(entry),
+                                "time_start": iso_start,
+                                "time_end": iso_end
+                            }
+                        ]
+                    }
+
+                    print(f"📡 Sending 5M Retracement & Trade Plan: {ts_str}")
+                    self.publish("event", retr_event)
+                    self.publish("event", plan_event)
+
+                    print("🚀 TRADE PLANNED & STORED")
+                    print(f"   Direction : {direction}")
+                    print(f"   Entry     : {entry}")
+                    print(f"   SL        : {stop_loss}")
+                    print(f"   TP        : {take_profit}")
+
+
+                # --------------------------------------------------
+                # TRADE MANAGEMENT (SELL ONLY - Realtime 5M)
+                # --------------------------------------------------
+                if state.trade_planned and state.trade is not None:
+
+                    trade = state.trade
+
+                    # Safety: only manage SELL trades here
+                    if trade["direction"] != "SELL":
+                        pass
+                    else:
+                        entry = trade["entry"]
+                        sl = trade["sl"]
+                        tp = trade["tp"]
+
+                        candle_high = candle_5m.high
+                        candle_low = candle_5m.low
+                        candle_time = candle_5m.time
+
+                        # ==================================================
+                        # ENTRY NOT FILLED YET
+                        # ==================================================
+                        if not state.entry_filled:
+
+                            entry_filled_this_candle = False
+
+                            # -----------------------------
+                            # ENTRY CHECK FIRST
+                            # -----------------------------
+                            if candle_low <= entry <= candle_high:
+                                entry_filled_this_candle = True
+
+                            if entry_filled_this_candle:
+                                state.entry_filled = True
+                                trade["status"] = "OPEN"
+                                trade["entry_time"] = candle_time
+
+                                print(f"🔴 SELL ENTRY FILLED @ {entry} | {candle_time}")
+
+                            else:
+                                # --------------------------------------------------
+                                # 2% TP MOVE WITHOUT ENTRY → INVALIDATE TRADE
+                                # --------------------------------------------------
+                                tp_2pct_level = entry - 0.02 * (entry - tp)
+
+                                if candle_low <= tp_2pct_level:
+                                    print(
+                                        f"🟥 TP MOVE WITHOUT ENTRY (2% HIT @ {tp_2pct_level}) → TRADE INVALID"
+                                    )
+
+                                    # 🔥 RESET TRADE STATE
+                                    state.trade = None
+                                    state.trade_planned = False
+                                    state.entry_filled = False
+
+                                    return
+
+                        # ==================================================
+                        # ENTRY FILLED → CHECK SL / TP
+                        # ==================================================
+                        else:
+
+                            # -----------------------------
+                            # STOP LOSS
+                            # -----------------------------
+                            if candle_high >= sl:
+                                print(f"🟥 SELL SL HIT @ {sl}")
+
+                                trade["status"] = "SL"
+                                trade["exit_time"] = candle_time
+                                trade["exit_price"] = sl
+
+                                state.trade = None
+                                state.trade_planned = False
+                                state.entry_filled = False
+
+                                return
+
+                            # -----------------------------
+                            # TAKE PROFIT
+                            # -----------------------------
+                            elif candle_low <= tp:
+                                print(f"🟩 SELL TP HIT @ {tp}")
+
+                                trade["status"] = "TP"
+                                trade["exit_time"] = candle_time
+                                trade["exit_price"] = tp
+
+                                state.trade = None
+                                state.trade_planned = False
+                                state.entry_filled = False
+
+                                return
@@ -8,3 +8,6 @@ class StateRegistry:
         if symbol not in self._states:
             self._states[symbol] = PairState(symbol=symbol)
         return self._states[symbol]
+
+    def set_state(self, state: PairState) -> None:
+        self._states[state.symbol] = state
@@ -0,0 +1,187 @@
+"""
+Fixed-size candle buffers for the realtime engine.
+
+`CandleRing` keeps the last `capacity` OHLC candles in preallocated NumPy
+columns, so a pair's buffers take the same memory however long it runs.
+Appends are O(1); once full, each append drops the oldest candle. Drops
+are counted (`dropped`); a named ring, whose readers expect every candle
+since its last `clear`, also logs the first one since then. The highest
+high and lowest low of the candles held are tracked with monotonic
+deques, so they cost O(1) instead of a scan of the buffer.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from backend.engine.candle_store import Candle
+
+
+class CandleRing:
+    """
+    `Candle`s in, `Candle`s out, oldest first; times must not decrease.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        self.name = name
+        self.time = np.zeros(capacity, dtype="datetime64[us]")
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+
+        # candles appended since the last clear; candle n lives at n % capacity
+        self._n = 0
+        # candle numbers with decreasing highs / increasing lows; ties keep
+        # the earlier candle, as max() / min() over a list would
+        self._highs: deque = deque()
+        self._lows: deque = deque()
+
+        # candles dropped to make room, ever; logged once per clear
+        self.dropped = 0
+        self._overflowing = False
+
+    def __len__(self) -> int:
+        return min(self._n, self.capacity)
+
+    def _first(self) -> int:
+        return self._n - len(self)
+
+    def append(self, candle: Candle) -> None:
+        n = self._n
+        i = n % self.capacity
+        t, o, high, low, c = candle
+
+        if n >= self.capacity:
+            self.dropped += 1
+            if not self._overflowing and self.name is not None:
+                self._overflowing = True
+                print(f"⚠️ {self.name} full ({self.capacity} candles) at {t}: dropping its oldest")
+
+        self.time[i] = t
+        self.open[i] = o
+        self.high[i] = high
+        self.low[i] = low
+        self.close[i] = c
+        self._n = n + 1
+
+        first = self._first()
+        highs = self._highs
+        while highs and highs[0] < first:
+            highs.popleft()
+        while highs and self.high[highs[-1] % self.capacity] < high:
+            highs.pop()
+        highs.append(n)
+
+        lows = self._lows
+        while lows and lows[0] < first:
+            lows.popleft()
+        while lows and self.low[lows[-1] % self.capacity] > low:
+            lows.pop()
+        lows.append(n)
+
+    def extend(self, candles: Iterable[Candle]) -> None:
+        for candle in candles:
+            self.append(candle)
+
+    def clear(self) -> None:
+        self._n = 0
+        self._highs.clear()
+        self._lows.clear()
+        self._overflowing = False
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CandleRing):
+            return NotImplemented
+        return self.capacity == other.capacity and list(self) == list(other)
+
+    # pickled (snapshots) as just the candles held, not the whole capacity
+    def __getstate__(self) -> dict:
+        order = [n % self.capacity for n in range(self._first(), self._n)]
+        return {
+            "capacity": self.capacity,
+            "name": self.name,
+            "columns": [col[order] for col in (self.time, self.open, self.high, self.low, self.close)],
+            "dropped": self.dropped,
+            "overflowing": self._overflowing,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["capacity"], state.get("name"))
+        for row in zip(*state["columns"]):
+            self.append(Candle(*row))
+        self.dropped = state.get("dropped", 0)
+        self._overflowing = state.get("overflowing", False)
+
+    def _candle(self, n: int) -> Candle:
+        i = n % self.capacity
+        return Candle(
+            self.time[i].item(),
+            float(self.open[i]),
+            float(self.high[i]),
+            float(self.low[i]),
+            float(self.close[i]),
+        )
+
+    def __getitem__(self, k: int) -> Candle:
+        size = len(self)
+        if not -size <= k < size:
+            raise IndexError("CandleRing index out of range")
+        return self._candle(self._first() + k % size)
+
+    def __iter__(self) -> Iterator[Candle]:
+        for n in range(self._first(), self._n):
+            yield self._candle(n)
+
+    # ==================================================
+    # QUERIES
+    # ==================================================
+    def highest(self) -> Candle:
+        """
+        First candle with the highest high.
+        """
+        if not self._highs:
+            raise ValueError("highest() of an empty CandleRing")
+        return self._candle(self._highs[0])
+
+    def lowest(self) -> Candle:
+        """
+        First candle with the lowest low.
+        """
+        if not self._lows:
+            raise ValueError("lowest() of an empty CandleRing")
+        return self._candle(self._lows[0])
+
+    def max_high(self) -> float:
+        return self.highest().high
+
+    def min_low(self) -> float:
+        return self.lowest().low
+
+    def times(self) -> np.ndarray:
+        """
+        Times of the candles held, oldest first.
+        """
+        start = self._first() % self.capacity
+        if self._n <= self.capacity:
+            return self.time[:self._n]
+        return np.concatenate((self.time[start:], self.time[:start]))
+
+    def tail(self, n: int) -> Tuple[np.ndarray, ...]:
+        """
+        (time, open, high, low, close) columns of the last `n` candles
+        held, oldest first.
+        """
+        order = np.arange(self._n - min(n, len(self)), self._n) % self.capacity
+        return tuple(col[order] for col in (self.time, self.open, self.high, self.low, self.close))
+
+    def last_at_or_before(self, when: datetime) -> Optional[Candle]:
+        """
+        Latest candle with time <= `when`, None if every candle is later.
+        """
+        k = int(np.searchsorted(self.times(), np.datetime64(when, "us"), side="right"))
+        if k == 0:
+            return None
+        return self._candle(self._first() + k - 1)
@@ -0,0 +1,266 @@
+"""
+Runs many `PairEngine`s at once.
+
+Pairs are sharded by a stable hash of their symbol over the workers (one
+per core by default). Each shard runs in its own process, merging its
+pairs' candle sources by time so they advance in lockstep; pacing is up
+to the sources. Engine output is sent back over a queue and handed to
+the caller's `publish` in the parent process, where the WebSocket
+managers live.
+
+With a `SnapshotPolicy`, each engine is snapshotted to disk as it runs
+and restored from its snapshot on the next start (see `snapshot.py`).
+With `event_log_root`, every event a pair publishes is also appended to
+its on-disk event log (see `event_log.py`).
+"""
+import heapq
+import os
+import queue
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing import Queue
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .candle_stream import CandleSource
+from .event_log import EventLog, LoggedPublish
+from .live_bars import LiveBars
+from .pair_engine import PairEngine, Publish
+from .registry import StateRegistry
+from .snapshot import SnapshotPolicy, Snapshotter, load_snapshot, restore_engine
+from .warmup import Warmup, seed_from_history, warm_up
+
+
+@dataclass
+class PairConfig:
+    """
+    One symbol to run: its 1M candle source and the `PairState` fields to
+    seed before the first candle (trend, swings, BOS time, pullback params).
+
+    With `warmup`, trend / swing / BOS time come from `detect_seed` on the
+    history (fields in `seed` still win) and the engine is fast-forwarded
+    through it before `source` starts. A history with no 4H break to seed
+    from falls back to `seed`, which then needs its own `trend_4h`.
+    `chart_timeframes` (e.g. "30m", "1d") are aggregated and published
+    alongside 5M / 4H. With `live_interval`, every timeframe's forming bar
+    is also published as it changes, at most once per that many seconds
+    (see `live_bars.py`).
+    """
+    symbol: str
+    source: CandleSource
+    seed: Dict[str, Any] = field(default_factory=dict)
+    warmup: Optional[Warmup] = None
+    chart_timeframes: Tuple[str, ...] = ()
+    live_interval: Optional[float] = None
+
+
+def shard_of(symbol: str, shards: int) -> int:
+    # crc32, not hash(): str hashes differ between processes
+    return zlib.crc32(symbol.encode()) % shards
+
+
+def build_engine(
+    config: PairConfig,
+    registry: StateRegistry,
+    publish: Publish,
+    snapshots: Optional[SnapshotPolicy] = None,
+) -> Tuple[PairEngine, CandleSource]:
+    """
+    The pair's engine and the source to feed it from: restored from its
+    snapshot and resuming after the snapshot's last candle when there is
+    one, otherwise seeded (and warmed up) from the config.
+    """
+    engine, source = _build_engine(config, registry, publish, snapshots)
+    # after warm-up, so its first update of each bar is a full one
+    if config.live_interval is not None:
+        engine.live = LiveBars(config.live_interval)
+    return engine, source
+
+
+def _build_engine(
+    config: PairConfig,
+    registry: StateRegistry,
+    publish: Publish,
+    snapshots: Optional[SnapshotPolicy],
+) -> Tuple[PairEngine, CandleSource]:
+    if snapshots is not None:
+        snapshot = load_snapshot(config.symbol, snapshots.root)
+        if snapshot is not None:
+            engine = restore_engine(snapshot, registry, publish, config.chart_timeframes)
+            print(
+                f"♻️ {config.symbol} restored from snapshot @ {snapshot.last_time} "
+                f"| Trend 4H: {engine.state.trend_4h}"
+            )
+            return engine, config.source.resume_after(snapshot.last_time)
+
+    seed = config.seed
+    history = None
+    if config.warmup is not None:
+        t0 = time.perf_counter()
+        history = config.warmup.load()
+        seed = {**_history_seed(config, history), **config.seed}
+
+    state = registry.get_state(config.symbol)
+    for name, value in seed.items():
+        setattr(state, name, value)
+    engine = PairEngine(state, publish, config.chart_timeframes)
+
+    if history is not None:
+        warm_up(engine, history)
+        print(
+            f"⏩ {config.symbol} warmed up on {len(history)} minute candles "
+            f"in {time.perf_counter() - t0:.1f}s | Trend 4H: {state.trend_4h}"
+        )
+    return engine, config.source
+
+
+def _history_seed(config: PairConfig, history) -> Dict[str, Any]:
+    # one pair's history without a 4H break must not take its shard down
+    try:
+        return seed_from_history(history)
+    except ValueError as e:
+        if "trend_4h" not in config.seed:
+            raise ValueError(
+                f"{config.symbol}: cannot seed from its warm-up history ({e}); "
+                f"set trend_4h (and swing / bos_time_4h) in its seed"
+            ) from e
+        print(f"⚠️ {config.symbol}: {e} in the warm-up history, using the configured seed")
+        return {}
+
+
+def _iter_rows(k: int, source: CandleSource) -> Iterator[Tuple]:
+    for t, o, h, l, c in source:
+        yield t, k, o, h, l, c
+
+
+def run_shard(
+    pairs: Sequence[PairConfig],
+    publish: Publish,
+    snapshots: Optional[SnapshotPolicy] = None,
+    event_log_root: Optional[Path] = None,
+) -> None:
+    """
+    Run `pairs` in the current thread until every source ends.
+    """
+    registry = StateRegistry()
+    logged = [LoggedPublish(publish, EventLog(cfg.symbol, event_log_root)) for cfg in pairs] if event_log_root else []
+    publishers = logged or [publish] * len(pairs)
+
+    built = [build_engine(cfg, registry, p, snapshots) for cfg, p in zip(pairs, publishers)]
+    engines = [engine for engine, _ in built]
+    streams = [_iter_rows(k, source) for k, (_, source) in enumerate(built)]
+
+    snapshotters = [Snapshotter(engine, snapshots) for engine in engines] if snapshots else []
+
+    for t, k, o, h, l, c in heapq.merge(*streams):
+        if logged:
+            logged[k].at(t)
+        engines[k].on_candle_1m(t, o, h, l, c)
+        if snapshotters:
+            snapshotters[k].after(t)
+
+    for snapshotter in snapshotters:
+        snapshotter.save()
+    for p in logged:
+        p.log.close()
+
+
+# ==================================================
+# WORKER PROCESS
+# ==================================================
+_worker_queue: Optional[Queue] = None
+
+# a worker's last item, put after all of its shard's output
+SHARD_DONE = "shard_done"
+
+
+def _init_worker(out: Queue) -> None:
+    global _worker_queue
+    _worker_queue = out
+
+
+def _publish_to_parent(channel: str, message: dict) -> None:
+    _worker_queue.put((channel, message))
+
+
+def _run_shard_in_worker(
+    pairs: List[PairConfig],
+    snapshots: Optional[SnapshotPolicy],
+    event_log_root: Optional[Path],
+) -> None:
+    try:
+        run_shard(pairs, _publish_to_parent, snapshots, event_log_root)
+    finally:
+        # the future can resolve while earlier puts still sit in this
+        # process's queue buffer; the parent drains up to this instead
+        _worker_queue.put((SHARD_DONE, None))
+
+
+# ==================================================
+# SCHEDULER
+# ==================================================
+class RealtimeScheduler:
+    def __init__(
+        self,
+        pairs: Sequence[PairConfig],
+        workers: Optional[int] = None,
+        snapshots: Optional[SnapshotPolicy] = None,
+        event_log_root: Optional[Path] = None,
+    ):
+        self.pairs = list(pairs)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.pairs)))
+        self.snapshots = snapshots
+        self.event_log_root = event_log_root
+
+    def shards(self) -> List[List[PairConfig]]:
+        shards: List[List[PairConfig]] = [[] for _ in range(self.workers)]
+        for cfg in self.pairs:
+            shards[shard_of(cfg.symbol, self.workers)].append(cfg)
+        return [s for s in shards if s]
+
+    def run(self, publish: Publish) -> None:
+        """
+        Run every pair until its candles run out. Blocks; `publish` is
+        always called from this thread.
+        """
+        shards = self.shards()
+
+        if len(shards) <= 1:
+            run_shard(shards[0] if shards else [], publish, self.snapshots, self.event_log_root)
+            return
+
+        local = [cfg.symbol for cfg in self.pairs if cfg.source.in_process_only]
+        if local:
+            raise ValueError(f"sources of {', '.join(local)} cannot run in worker processes; use workers=1")
+
+        out: Queue = Queue()
+        with ProcessPoolExecutor(
+            max_workers=len(shards),
+            initializer=_init_worker,
+            initargs=(out,),
+        ) as pool:
+            futures = [pool.submit(_run_shard_in_worker, s, self.snapshots, self.event_log_root) for s in shards]
+
+            finished = 0
+            while finished < len(shards):
+                try:
+                    channel, message = out.get(timeout=0.1)
+                except queue.Empty:
+                    # a worker that died outright never sends SHARD_DONE
+                    if all(f.done() for f in futures) and any(
+                        isinstance(f.exception(), BrokenProcessPool) for f in futures
+                    ):
+                        break
+                    continue
+                if channel == SHARD_DONE:
+                    finished += 1
+                    continue
+                publish(channel, message)
+
+            for shard, f in zip(shards, futures):
+                if f.exception() is not None:
+                    symbols = ", ".join(cfg.symbol for cfg in shard)
+                    print(f"❌ Realtime shard [{symbols}] stopped: {f.exception()}")
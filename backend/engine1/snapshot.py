@@ -0,0 +1,150 @@
+"""
+Snapshots of running `PairEngine`s on local disk.
+
+A snapshot holds a pair's `PairState`, the engine's aggregation buffers and
+POI detector, and the time of the last 1M candle fed, pickled into one
+file per symbol:
+
+    <root>/<SYMBOL>.snap
+
+On start, a pair with a snapshot is restored from it and its source
+resumes after that candle, so a restart costs one file read however much
+history is behind it. Snapshots are only taken between candles, never
+mid-step.
+"""
+import pickle
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from .pair_engine import PairEngine, Publish
+from .registry import StateRegistry
+from .state import PairState
+
+DEFAULT_SNAPSHOT_ROOT = Path(__file__).resolve().parents[2] / "data" / "snapshots"
+
+# bump when PairState / PairEngine change shape; older snapshots are ignored
+SNAPSHOT_VERSION = 3
+
+# everything of a PairEngine besides its state (which holds the candle
+# buffers) and publish callback
+ENGINE_FIELDS = (
+    "bars",
+    "candle_5m",
+    "poi_stream",
+)
+
+
+@dataclass
+class Snapshot:
+    symbol: str
+    last_time: datetime   # last 1M candle fed to the engine
+    state: PairState
+    engine: Dict[str, Any]
+
+
+@dataclass
+class SnapshotPolicy:
+    """
+    Where snapshots live and how often (wall-clock seconds) each pair's
+    engine is saved while it runs. A final snapshot is taken when a
+    source ends.
+    """
+    root: Path = DEFAULT_SNAPSHOT_ROOT
+    every: float = 60.0
+
+
+def snapshot_path(symbol: str, root: Optional[Path] = None) -> Path:
+    root = Path(root) if root is not None else DEFAULT_SNAPSHOT_ROOT
+    return root / f"{symbol}.snap"
+
+
+def save_snapshot(engine: PairEngine, last_time: datetime, root: Optional[Path] = None) -> Path:
+    path = snapshot_path(engine.symbol, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    snapshot = Snapshot(
+        symbol=engine.symbol,
+        last_time=last_time,
+        state=engine.state,
+        engine={name: getattr(engine, name) for name in ENGINE_FIELDS},
+    )
+
+    # Write to a temp name first so a crash never leaves a half-written snapshot
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump((SNAPSHOT_VERSION, snapshot), f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+    return path
+
+
+def load_snapshot(symbol: str, root: Optional[Path] = None) -> Optional[Snapshot]:
+    """
+    The symbol's snapshot, or None when there is none or it cannot be used
+    (unreadable, or written by another SNAPSHOT_VERSION).
+    """
+    path = snapshot_path(symbol, root)
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            version, snapshot = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Ignoring snapshot {path}: {e}")
+        return None
+
+    if version != SNAPSHOT_VERSION or snapshot.symbol != symbol:
+        print(f"⚠️ Ignoring snapshot {path}: version {version}, symbol {snapshot.symbol}")
+        return None
+    return snapshot
+
+
+def restore_engine(
+    snapshot: Snapshot,
+    registry: StateRegistry,
+    publish: Publish,
+    chart_timeframes: Sequence[str] = (),
+) -> PairEngine:
+    """
+    The engine of `snapshot`, aggregating the `chart_timeframes` asked for
+    now: those the snapshot has keep their forming bar, new ones start
+    with the next candle (as on a cold start), others are dropped.
+    """
+    registry.set_state(snapshot.state)
+    engine = PairEngine(snapshot.state, publish, chart_timeframes)
+    for name, value in snapshot.engine.items():
+        if name != "bars":
+            setattr(engine, name, value)
+
+    saved = snapshot.engine["bars"].bars
+    for tf in engine.bars.bars:
+        if tf in saved:
+            engine.bars.bars[tf] = saved[tf]
+    return engine
+
+
+class Snapshotter:
+    """
+    Saves one engine every `policy.every` seconds. Call `after(t)` once the
+    engine has fully processed the candle at `t`.
+    """
+
+    def __init__(self, engine: PairEngine, policy: SnapshotPolicy):
+        self.engine = engine
+        self.policy = policy
+        self.last_time: Optional[datetime] = None
+        self._due = time.monotonic() + policy.every
+
+    def after(self, t: datetime) -> None:
+        self.last_time = t
+        if time.monotonic() >= self._due:
+            self.save()
+
+    def save(self) -> None:
+        if self.last_time is None:
+            return
+        save_snapshot(self.engine, self.last_time, self.policy.root)
+        self._due = time.monotonic() + self.policy.every
@@ -2,6 +2,17 @@ from dataclasses import dataclass, field
 from typing import Optional, Literal,List
 from datetime import datetime
 
+from .ring_buffer import CandleRing
+
+# Buffer capacities (candles). A full buffer drops its oldest candle, so a
+# leg longer than its buffer has its swing extremes (max_high / min_low)
+# and POI mapping taken over the newest candles only. Each buffer counts
+# the candles it dropped (`CandleRing.dropped`) and logs when it overflows.
+CANDLES_5M_PER_4H = 48
+LEG_4H_CAPACITY = 512                          # ~3 months of 4H candles
+LEG_5M_CAPACITY = LEG_4H_CAPACITY * CANDLES_5M_PER_4H
+SWING_5M_CAPACITY = 2048                       # ~1 week of 5M candles
+
 @dataclass
 class PairState:
     symbol: str
@@ -36,12 +47,11 @@ class PairState:
     pullback_pct: float = 0.02
     min_pullback_candles: int = 2
 
-    # EVENT LOG (for frontend / history)
+    # EVENT LOG (unused: published events go to engine1/event_log.py)
     events: List[dict] = field(default_factory=list)
 
-    # Buffers for incremental aggregation
-    buffer_5m: List[dict] = field(default_factory=list)
-    buffer_4h: List[dict] = field(default_factory=list)
+    # Buffers (1M → 5M / 4H aggregation itself is PairEngine.bars)
+    buffer_4h: CandleRing = field(default_factory=lambda: CandleRing(LEG_4H_CAPACITY, "4H leg buffer"))    # 4H candles from BOS → pullback
     # -----------------------------
     # 5M STRUCTURE & SWINGS
     # -----------------------------
@@ -54,9 +64,9 @@ class PairState:
     candidate_low_5m: Optional[float] = None
     pullback_count_5m: int = 0
 
-    buffer_5m_sh: List[dict] = field(default_factory=list)  # swing high / low buffer
-    buffer_5m_sl: List[dict] = field(default_factory=list)  # swing low / high buffer
-    buffer_5m_poi: List[dict] = field(default_factory=list)  # 5M candles for POI mapping
+    buffer_5m_sh: CandleRing = field(default_factory=lambda: CandleRing(SWING_5M_CAPACITY, "5M swing-high buffer"))  # swing high / low buffer
+    buffer_5m_sl: CandleRing = field(default_factory=lambda: CandleRing(SWING_5M_CAPACITY, "5M swing-low buffer"))  # swing low / high buffer
+    buffer_5m_poi: CandleRing = field(default_factory=lambda: CandleRing(LEG_5M_CAPACITY, "5M POI buffer"))  # 5M candles for POI mapping
 
     trend_5m: str = "NEUTRAL"  # current 5M trend
 
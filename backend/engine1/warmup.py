@@ -0,0 +1,182 @@
+"""
+Fast-forward of a `PairEngine` over 1M history before it goes live.
+
+The 5M / 4H candles of the history are built with a few NumPy
+reductions over the same clock-aligned buckets the engine's aggregator
+uses. Only the 4H step runs per 4H candle: 5M state is wiped by every 4H
+BOS / CHOCH, so up to the last 4H close that leaves the pullback
+unconfirmed nothing below 4H can survive into the live state. The rows
+after that close (the current leg) are fed through `on_candle_1m` as
+usual. Output is suppressed throughout, and the engine ends in the same
+state as a full replay of the same rows.
+"""
+import contextlib
+import copy
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from backend.engine.candle_store import Candle, CandleArrays, load_or_convert, iter_candle_blocks
+from backend.engine.resample import resample_multi
+from backend.engine.trend_seed import detect_seed
+from .aggregator import TIMEFRAME_MINUTES
+from .pair_engine import ENGINE_TIMEFRAMES, PairEngine
+
+
+@dataclass
+class Warmup:
+    """
+    History to fast-forward through: the rows of `csv_path` before `until`.
+    The pair's live source should start at `until`.
+    """
+    csv_path: Path
+    until: datetime
+
+    def load(self) -> CandleArrays:
+        candles = load_or_convert(self.csv_path)
+        return candles.slice(0, candles.index_of(self.until))
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# ==================================================
+# SEED
+# ==================================================
+def seed_from_history(candles: CandleArrays) -> Dict[str, Any]:
+    """
+    `PairState` seed fields from `detect_seed` on the history's 4H candles,
+    in place of a hand-written seed.
+    """
+    df_4h = resample_multi(candles, ("4h",)).frames["4h"]
+    with quiet():
+        refined_df, trend, bos_time, _, _ = detect_seed(df_4h)
+
+    first = refined_df.sort_index().iloc[0]
+    return {
+        "trend_4h": trend,
+        "bos_time_4h": bos_time.to_pydatetime(),
+        "swing_low": float(first["low"]) if trend == "BULLISH" else None,
+        "swing_high": float(first["high"]) if trend == "BEARISH" else None,
+    }
+
+
+# ==================================================
+# FAST-FORWARD
+# ==================================================
+def _bucket_starts(minutes: np.ndarray, size: int) -> np.ndarray:
+    # first row of each `size`-minute bucket present in `minutes`
+    buckets = minutes // size
+    return np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+
+def _bars(candles: CandleArrays, starts: np.ndarray, size: int) -> list:
+    ends = np.r_[starts[1:], len(candles)]
+    times = (candles.time[starts] // size * size).astype("datetime64[m]")
+    return list(_candles(
+        times,
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends - 1],
+    ))
+
+
+def _candles(times, o, h, l, c) -> Iterator[Candle]:
+    for row in zip(
+        times.astype("datetime64[m]").tolist(),
+        o.tolist(),
+        h.tolist(),
+        l.tolist(),
+        c.tolist(),
+    ):
+        yield Candle(*row)
+
+
+def _fast_forward(engine: PairEngine, candles_5m: list, candles_4h: list, groups: np.ndarray, on_time: np.ndarray) -> Optional[int]:
+    """
+    4H steps for `candles_4h`, whose 5M candles are
+    candles_5m[groups[j]:groups[j + 1]]. Returns the index of the last one
+    that closed on its own last minute and left the pullback unconfirmed
+    (None if there is none); `engine` matches a full replay up to the end
+    of that candle.
+    """
+    last_idle = None
+
+    for j, candle_4h in enumerate(candles_4h):
+        group = candles_5m[groups[j]:groups[j + 1]]
+        engine.buffer_5m_poi.extend(group)
+        engine.candle_5m = group[-1]
+
+        try:
+            if engine._close_4h(candle_4h):
+                engine._step_5m(engine.candle_5m)
+        except ValueError:
+            pass
+
+        if not engine.state.pullback_confirmed and on_time[j]:
+            last_idle = j
+
+    return last_idle
+
+
+def _prefill_chart_bars(engine: PairEngine, candles: CandleArrays, tail: int) -> None:
+    # chart-only timeframes get the rows of their bar that began before the tail
+    for tf, bars in engine.bars.bars.items():
+        if tf in ENGINE_TIMEFRAMES:
+            continue
+        start = candles.time[tail - 1] // bars.minutes * bars.minutes
+        first = int(np.searchsorted(candles.time, start))
+        for block in iter_candle_blocks(candles.slice(first, tail)):
+            for row in block:
+                bars.update(Candle(*row))
+
+
+def warm_up(engine: PairEngine, candles: CandleArrays) -> None:
+    """
+    Bring a freshly built `engine` to the state it would reach by calling
+    `on_candle_1m` on every row of `candles`, without publishing anything.
+    """
+    if not len(candles):
+        return
+    m5, m4 = TIMEFRAME_MINUTES["5m"], TIMEFRAME_MINUTES["4h"]
+
+    starts_5m = _bucket_starts(candles.time, m5)
+    starts_4h = _bucket_starts(candles.time, m4)
+    candles_5m = _bars(candles, starts_5m, m5)
+    candles_4h = _bars(candles, starts_4h, m4)
+
+    # 5M candles of each 4H candle; every 4H bucket starts a 5M bucket
+    groups = np.r_[np.searchsorted(starts_5m, starts_4h), len(starts_5m)]
+    # 4H candles whose last minute is in the history: closed right there,
+    # before any row of the next one (the last one may still be forming)
+    ends = np.r_[starts_4h[1:], len(candles)] - 1
+    on_time = candles.time[ends] % m4 == m4 - 1
+    closed = len(candles_4h) if on_time[-1] else len(candles_4h) - 1
+
+    publish = engine.publish
+    engine.publish = lambda channel, message: None
+    try:
+        with quiet():
+            # dry run on a copy to find where the current leg's 5M work starts
+            probe = PairEngine(copy.deepcopy(engine.state), engine.publish)
+            last_idle = _fast_forward(probe, candles_5m, candles_4h[:closed], groups, on_time)
+
+            tail = 0
+            if last_idle is not None:
+                _fast_forward(engine, candles_5m, candles_4h[:last_idle + 1], groups, on_time)
+                tail = ends[last_idle] + 1
+                _prefill_chart_bars(engine, candles, tail)
+
+            for block in iter_candle_blocks(candles, tail):
+                for t, o, h, l, c in block:
+                    engine.on_candle_1m(t, o, h, l, c)
+    finally:
+        engine.publish = publish
@@ -2,7 +2,7 @@ import pandas as pd
 from typing import Dict, Optional
 
 from engine_2.poi_detection_30m import detect_pois_from_swing
-from engine.mins_choch import process_structure_and_return_last_swing
+from engine.mins_choch import StreamingSwingTracker
 from engine.plan_trade_5mins import plan_trade_from_choch_leg
 
 
@@ -183,13 +183,11 @@ def engine_30m_beast_realtime(
         ]
 
         opp_trend = "BEARISH" if trend == "BULLISH" else "BULLISH"
+        swing_tracker = StreamingSwingTracker(opp_trend)
 
         for t5, c5 in m5_live.iterrows():
 
-            protected_5m = process_structure_and_return_last_swing(
-                df=m5_live.loc[:t5],
-                trend=opp_trend,
-            )
+            protected_5m = swing_tracker.update(c5.open, c5.high, c5.low, c5.close)
 
             if protected_5m is None:
                 continue
@@ -7,7 +7,6 @@ Single entry point for the trading agent system.
 import os
 import sys
 from pathlib import Path
-from datetime import datetime
 
 # ==================================================
 # THIRD-PARTY IMPORTS
@@ -24,9 +23,9 @@ sys.path.insert(0, str(BASE_DIR))
 # ==================================================
 # INTERNAL ENGINE IMPORTS
 # ==================================================
-from engine.resample import resample_to_4h , resample_to_5m
+from engine.candle_store import load_or_convert
+from engine.resample import resample_multi
 from engine.trend_seed import detect_seed
-from engine_2.resample import resample_to_30m  
 from engine_2.structure_mapping_30m import market_structure_mapping_30m
 from engine.swings_detect import market_structure_mapping
 
@@ -47,37 +46,12 @@ def main():
     print("=" * 60)
 
     # --------------------------------------------------
-    # STEP 1: LOAD 1-MIN DATA (INLINE, NO LOADER)
+    # STEP 1: LOAD 1-MIN DATA (COLUMNAR STORE, CSV ONLY ON FIRST RUN)
     # --------------------------------------------------
     print("\n[Step 1] Loading 1-minute data...")
 
-    rows = []
     try:
-        with open(MINUTE_CSV_PATH, "r", encoding="utf-8") as file:
-            for line in file:
-                parts = line.strip().split(",")
-                if len(parts) < 6:
-                    continue
-
-                try:
-                    date_str, time_str, o, h, l, c = parts[:6]
-                    t = datetime.strptime(
-                        date_str + " " + time_str,
-                        "%Y.%m.%d %H:%M"
-                    )
-                    rows.append({
-                        "time": t,
-                        "open": float(o),
-                        "high": float(h),
-                        "low": float(l),
-                        "close": float(c),
-                    })
-                except ValueError:
-                    continue
-
-        df_1m = pd.DataFrame(rows)
-        df_1m.set_index("time", inplace=True)
-        df_1m.sort_index(inplace=True)
+        candles = load_or_convert(MINUTE_CSV_PATH)
         # --------------------------------------------------
         # FILTER: LAST 3 MONTHS ONLY
         # --------------------------------------------------
@@ -91,22 +65,23 @@ def main():
         # print(f"1M range : {df_1m.index.min()} → {df_1m.index.max()}")
         # print(f"Remaining candles: {len(df_1m)}")
 
-        print(f"✅ Loaded {len(df_1m)} minute candles")
+        print(f"✅ Loaded {len(candles)} minute candles")
 
     except Exception as e:
         print(f"❌ Error loading minute data: {e}")
         return
 
     # --------------------------------------------------
-    # STEP 2: RESAMPLE TO 4-HOUR (IN MEMORY)
+    # STEP 2: RESAMPLE TO ALL TIMEFRAMES (ONE PASS)
     # --------------------------------------------------
-    print("\n[Step 2] Resampling to 4-hour candles...")
+    print("\n[Step 2] Resampling to 5M / 30M / 4H candles...")
     try:
-        df_4h = resample_to_4h(df_1m)
+        tfs = resample_multi(candles, ("5m", "30m", "4h"))
+        df_4h = tfs.frames["4h"]
         print(f"✅ Resampled to {len(df_4h)} 4-hour candles")
-        df_5m = resample_to_5m(df_1m)
+        df_5m = tfs.frames["5m"]
         print(f"✅ Resampled to {len(df_5m)} 5-minute candles")
-        df_30m = resample_to_30m(df_1m)
+        df_30m = tfs.frames["30m"]
         print(f"✅ Resampled to {len(df_30m)} 30-minute candles")
     except Exception as e:
         print(f"❌ Error during resampling: {e}")
@@ -0,0 +1,165 @@
+"""
+In-process cache of recent candles for /api/candles.
+
+Each (symbol, tf) entry holds the latest closed candles in a fixed-size
+`CandleRing` (NumPy columns). It is loaded from the database on a miss.
+After that the realtime engine's closed bars are appended as they are
+published, so a chart reload is served from memory. The formatted rows
+are built once and reused until the next bar closes, so a hit is a list
+slice. Entries expire `ttl`
+seconds after their last load or append, when nothing has kept them
+current. The least recently used entry is evicted past `max_entries`.
+
+Rows come back as the database returns them: oldest first,
+{"timestamp", "open", "high", "low", "close"}, with ISO timestamps.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.engine.candle_store import Candle
+from backend.engine1.ring_buffer import CandleRing
+
+# /api/candles serves at most this many rows
+CACHE_CAPACITY = 5000
+CACHE_TTL_SECONDS = 60.0
+CACHE_MAX_ENTRIES = 32
+
+
+class _Entry:
+    def __init__(self, capacity: int, tz: Optional[timezone], complete: bool):
+        self.ring = CandleRing(capacity)
+        # database timestamps are tz-aware: stored as UTC, sent back with it
+        self.tz = tz
+        # the database had no older rows than the ones loaded
+        self.complete = complete
+        self.updated = time.monotonic()
+        # every candle held, formatted; rebuilt after a bar is appended
+        self.rows: Optional[List[dict]] = None
+
+    def formatted(self) -> List[dict]:
+        if self.rows is None:
+            self.rows = _rows(self.ring.tail(len(self.ring)), self.tz)
+        return self.rows
+
+
+class CandleCache:
+    def __init__(
+        self,
+        capacity: int = CACHE_CAPACITY,
+        ttl: float = CACHE_TTL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        # API threads read / load, the engine thread appends
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # ==================================================
+    # READ
+    # ==================================================
+    def get(self, symbol: str, tf: str, limit: int) -> Optional[List[dict]]:
+        """
+        The last `limit` candles, or None when they have to come from the
+        database (no entry, expired, or fewer rows cached than asked for).
+        """
+        key = (symbol, tf)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.updated > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            if len(entry.ring) < min(limit, self.capacity) and not entry.complete:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.formatted()[-limit:]
+
+    # ==================================================
+    # WRITE
+    # ==================================================
+    def load(self, symbol: str, tf: str, rows: List[dict], complete: bool) -> List[dict]:
+        """
+        Replace the entry with `rows` from the database (oldest first);
+        `complete` when the database has nothing older. Returns the rows
+        as `get` serves them.
+        """
+        parsed = [_parse_time(row["timestamp"]) for row in rows]
+        tz = next((t.tzinfo for t in parsed if t.tzinfo is not None), None)
+        tz = timezone.utc if tz is not None else None
+
+        entry = _Entry(self.capacity, tz, complete)
+        for row, t in zip(rows, parsed):
+            if t.tzinfo is not None:
+                t = t.astimezone(timezone.utc).replace(tzinfo=None)
+            entry.ring.append(Candle(t, float(row["open"]), float(row["high"]), float(row["low"]), float(row["close"])))
+
+        with self._lock:
+            self._entries[(symbol, tf)] = entry
+            self._entries.move_to_end((symbol, tf))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry.formatted()[-len(rows):] if rows else []
+
+    def on_candle(self, message: dict) -> None:
+        """
+        Append a closed candle the engine published ("candle" channel) to
+        its entry, if there is one; older candles than the entry's last
+        are ignored.
+        """
+        if message.get("type") != "candle":
+            return
+        # inverse of pair_engine.candle_message
+        t = datetime.fromtimestamp(message["timestamp"] / 1000)
+
+        with self._lock:
+            entry = self._entries.get((message["symbol"], message["tf"]))
+            if entry is None:
+                return
+            ring = entry.ring
+            if len(ring) and t <= ring[-1].time:
+                return
+            # the feed's clock is taken as UTC next to database rows
+            ring.append(Candle(t, message["open"], message["high"], message["low"], message["close"]))
+            entry.updated = time.monotonic()
+            entry.rows = None
+
+    def invalidate(self, symbol: Optional[str] = None, tf: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if symbol in (None, k[0]) and tf in (None, k[1])]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def _parse_time(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _rows(columns: Tuple[np.ndarray, ...], tz: Optional[timezone]) -> List[dict]:
+    times, o, h, l, c = columns
+    stamps = np.datetime_as_string(times, unit="s").tolist()
+    if tz is not None:
+        stamps = [s + "+00:00" for s in stamps]
+    return [
+        {"timestamp": t, "open": op, "high": hi, "low": lo, "close": cl}
+        for t, op, hi, lo, cl in zip(stamps, o.tolist(), h.tolist(), l.tolist(), c.tolist())
+    ]
+
+
+candle_cache = CandleCache()
@@ -1,4 +1,5 @@
 from db.supabase_client import supabase
+from candles.cache import candle_cache
 
 # 🔹 Map timeframe → table name
 TF_TABLE_MAP = {
@@ -13,6 +14,11 @@ def fetch_candles(symbol: str, tf: str, limit: int):
     if tf not in TF_TABLE_MAP:
         raise ValueError("Unsupported timeframe")
 
+    # 🔹 Served from memory while the engine keeps the tail current
+    cached = candle_cache.get(symbol, tf, limit)
+    if cached is not None:
+        return cached
+
     table = TF_TABLE_MAP[tf]
 
     res = (
@@ -28,4 +34,4 @@ def fetch_candles(symbol: str, tf: str, limit: int):
     # Supabase returns newest first → reverse for chart
     data = list(reversed(res.data))
 
-    return data
+    return candle_cache.load(symbol, tf, data, complete=len(data) < limit)
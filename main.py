@@ -40,7 +40,7 @@ app.include_router(event_router)
 @app.on_event("startup")
 async def startup():
     # give FastAPI event loop to run1 module
-    run1.event_loop = asyncio.get_running_loop()
+    run1.set_event_loop(asyncio.get_running_loop())
 
 @app.on_event("startup")
 async def start_engine():
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# repo root, so `backend.*` imports resolve however pytest is started
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
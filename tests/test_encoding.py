@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from ws.encoding import BINARY, encode, pack_candles, unpack_candles
+
+
+def candle(symbol, tf):
+    return {"type": "candle", "symbol": symbol, "tf": tf, "timestamp": 1643083200000,
+            "open": 1.1, "high": 1.2, "low": 1.0, "close": 1.15}
+
+
+def test_binary_round_trip():
+    messages = [candle("EURUSD", "4h"), {**candle("EURUSD", "4h"), "type": "candle_update"}]
+    frame = encode(messages, BINARY)
+    assert isinstance(frame, bytes)
+    assert unpack_candles(frame)[1] == messages
+
+
+@pytest.mark.parametrize("symbol, tf", [("XAUUSD.PRO", "4h"), ("EURUSD", "12345"), ("ÉURUSD", "4h")])
+def test_streams_that_do_not_fit_the_header_go_as_json(symbol, tf):
+    messages = [candle(symbol, tf)]
+    frame = encode(messages, BINARY)
+    assert json.loads(frame) == messages
+
+    with pytest.raises(ValueError, match="does not fit"):
+        pack_candles(messages)
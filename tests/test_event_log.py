@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.engine1.event_log import EventLog
+
+T0 = datetime(2022, 1, 3)
+
+
+def minute(i: int) -> datetime:
+    return T0 + timedelta(minutes=i)
+
+
+@pytest.fixture
+def logs(tmp_path):
+    # writer (engine process) and reader (server process) of one log
+    writer = EventLog("EURUSD", tmp_path, segment_events=10)
+    for i in range(35):
+        writer.append(minute(i), {"i": i})
+    reader = EventLog("EURUSD", tmp_path, segment_events=10)
+    yield writer, reader
+    writer.close()
+
+
+def expected(n: int):
+    return [(minute(i), {"i": i}) for i in range(n)]
+
+
+@pytest.mark.parametrize("cut", [33, 30, 12, 0])
+def test_refresh_after_truncate_elsewhere(logs, cut):
+    writer, reader = logs
+    assert list(reader.query()) == expected(35)
+
+    # within the reader's last segment, at its start, an earlier one, all
+    writer.truncate_from(minute(cut))
+    reader.refresh()
+    assert list(reader.query()) == expected(cut)
+    assert len(reader) == cut
+    assert reader.last_time == (minute(cut - 1) if cut else None)
+
+    for i in range(cut, cut + 3):
+        writer.append(minute(i), {"i": i})
+    reader.refresh()
+    assert list(reader.query()) == expected(cut + 3)
+
+
+@pytest.mark.parametrize("cut", [33, 12])
+def test_query_after_truncate_elsewhere(logs, cut):
+    writer, reader = logs
+    writer.truncate_from(minute(cut))
+    assert list(reader.query()) == expected(cut)
+    assert list(reader.query(minute(5), minute(20))) == expected(cut)[5:21]
+
+
+@pytest.mark.parametrize("cut", [33, 30, 12, 0])
+def test_refresh_after_truncate_and_regrow_elsewhere(logs, cut):
+    writer, reader = logs
+    assert len(reader) == 35
+
+    # cut back, then appended past the reader's old position with other lines
+    writer.truncate_from(minute(cut))
+    rerun = [(minute(i), {"i": i, "rerun": True}) for i in range(cut, 40)]
+    for t, message in rerun:
+        writer.append(t, message)
+
+    reader.refresh()
+    assert list(reader.query()) == expected(cut) + rerun
+    assert len(reader) == 40
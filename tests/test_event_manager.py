@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from ws.client_queue import CLOSE
+from ws.event_manager import ALL, EventManager, topic_of
+
+
+class FakeSocket:
+    """
+    A browser that reads nothing until `release` is set.
+    """
+
+    def __init__(self, released: bool = True):
+        self.release = asyncio.Event()
+        if released:
+            self.release.set()
+        self.frames = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await self.release.wait()
+        self.frames.append(frame)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+def event(symbol, timeframe, type_, i=0):
+    return {"symbol": symbol, "timeframe": timeframe, "events": [{"id": i, "type": type_}]}
+
+
+def received(ws):
+    return [m for frame in ws.frames for m in json.loads(frame)]
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_connect_subscribe_disconnect():
+    async def run():
+        manager = EventManager()
+        a, b = FakeSocket(), FakeSocket()
+        await manager.connect(a)
+        await manager.connect(b)
+        manager.subscribe(b, topic_of("EURUSD", "4h", "BOS"))
+
+        bos, choch = event("EURUSD", "4h", "BOS"), event("EURUSD", "4h", "CHOCH")
+        await manager.send_batch([bos, choch])
+        await settle()
+        assert received(a) == [bos, choch]
+        assert received(b) == [bos]
+
+        client = manager.clients[b]
+        manager.disconnect(b)
+        manager.disconnect(a)
+        assert manager.clients == {}
+        assert manager.subscribers == {}
+        assert not manager._default
+        assert client._task is None
+
+    asyncio.run(run())
+
+
+def test_unsubscribe_drops_the_default_subscription():
+    async def run():
+        manager = EventManager()
+        ws = FakeSocket()
+        await manager.connect(ws)
+        manager.unsubscribe(ws, topic_of("EURUSD"))
+        assert manager.clients[ws].topics == set()
+        assert ALL not in manager.subscribers
+
+        manager.subscribe(ws, topic_of("GBPUSD"))
+        await manager.send_batch([event("EURUSD", "4h", "BOS"), event("GBPUSD", "4h", "BOS", 1)])
+        await settle()
+        assert received(ws) == [event("GBPUSD", "4h", "BOS", 1)]
+        manager.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_slow_client_is_closed_without_starving_the_others():
+    async def run():
+        manager = EventManager(max_queue=2, policy=CLOSE)
+        slow, fast = FakeSocket(released=False), FakeSocket()
+        await manager.connect(slow)
+        await manager.connect(fast)
+
+        sent = [event("EURUSD", "4h", "BOS", i) for i in range(5)]
+        for message in sent:
+            await manager.send_batch([message])
+            await settle()
+
+        assert slow not in manager.clients
+        assert slow.closed == 1013
+        assert list(manager.subscribers[ALL]) == [manager.clients[fast]]
+        assert received(fast) == sent
+        manager.disconnect(fast)
+
+    asyncio.run(run())
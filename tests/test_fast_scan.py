@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from backend.engine import fast_scan
+from backend.engine.fast_scan import TAP_HIGH, TAP_LOW, next_trigger, poi_tap
+
+# 5M closes stay inside the swing range; one candle dips / spikes to the LIQ
+HIGH = np.array([1.105, 1.106, 1.107, 1.112, 1.106, 1.105])
+LOW = np.array([1.100, 1.099, 1.090, 1.101, 1.100, 1.099])
+CLOSE = np.array([1.103, 1.104, 1.104, 1.104, 1.103, 1.102])
+SWING_LOW, SWING_HIGH = 1.08, 1.12
+
+LIQ_POIS = [
+    # bullish LIQ: tapped from above, price_high unset → low <= 1.095 at 2
+    ("BULLISH", {"type": "LIQ", "price_low": 1.095, "price_high": None}, TAP_LOW, 2),
+    # bearish LIQ: tapped from below, price_low unset → high >= 1.110 at 3
+    ("BEARISH", {"type": "LIQ", "price_low": None, "price_high": 1.110}, TAP_HIGH, 3),
+]
+
+BACKENDS = ["fallback", "jit-source"]
+if fast_scan.njit is not None:
+    BACKENDS.append("numba")
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    if request.param == "fallback":
+        monkeypatch.setattr(fast_scan, "_next_trigger_jit", None)
+    elif request.param == "jit-source":
+        # the function numba compiles, called the way the JIT is
+        monkeypatch.setattr(fast_scan, "_next_trigger_jit", fast_scan._next_trigger_py)
+    return request.param
+
+
+@pytest.mark.parametrize("trend, poi, kind, expected", LIQ_POIS)
+def test_liq_poi_scans_on_every_backend(backend, trend, poi, kind, expected):
+    tap_kind, tap_low, tap_high = poi_tap(poi, trend)
+
+    assert tap_kind == kind
+    assert isinstance(tap_low, float) and isinstance(tap_high, float)
+    assert next_trigger(HIGH, LOW, CLOSE, 0, SWING_LOW, SWING_HIGH, tap_kind, tap_low, tap_high) == expected
+
+
+def test_no_poi_scans_to_the_end(backend):
+    tap_kind, tap_low, tap_high = poi_tap(None, "BULLISH")
+    assert next_trigger(HIGH, LOW, CLOSE, 0, SWING_LOW, SWING_HIGH, tap_kind, tap_low, tap_high) == len(CLOSE)
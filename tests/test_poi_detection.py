@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.engine.candle_store import Candle
+from backend.engine.poi_detection import StreamingPOIDetector, _detect_pois_loop, detect_pois_from_swing
+
+TRENDS = ("BULLISH", "BEARISH")
+
+
+def random_leg(rng: np.random.Generator, n: int, trend: str) -> pd.DataFrame:
+    """
+    A 4H leg drifting with `trend`, with the odd displacement burst so
+    that order blocks and liquidity both show up.
+    """
+    drift = 0.0004 if trend == "BULLISH" else -0.0004
+    steps = rng.normal(drift, 0.001, n)
+    bursts = rng.random(n) < 0.08
+    steps[bursts] += np.sign(drift) * rng.uniform(0.003, 0.008, bursts.sum())
+
+    close = 1.1 + np.cumsum(steps)
+    open_ = np.concatenate(([1.1], close[:-1]))
+    wick = rng.uniform(0, 0.0008, (2, n))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + wick[0],
+            "low": np.minimum(open_, close) - wick[1],
+            "close": close,
+        },
+        index=pd.date_range("2022-01-03", periods=n, freq="4h"),
+    )
+
+
+def flat_leg(n: int) -> pd.DataFrame:
+    # doji candles only: no direction, no displacement, no pullback
+    return pd.DataFrame(
+        {"open": 1.1, "high": 1.1005, "low": 1.0995, "close": 1.1},
+        index=pd.date_range("2022-01-03", periods=n, freq="4h"),
+    )
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+@pytest.mark.parametrize("seed", range(20))
+def test_vectorized_matches_loop(seed, trend):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(10, 120))
+    df = random_leg(rng, n, trend)
+
+    for ob_multiplier in (1.2, 1.8):
+        for k in (1, 2, 3):
+            assert detect_pois_from_swing(df, trend, ob_multiplier, k) == _detect_pois_loop(
+                df, trend, ob_multiplier, k
+            )
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+def test_random_legs_find_both_kinds(trend):
+    # the equivalence above is not vacuous
+    kinds = set()
+    for seed in range(20):
+        rng = np.random.default_rng(seed)
+        df = random_leg(rng, int(rng.integers(10, 120)), trend)
+        kinds.update(p["type"] for p in detect_pois_from_swing(df, trend, 1.2, 2))
+    assert kinds == {"OB", "LIQ"}
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+@pytest.mark.parametrize("n", [0, 1, 3, 5, 9, 10, 11, 13])
+def test_short_legs(n, trend):
+    rng = np.random.default_rng(n)
+    df = random_leg(rng, n, trend)
+    for k in (1, 2, 3):
+        assert detect_pois_from_swing(df, trend, 1.2, k) == _detect_pois_loop(df, trend, 1.2, k)
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+@pytest.mark.parametrize("n", [5, 12, 40])
+def test_no_qualifying_candles(n, trend):
+    df = flat_leg(n)
+    assert detect_pois_from_swing(df, trend) == _detect_pois_loop(df, trend) == []
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+@pytest.mark.parametrize("seed", range(6))
+def test_streaming_matches_batch_on_every_prefix(seed, trend):
+    rng = np.random.default_rng(seed)
+    k = 1 + seed % 3
+    other = "BEARISH" if trend == "BULLISH" else "BULLISH"
+    detector = StreamingPOIDetector(other, 1.2, k)
+
+    # one detector, reset between legs: a leg of the other trend first
+    for leg_trend in (other, trend):
+        df = random_leg(rng, int(rng.integers(40, 100)), leg_trend)
+        detector.reset(leg_trend)
+        for m, row in enumerate(df.itertuples(), 1):
+            detector.update(Candle(row.Index, row.open, row.high, row.low, row.close))
+            assert detector.pois() == detect_pois_from_swing(df.iloc[:m], leg_trend, 1.2, k), m
+        assert len(detector) == len(df)
+
+
+@pytest.mark.parametrize("trend", TRENDS)
+def test_streaming_no_qualifying_candles(trend):
+    detector = StreamingPOIDetector(trend)
+    for row in flat_leg(30).itertuples():
+        detector.update(Candle(row.Index, row.open, row.high, row.low, row.close))
+        assert detector.pois() == []
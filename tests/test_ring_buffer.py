@@ -0,0 +1,45 @@
+import pickle
+from datetime import datetime, timedelta
+
+from backend.engine.candle_store import Candle
+from backend.engine1.ring_buffer import CandleRing
+
+
+def candles(n: int, start: int = 0):
+    t0 = datetime(2022, 1, 3)
+    return [Candle(t0 + timedelta(minutes=5 * i), 1.0, 1.0 + i, 1.0 - i, 1.0) for i in range(start, start + n)]
+
+
+def test_overflow_is_counted_and_logged_once_per_clear(capsys):
+    ring = CandleRing(4, "4H leg buffer")
+    ring.extend(candles(4))
+    assert ring.dropped == 0 and capsys.readouterr().out == ""
+
+    ring.extend(candles(3, 4))
+    assert ring.dropped == 3
+    assert len(ring) == 4 and ring[0] == candles(1, 3)[0]
+    assert capsys.readouterr().out.count("4H leg buffer full") == 1
+
+    ring.clear()
+    ring.extend(candles(5))
+    assert ring.dropped == 4
+    assert capsys.readouterr().out.count("4H leg buffer full") == 1
+
+
+def test_unnamed_ring_drops_quietly(capsys):
+    ring = CandleRing(2)
+    ring.extend(candles(5))
+    assert ring.dropped == 3
+    assert capsys.readouterr().out == ""
+
+
+def test_overflow_survives_pickling(capsys):
+    ring = CandleRing(3, "5M POI buffer")
+    ring.extend(candles(5))
+    restored = pickle.loads(pickle.dumps(ring))
+
+    assert restored == ring
+    assert (restored.name, restored.dropped) == ("5M POI buffer", 2)
+    capsys.readouterr()
+    restored.append(candles(1, 5)[0])
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.engine.candle_store import CandleArrays, datetime_to_minutes
+from backend.engine1.candle_stream import CandleSource
+from backend.engine1.registry import StateRegistry
+from backend.engine1.scheduler import PairConfig, build_engine
+from backend.engine1.warmup import Warmup
+
+
+class FlatWarmup(Warmup):
+    """
+    Three days of one unchanging price: no 4H break to seed from.
+    """
+
+    def __init__(self):
+        super().__init__(csv_path=None, until=datetime(2022, 1, 6))
+
+    def load(self) -> CandleArrays:
+        start = datetime_to_minutes(datetime(2022, 1, 3))
+        time = np.arange(start, start + 3 * 24 * 60, dtype=np.int64)
+        price = np.full(len(time), 1.1)
+        return CandleArrays("EURUSD", 2022, time, price, price + 0.0001, price - 0.0001, price)
+
+
+def config(seed):
+    return PairConfig(symbol="EURUSD", source=CandleSource(), seed=seed, warmup=FlatWarmup())
+
+
+def test_no_break_falls_back_to_configured_seed():
+    seed = {"trend_4h": "BEARISH", "swing_high": 1.2, "bos_time_4h": datetime(2022, 1, 2)}
+    engine, _ = build_engine(config(seed), StateRegistry(), lambda channel, message: None)
+
+    assert engine.state.trend_4h == "BEARISH"
+    assert engine.state.swing_high == 1.2
+
+
+def test_no_break_without_trend_names_the_symbol():
+    with pytest.raises(ValueError, match="EURUSD"):
+        build_engine(config({"pullback_pct": 0.02}), StateRegistry(), lambda channel, message: None)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from backend.engine1.candle_stream import CandleSource
+from backend.engine1.pair_engine import PairEngine
+from backend.engine1.registry import StateRegistry
+from backend.engine1.scheduler import PairConfig, build_engine
+from backend.engine1.snapshot import SnapshotPolicy, save_snapshot
+from backend.engine1.state import PairState
+
+
+def feed(engine: PairEngine, minutes: int) -> datetime:
+    t = datetime(2022, 1, 3)
+    for i in range(minutes):
+        t = datetime(2022, 1, 3) + timedelta(minutes=i)
+        price = 1.1 + (i % 37) / 10_000
+        engine.on_candle_1m(t, price, price + 0.0002, price - 0.0002, price)
+    return t
+
+
+def test_restore_follows_configured_chart_timeframes(tmp_path):
+    state = PairState(symbol="EURUSD", trend_4h="BULLISH", swing_low=1.0, bos_time_4h=datetime(2022, 1, 2))
+    engine = PairEngine(state, lambda channel, message: None, ("30m", "1d"))
+    last = feed(engine, 600)
+    save_snapshot(engine, last, tmp_path)
+    forming_1d = engine.bars.bars["1d"].current
+
+    config = PairConfig(symbol="EURUSD", source=CandleSource(), chart_timeframes=("1h", "1d"))
+    restored, _ = build_engine(config, StateRegistry(), lambda channel, message: None, SnapshotPolicy(tmp_path))
+
+    assert list(restored.bars.bars) == ["5m", "4h", "1h", "1d"]
+    # kept: the forming bar carries on
+    assert restored.bars.bars["1d"].current == forming_1d
+    assert restored.bars.bars["4h"].current == engine.bars.bars["4h"].current
+    # added: starts with the next candle
+    assert restored.bars.bars["1h"].current is None
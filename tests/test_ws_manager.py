@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+from ws.manager import WSManager
+
+
+class SlowSocket:
+    """
+    A browser that reads nothing until `release` is set.
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        await self.release.wait()
+        self.frames.append(frame)
+
+    async def close(self, code=1000):
+        pass
+
+
+def update(tf, timestamp, **fields):
+    return {"type": "candle_update", "symbol": "EURUSD", "tf": tf, "timestamp": timestamp, **fields}
+
+
+def replay(frames):
+    # what a chart holds after applying `frames`: timestamp → merged bar
+    bars = {}
+    for frame in frames:
+        for message in json.loads(frame):
+            bars.setdefault(message["timestamp"], {}).update(message)
+    return bars
+
+
+def test_dropped_updates_are_made_good_by_a_snapshot():
+    async def run():
+        manager = WSManager(max_queue=4)
+        ws = SlowSocket()
+        await manager.connect(ws)
+        manager.subscribe(ws, "EURUSD", "4h")
+
+        await manager.send_batch([update("4h", 0, open=1.0, high=1.2, low=0.9, close=1.1)])
+        # a high the slow client will never see as a delta
+        await manager.send_batch([update("4h", 0, high=1.5)])
+        for i in range(6):
+            await manager.send_batch([update("4h", 0, close=1.1 + i / 100)])
+
+        client = manager.clients[ws]
+        assert client.dropped > 0
+        ws.release.set()
+        while len(client):
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert replay(ws.frames)[0] == manager.forming[("EURUSD", "4h")]
+        assert replay(ws.frames)[0]["high"] == 1.5
+        stats = manager.stats()
+        assert (stats["queued"], stats["max_depth"]) == (0, 4)
+        manager.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_other_streams_are_not_resent():
+    async def run():
+        manager = WSManager(max_queue=2)
+        ws = SlowSocket()
+        await manager.connect(ws)
+        manager.subscribe(ws, "EURUSD", "4h")
+
+        # 1h has a forming bar but this client never subscribed to it
+        await manager.send_batch([update("1h", 0, open=1.0, high=1.0, low=1.0, close=1.0)])
+        for i in range(4):
+            await manager.send_batch([update("4h", 0, open=1.0, high=1.0, low=1.0, close=1.0 + i)])
+
+        ws.release.set()
+        client = manager.clients[ws]
+        while len(client):
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert {m["tf"] for f in ws.frames for m in json.loads(f)} == {"4h"}
+        assert replay(ws.frames)[0]["close"] == 4.0
+        manager.disconnect(ws)
+
+    asyncio.run(run())
+
+
+def test_messages_are_routed_by_normalized_stream():
+    async def run():
+        manager = WSManager()
+        ws = SlowSocket()
+        ws.release.set()
+        await manager.connect(ws)
+        manager.subscribe(ws, "eurusd", "4H")
+
+        message = {**update("4H", 0, open=1.0, high=1.0, low=1.0, close=1.0), "symbol": "eurusd"}
+        await manager.send_batch([message])
+        await asyncio.sleep(0)
+
+        assert [json.loads(f) for f in ws.frames] == [[message]]
+        assert ("EURUSD", "4h") in manager.forming
+        manager.disconnect(ws)
+
+    asyncio.run(run())
@@ -5,20 +5,42 @@ import json
 
 router = APIRouter()
 
+
+def _streams(request: dict) -> list:
+    # { symbol, tf } or { streams: [{ symbol, tf }, ...] }
+    streams = request.get("streams", [request])
+    return [(s["symbol"], s["tf"]) for s in streams if s.get("symbol") and s.get("tf")]
+
+
 @router.websocket("/ws/candles")
 async def ws_stream(ws: WebSocket):
-    await ws_manager.connect(ws)
+    # ?encoding=binary → packed candle frames (see ws/encoding.py)
+    await ws_manager.connect(ws, ws.query_params.get("encoding", "json"))
     print("WS connected")
 
     try:
-        # 1. Wait for init message: { symbol: "EURUSD", tf: "5m" }
-        data = await ws.receive_text()
-        init_data = json.loads(data)
-        print(f"✅ Subscription received: {init_data}")
-        
+        # Client messages (the first one is usually the init message):
+        #   { symbol: "EURUSD", tf: "5m" }                    → subscribe
+        #   { action: "subscribe", streams: [{ symbol, tf }, ...] }
+        #   { action: "unsubscribe", symbol: "EURUSD", tf: "5m" }
+        # Only candles of subscribed streams are sent; anything else
+        # (keep-alive pings) is ignored.
         while True:
-            await ws.receive_text()  # keep connection alive
-    except:
+            data = await ws.receive_text()
+            try:
+                request = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+
+            action = request.get("action", "subscribe")
+            for symbol, tf in _streams(request):
+                if action == "subscribe":
+                    ws_manager.subscribe(ws, symbol, tf)
+                elif action == "unsubscribe":
+                    ws_manager.unsubscribe(ws, symbol, tf)
+            print(f"✅ Subscription {action}: {_streams(request)}")
+    except Exception:
         ws_manager.disconnect(ws)
         print("WS disconnected")
-
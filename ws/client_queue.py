@@ -0,0 +1,156 @@
+# ws/client_queue.py
+"""
+Per-connection outbound queue for the WebSocket managers.
+
+Broadcasting only appends a frame to each client's bounded queue (no
+await), and every connection has its own writer task that sends its
+queue in order. A slow browser therefore only delays itself. When its
+queue is full, the client's policy decides:
+
+    DROP_OLDEST   drop the oldest queued frame (candles). Forming-bar
+                  updates only carry the fields that changed, so the
+                  stream of a dropped frame is marked `stale` and its
+                  manager queues a whole snapshot of the forming bar
+                  behind it. A closed candle dropped stays lost; the
+                  chart reloads it from /api/candles.
+    CLOSE         close the connection (events: the client must not miss
+                  any silently; it reconnects and catches up from
+                  GET /api/events/{symbol})
+"""
+import asyncio
+from collections import deque
+from typing import Callable, Iterable, Optional, Set, Union
+
+from fastapi import WebSocket
+
+from .encoding import JSON
+
+DROP_OLDEST = "drop_oldest"
+CLOSE = "close"
+
+# frames a client may have queued before its policy applies
+MAX_QUEUE = 256
+
+
+class ClientQueue:
+    def __init__(
+        self,
+        ws: WebSocket,
+        on_close: Callable[[WebSocket], None],
+        max_queue: int = MAX_QUEUE,
+        policy: str = DROP_OLDEST,
+        encoding: str = JSON,
+    ):
+        self.ws = ws
+        self.on_close = on_close
+        self.max_queue = max_queue
+        self.policy = policy
+        # frame encoding negotiated on connect (see ws/encoding.py)
+        self.encoding = encoding
+
+        # what this client is subscribed to; kept by its manager
+        self.topics: Set[tuple] = set()
+        # streams whose dropped frames must be made good by a snapshot
+        self.stale: Set[tuple] = set()
+
+        # (stream or None, frame)
+        self._frames: deque = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        # metrics
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+        self._task: Optional[asyncio.Task] = asyncio.get_running_loop().create_task(self._write())
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def offer(self, frame: Union[str, bytes], stream: Optional[tuple] = None) -> None:
+        """
+        Queue `frame` (of `stream`, when it holds one stream's candles)
+        for this client; never waits.
+        """
+        if self._closed:
+            return
+
+        if len(self._frames) >= self.max_queue:
+            if self.policy == CLOSE:
+                print(f"🐢 Closing slow WebSocket client ({len(self._frames)} frames queued)")
+                self.dropped += len(self._frames) + 1
+                self._frames.clear()
+                self._finish(close_socket=True)
+                return
+            dropped, _ = self._frames.popleft()
+            self.dropped += 1
+            if dropped is not None:
+                self.stale.add(dropped)
+
+        self._frames.append((stream, frame))
+        if len(self._frames) > self.max_depth:
+            self.max_depth = len(self._frames)
+        self._ready.set()
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                if not self._frames:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                _, frame = self._frames.popleft()
+                if isinstance(frame, bytes):
+                    await self.ws.send_bytes(frame)
+                else:
+                    await self.ws.send_text(frame)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self._finish(close_socket=False)
+
+    def _finish(self, close_socket: bool) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if close_socket:
+            asyncio.get_running_loop().create_task(self._close_socket())
+        self.on_close(self.ws)
+
+    async def _close_socket(self) -> None:
+        try:
+            await self.ws.close(code=1013)   # try again later
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """
+        Stop the writer; queued frames are discarded.
+        """
+        self._closed = True
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self._frames),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "encoding": self.encoding,
+        }
+
+
+def queue_stats(clients: Iterable[ClientQueue]) -> dict:
+    queues = [c.stats() for c in clients]
+    return {
+        "clients": len(queues),
+        "queued": sum(q["depth"] for q in queues),
+        # high-water mark of any client's queue, as per client
+        "max_depth": max((q["max_depth"] for q in queues), default=0),
+        "dropped": sum(q["dropped"] for q in queues),
+        "per_client": queues,
+    }
@@ -0,0 +1,168 @@
+# ws/encoding.py
+"""
+Wire encodings of the streaming WebSocket frames, picked per connection
+with `?encoding=` when it opens.
+
+    json      text frames, a JSON array of messages (default)
+    binary    /ws/candles only: packed candle frames, below
+    msgpack   /ws/events only: a msgpack array of the same messages as JSON
+              (needs the optional `msgpack` package; JSON without it)
+
+A binary candle frame holds the candles of one (symbol, tf) stream,
+little-endian:
+
+    header  B kind  8s symbol  4s tf  H count                        15 bytes
+
+kind 1, closed candles only:
+
+    record  q timestamp (epoch ms)  d open  d high  d low  d close   40 bytes
+
+kind 2, any mix of closed candles and forming-bar updates (live_bars.py):
+
+    record  B flags  q timestamp  d per flagged field, in order      9-41 bytes
+            flags: 1 open, 2 high, 4 low, 8 close, 16 update (else closed)
+
+symbol / tf are ASCII, NUL-padded. A JSON candle message is ~150 bytes.
+A stream whose symbol / tf does not fit (non-ASCII, or longer than 8 / 4
+bytes) is sent as JSON text frames instead, even to binary connections.
+"""
+import json
+import struct
+from typing import List, Tuple
+
+from backend.engine1.live_bars import CANDLE_UPDATE
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional
+    msgpack = None
+
+JSON = "json"
+BINARY = "binary"
+MSGPACK = "msgpack"
+
+CANDLE_ENCODINGS = (JSON, BINARY)
+EVENT_ENCODINGS = (JSON, MSGPACK)
+
+KIND_CANDLES = 1
+KIND_MIXED = 2
+
+CANDLE_HEADER = struct.Struct("<B8s4sH")
+CANDLE_RECORD = struct.Struct("<q4d")
+MIXED_RECORD = struct.Struct("<Bq")
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+FLAG_UPDATE = 16
+
+
+def negotiate(requested, supported) -> str:
+    """
+    The encoding a connection gets: `requested` when this server can send
+    it on that endpoint, JSON otherwise.
+    """
+    requested = (requested or JSON).lower()
+    if requested not in supported or (requested == MSGPACK and msgpack is None):
+        return JSON
+    return requested
+
+
+def encode(messages: List[dict], encoding: str):
+    """
+    One frame of `messages`: str for JSON, bytes otherwise. Binary
+    candles must all be of one stream; a stream that cannot be packed
+    gets a JSON frame instead.
+    """
+    if encoding == BINARY and packable(messages[0]):
+        return pack_candles(messages)
+    if encoding == MSGPACK:
+        return msgpack.packb(messages)
+    return json.dumps(messages)
+
+
+# ==================================================
+# PACKED CANDLES
+# ==================================================
+def _field(value: str, size: int):
+    # header bytes of a symbol / tf, None when it does not fit
+    try:
+        raw = value.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    return raw if len(raw) <= size else None
+
+
+def packable(message: dict) -> bool:
+    """
+    Whether the stream of candle `message` fits a packed frame header.
+    """
+    return _field(message["symbol"], 8) is not None and _field(message["tf"], 4) is not None
+
+
+def pack_candles(messages: List[dict]) -> bytes:
+    first = messages[0]
+    symbol, tf = _field(first["symbol"], 8), _field(first["tf"], 4)
+    if symbol is None or tf is None:
+        # struct would silently cut it to the field size
+        raise ValueError(f"stream {first['symbol']}:{first['tf']} does not fit a packed candle header")
+
+    mixed = any(m["type"] == CANDLE_UPDATE for m in messages)
+    header = CANDLE_HEADER.pack(KIND_MIXED if mixed else KIND_CANDLES, symbol, tf, len(messages))
+    if not mixed:
+        pack = CANDLE_RECORD.pack
+        return header + b"".join(
+            pack(m["timestamp"], m["open"], m["high"], m["low"], m["close"]) for m in messages
+        )
+
+    records = [header]
+    for m in messages:
+        flags = FLAG_UPDATE if m["type"] == CANDLE_UPDATE else 0
+        prices = []
+        for bit, name in enumerate(PRICE_FIELDS):
+            if name in m:
+                flags |= 1 << bit
+                prices.append(m[name])
+        records.append(MIXED_RECORD.pack(flags, m["timestamp"]))
+        records.append(struct.pack(f"<{len(prices)}d", *prices))
+    return b"".join(records)
+
+
+def unpack_candles(frame: bytes) -> Tuple[int, List[dict]]:
+    """
+    (kind, candle messages) of a packed frame, the messages as they are
+    sent in JSON.
+    """
+    kind, symbol, tf, count = CANDLE_HEADER.unpack_from(frame)
+    symbol = symbol.rstrip(b"\0").decode("ascii")
+    tf = tf.rstrip(b"\0").decode("ascii")
+
+    messages = []
+    pos = CANDLE_HEADER.size
+    if kind == KIND_CANDLES:
+        for t, o, h, l, c in CANDLE_RECORD.iter_unpack(frame[pos:pos + count * CANDLE_RECORD.size]):
+            messages.append({
+                "type": "candle",
+                "symbol": symbol,
+                "tf": tf,
+                "timestamp": t,
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+            })
+        return kind, messages
+
+    for _ in range(count):
+        flags, t = MIXED_RECORD.unpack_from(frame, pos)
+        pos += MIXED_RECORD.size
+        message = {
+            "type": CANDLE_UPDATE if flags & FLAG_UPDATE else "candle",
+            "symbol": symbol,
+            "tf": tf,
+            "timestamp": t,
+        }
+        for bit, name in enumerate(PRICE_FIELDS):
+            if flags & (1 << bit):
+                message[name], = struct.unpack_from("<d", frame, pos)
+                pos += 8
+        messages.append(message)
+    return kind, messages
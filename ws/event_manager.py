@@ -1,32 +1,194 @@
 # ws/event_manager.py
+from collections import deque
+from itertools import product
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
 from fastapi import WebSocket
-import json
+
+from .client_queue import CLOSE, MAX_QUEUE, ClientQueue, queue_stats
+from .encoding import EVENT_ENCODINGS, JSON, encode, negotiate
+
+# (symbol, timeframe, event type); None in a subscription matches anything
+Topic = Tuple[Optional[str], Optional[str], Optional[str]]
+ALL: Topic = (None, None, None)
+
+# recent event messages kept per topic, replayed to new subscribers
+RECENT_EVENTS = 50
+
+
+def _norm(value, case) -> Optional[str]:
+    if value is None or value == "*" or value == "":
+        return None
+    return case(str(value))
+
+
+def topic_of(symbol=None, timeframe=None, type=None) -> Topic:
+    return _norm(symbol, str.upper), _norm(timeframe, str.lower), _norm(type, str.upper)
+
+
+def split_by_topic(message: dict) -> Iterator[Tuple[Topic, dict]]:
+    """
+    (topic, message) per event type in `message`; a message whose events
+    share one type (the usual case) is passed through as is.
+    """
+    events = message.get("events") or []
+    by_type: Dict[str, list] = {}
+    for event in events:
+        by_type.setdefault(event.get("type"), []).append(event)
+
+    if len(by_type) <= 1:
+        type_ = next(iter(by_type), None)
+        yield topic_of(message.get("symbol"), message.get("timeframe"), type_), message
+        return
+    for type_, sub in by_type.items():
+        yield topic_of(message.get("symbol"), message.get("timeframe"), type_), {**message, "events": sub}
+
+
+def patterns(topic: Topic) -> Set[Topic]:
+    # every subscription that matches `topic`
+    return set(product(*((part, None) for part in topic)))
+
+
+def matches(pattern: Topic, topic: Topic) -> bool:
+    return all(p is None or p == t for p, t in zip(pattern, topic))
+
 
 class EventManager:
-    def __init__(self):
-        self.clients = []
+    """
+    /ws/events clients and the topics each one subscribed to. A client
+    that never subscribes gets every event (`ALL`); its first subscribe
+    (or unsubscribe) narrows it to what it asks for. Subscribing replays
+    the topic's recent events to that client first.
+    """
 
-    async def connect(self, ws: WebSocket):
+    def __init__(self, max_queue: int = MAX_QUEUE, policy: str = CLOSE, recent: int = RECENT_EVENTS):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.recent = recent
+        self.clients: Dict[WebSocket, ClientQueue] = {}
+        # subscription → clients
+        self.subscribers: Dict[Topic, Set[ClientQueue]] = {}
+        # concrete topic → (sequence, message) of its latest events
+        self.recent_events: Dict[Topic, deque] = {}
+        self._seq = 0
+        # clients still on the default ALL subscription
+        self._default: Set[ClientQueue] = set()
+
+    async def connect(self, ws: WebSocket, encoding: str = JSON):
         await ws.accept()
-        self.clients.append(ws)
+        client = ClientQueue(
+            ws, self.disconnect, self.max_queue, self.policy,
+            negotiate(encoding, EVENT_ENCODINGS),
+        )
+        self.clients[ws] = client
+        self._add(ALL, client)
+        self._default.add(client)
         print(f"🔌 Event WebSocket connected: {len(self.clients)} clients")
 
     def disconnect(self, ws: WebSocket):
-        self.clients.remove(ws)
+        client = self.clients.pop(ws, None)
+        if client is None:
+            return
+        for topic in list(client.topics):
+            self._remove(topic, client)
+        self._default.discard(client)
+        client.close()
         print(f"❌ Event WebSocket disconnected: {len(self.clients)} clients left")
 
+    # ==================================================
+    # SUBSCRIPTIONS
+    # ==================================================
+    def subscribe(self, ws: WebSocket, topic: Topic) -> None:
+        client = self.clients.get(ws)
+        if client is None:
+            return
+        if client in self._default:
+            self._default.discard(client)
+            self._remove(ALL, client)
+        if topic in client.topics:
+            return
+
+        # recent events of topics the client was not already getting
+        replay = []
+        for cached, events in self.recent_events.items():
+            if matches(topic, cached) and not any(matches(p, cached) for p in client.topics):
+                replay.extend(events)
+        self._add(topic, client)
+
+        if replay:
+            replay.sort(key=lambda e: e[0])
+            client.offer(encode([message for _, message in replay], client.encoding))
+
+    def unsubscribe(self, ws: WebSocket, topic: Topic) -> None:
+        client = self.clients.get(ws)
+        if client is None:
+            return
+        if client in self._default:
+            # unsubscribing narrows a default client too: nothing left
+            self._default.discard(client)
+            self._remove(ALL, client)
+        self._remove(topic, client)
+
+    def _add(self, topic: Topic, client: ClientQueue) -> None:
+        client.topics.add(topic)
+        self.subscribers.setdefault(topic, set()).add(client)
+
+    def _remove(self, topic: Topic, client: ClientQueue) -> None:
+        client.topics.discard(topic)
+        subscribers = self.subscribers.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(client)
+        if not subscribers:
+            del self.subscribers[topic]
+
+    # ==================================================
+    # BROADCAST
+    # ==================================================
     async def broadcast(self, message: dict):
-        text = json.dumps(message)
-        dead_clients = []
+        await self.send_batch([message])
+
+    async def send_batch(self, messages: List[dict]):
+        # messages (see ws/outbox.py) → one frame per client of the
+        # messages it subscribed to, serialized once per distinct set and
+        # encoding; each client's writer task sends it
+        items: List[dict] = []
+        wanted: Dict[ClientQueue, List[int]] = {}
+
+        for message in messages:
+            for topic, part in split_by_topic(message):
+                i = len(items)
+                items.append(part)
+
+                self._seq += 1
+                cache = self.recent_events.get(topic)
+                if cache is None:
+                    cache = self.recent_events[topic] = deque(maxlen=self.recent)
+                cache.append((self._seq, part))
+
+                for pattern in patterns(topic):
+                    for client in self.subscribers.get(pattern, ()):
+                        picked = wanted.setdefault(client, [])
+                        if not picked or picked[-1] != i:
+                            picked.append(i)
 
-        for ws in self.clients[:]:
-            try:
-                await ws.send_text(text)
-            except Exception:
-                dead_clients.append(ws)
+        frames: Dict[tuple, Union[str, bytes]] = {}
+        for client, picked in wanted.items():
+            key = (client.encoding, tuple(picked))
+            frame = frames.get(key)
+            if frame is None:
+                frame = frames[key] = encode([items[i] for i in picked], client.encoding)
+            client.offer(frame)
 
-        for ws in dead_clients:
-            self.disconnect(ws)
+    def stats(self) -> dict:
+        return {
+            **queue_stats(self.clients.values()),
+            "topics": {
+                ":".join(part or "*" for part in topic): len(c)
+                for topic, c in self.subscribers.items()
+            },
+            "cached_topics": len(self.recent_events),
+        }
 
 # Create a singleton instance
 event_manager = EventManager()
@@ -1,24 +1,118 @@
 # ws/event_router.py
-from fastapi import APIRouter, WebSocket
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket
 import asyncio
-from .event_manager import event_manager  # your new event manager
+import json
+from .event_manager import event_manager, topic_of  # your new event manager
+from .manager import ws_manager
+
+from backend import run1
+from backend.engine1.event_log import EventLog
 
 router = APIRouter()
 
+# read side of the engine's per-symbol event logs
+_logs: Dict[str, EventLog] = {}
+
 # =========================
 # EVENTS WEBSOCKET ENDPOINT
 # =========================
 
+def _topics(request: dict) -> list:
+    # { symbol, timeframe, type } or { topics: [{ ... }, ...] }; missing / "*" = any
+    return [
+        topic_of(t.get("symbol"), t.get("timeframe"), t.get("type"))
+        for t in request.get("topics", [request])
+        if isinstance(t, dict)
+    ]
+
+
 @router.websocket("/ws/events")
 async def events_ws(websocket: WebSocket):
-    await event_manager.connect(websocket)
+    # ?encoding=msgpack → msgpack frames when the server has msgpack (see ws/encoding.py)
+    await event_manager.connect(websocket, websocket.query_params.get("encoding", "json"))
     print("🔌 Event WebSocket connected")
 
     try:
+        # Until its first subscribe a client gets every event. Client messages:
+        #   { action: "subscribe", symbol: "EURUSD", timeframe: "4h", type: "BOS" }
+        #   { action: "subscribe", topics: [{ symbol: "EURUSD" }, ...] }
+        #   { action: "unsubscribe", ... }
+        # Subscribing first replays the topic's recent events. Anything
+        # else (keep-alive pings) is ignored.
         while True:
-            await websocket.receive_text()  # keep connection alive
+            data = await websocket.receive_text()
+            try:
+                request = json.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(request, dict):
+                continue
+
+            action = request.get("action")
+            for topic in _topics(request):
+                if action == "subscribe":
+                    event_manager.subscribe(websocket, topic)
+                elif action == "unsubscribe":
+                    event_manager.unsubscribe(websocket, topic)
     except Exception:
         event_manager.disconnect(websocket)
         print("❌ Event WebSocket disconnected")
 
 
+
+
+# =========================
+# EVENT LOG REPLAY
+# =========================
+
+@router.get("/api/events/{symbol}")
+def replay_events(
+    symbol: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000,
+):
+    """
+    Logged event messages of `symbol` published between `start` and `end`
+    (candle time, inclusive), oldest first, at most `limit` of them. Each
+    is the message sent on /ws/events plus the candle time it was sent at.
+    """
+    if run1.EVENT_LOG_DIR is None:
+        raise HTTPException(status_code=404, detail="Event log disabled")
+
+    symbol = symbol.upper()
+    if symbol not in _logs:
+        _logs[symbol] = EventLog(symbol, run1.EVENT_LOG_DIR)
+    log = _logs[symbol]
+    log.refresh()
+
+    messages = []
+    for t, message in log.query(start, end):
+        if len(messages) >= limit:
+            break
+        messages.append({**message, "logged_at": t.isoformat()})
+
+    return {"symbol": symbol, "messages": messages}
+
+
+# =========================
+# WEBSOCKET QUEUE METRICS
+# =========================
+
+@router.get("/api/ws/stats")
+def ws_stats():
+    """
+    Outbound queue depth, high-water mark, frames sent and frames dropped
+    per connected client of /ws/candles and /ws/events.
+    """
+    return {
+        "candles": ws_manager.stats(),
+        "events": event_manager.stats(),
+        "broadcast": {
+            "batches_sent": run1.outbox.batches_sent,
+            "messages_sent": run1.outbox.messages_sent,
+        },
+    }
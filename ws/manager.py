@@ -1,31 +1,140 @@
 # ws/manager.py
-import json
+from typing import Dict, List, Set, Tuple
+
 from fastapi import WebSocket
 
+from .client_queue import DROP_OLDEST, MAX_QUEUE, ClientQueue, queue_stats
+from .encoding import CANDLE_ENCODINGS, JSON, encode, negotiate
+from backend.engine1.live_bars import CANDLE_UPDATE
+
+# (symbol, tf) of a candle stream
+Stream = Tuple[str, str]
+
+
+def stream_key(symbol: str, tf: str) -> Stream:
+    return symbol.upper(), tf.lower()
+
+
 class WSManager:
-    def __init__(self):
-        self.clients = set()
+    """
+    /ws/candles clients and the candle streams each one subscribed to.
+    Every batch is split by stream, serialized once per stream and
+    encoding in use, and queued only for that stream's subscribers.
+
+    Updates of forming bars only carry changed fields, so the merged
+    forming bar of each stream is kept and sent whole to new subscribers,
+    and to clients whose queue dropped a frame of that stream.
+    """
 
-    async def connect(self, ws: WebSocket):
+    def __init__(self, max_queue: int = MAX_QUEUE, policy: str = DROP_OLDEST):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.clients: Dict[WebSocket, ClientQueue] = {}
+        # stream → clients subscribed to it
+        self.subscribers: Dict[Stream, Set[ClientQueue]] = {}
+        # stream → its forming bar, all updates so far merged
+        self.forming: Dict[Stream, dict] = {}
+
+    async def connect(self, ws: WebSocket, encoding: str = JSON):
         await ws.accept()
-        self.clients.add(ws)
+        self.clients[ws] = ClientQueue(
+            ws, self.disconnect, self.max_queue, self.policy,
+            negotiate(encoding, CANDLE_ENCODINGS),
+        )
 
     def disconnect(self, ws: WebSocket):
-        self.clients.discard(ws)
+        client = self.clients.pop(ws, None)
+        if client is None:
+            return
+        for key in client.topics:
+            self._remove(key, client)
+        client.close()
+
+    # ==================================================
+    # SUBSCRIPTIONS
+    # ==================================================
+    def subscribe(self, ws: WebSocket, symbol: str, tf: str) -> None:
+        client = self.clients.get(ws)
+        if client is None:
+            return
+        key = stream_key(symbol, tf)
+        if key in client.topics:
+            return
+        client.topics.add(key)
+        self.subscribers.setdefault(key, set()).add(client)
+
+        forming = self.forming.get(key)
+        if forming is not None:
+            client.offer(encode([forming], client.encoding), key)
+
+    def unsubscribe(self, ws: WebSocket, symbol: str, tf: str) -> None:
+        client = self.clients.get(ws)
+        if client is None:
+            return
+        key = stream_key(symbol, tf)
+        client.topics.discard(key)
+        self._remove(key, client)
 
+    def _remove(self, key: Stream, client: ClientQueue) -> None:
+        subscribers = self.subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(client)
+        if not subscribers:
+            del self.subscribers[key]
 
+    # ==================================================
+    # BROADCAST
+    # ==================================================
     async def send(self, message: dict):
-        data_str = json.dumps(message)
-        dead_clients = []
+        await self.send_batch([message])
+
+    async def send_batch(self, messages: List[dict]):
+        # messages (see ws/outbox.py) → one frame per stream and encoding,
+        # queued for its subscribers; each client's writer task sends it
+        by_stream: Dict[Stream, List[dict]] = {}
+        for message in messages:
+            key = stream_key(message["symbol"], message["tf"])
+            self._track_forming(key, message)
+            if key in self.subscribers:
+                by_stream.setdefault(key, []).append(message)
+
+        for key, stream in by_stream.items():
+            frames = {}
+            for client in list(self.subscribers.get(key, ())):
+                frame = frames.get(client.encoding)
+                if frame is None:
+                    frame = frames[client.encoding] = encode(stream, client.encoding)
+                client.offer(frame, key)
+                if client.stale:
+                    self._resync(client)
+
+    def _resync(self, client: ClientQueue) -> None:
+        # the client's queue dropped frames: queue each stream's forming
+        # bar whole behind what is left, so missed updates do not linger.
+        # Frames this drops in turn are made good on the next batch.
+        stale, client.stale = client.stale, set()
+        for key in stale:
+            forming = self.forming.get(key)
+            if forming is not None and key in client.topics:
+                client.offer(encode([forming], client.encoding), key)
 
-        for ws in self.clients:
-            try:
-                await ws.send_text(data_str)
-            except Exception:
-                dead_clients.append(ws)
+    def _track_forming(self, key: Stream, message: dict) -> None:
+        forming = self.forming.get(key)
+        if message["type"] != CANDLE_UPDATE:
+            # closed: drop the bar's merged updates
+            if forming is not None and forming["timestamp"] == message["timestamp"]:
+                del self.forming[key]
+        elif forming is None or forming["timestamp"] != message["timestamp"]:
+            self.forming[key] = dict(message)   # a bar's first update is whole
+        else:
+            forming.update(message)
 
-        for ws in dead_clients:
-            self.clients.discard(ws)
+    def stats(self) -> dict:
+        return {
+            **queue_stats(self.clients.values()),
+            "streams": {f"{s}:{tf}": len(c) for (s, tf), c in self.subscribers.items()},
+        }
 
 
 ws_manager = WSManager()
@@ -0,0 +1,130 @@
+# ws/outbox.py
+"""
+Batched delivery of engine output to the WebSocket managers.
+
+The engine thread `put`s (channel, message) pairs; a single task on the
+FastAPI loop drains them every `window` seconds (the most a message
+waits) and hands each channel's batch, oldest first, to that channel's
+sink in one call. The sink (a WebSocket manager) serializes it once per
+group of clients that receive the same messages and sends it as one
+frame: a JSON array of messages. Only the first `put` of a window touches
+the event loop, so a fast replay costs a few wakeups per second instead
+of one future per message.
+
+Candle messages of the same (symbol, tf, timestamp) within a window are
+coalesced in the place of the first: updates of a forming bar are merged
+(later fields win), and a closed candle replaces them.
+"""
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from backend.engine1.live_bars import CANDLE_UPDATE
+
+Sink = Callable[[List[dict]], Awaitable[None]]
+
+# seconds a message may wait for the rest of its batch
+DEFAULT_WINDOW = 0.05
+# messages per sink call; larger batches are split
+MAX_BATCH = 1000
+
+
+def coalesce_candles(messages: List[dict]) -> List[dict]:
+    latest: Dict[tuple, int] = {}
+    out: List[dict] = []
+    for message in messages:
+        key = (message.get("symbol"), message.get("tf"), message.get("timestamp"))
+        i = latest.get(key)
+        if i is None:
+            latest[key] = len(out)
+            out.append(message)
+        elif message.get("type") == CANDLE_UPDATE:
+            out[i] = {**out[i], **message}
+        else:
+            out[i] = message
+    return out
+
+
+class Outbox:
+    def __init__(
+        self,
+        sinks: Dict[str, Sink],
+        window: float = DEFAULT_WINDOW,
+        max_batch: int = MAX_BATCH,
+    ):
+        self.sinks = sinks
+        self.window = window
+        self.max_batch = max_batch
+
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        # a wakeup is on its way to the loop / the drain task is busy
+        self._armed = False
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batches_sent = 0
+        self.messages_sent = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Start draining on `loop`; call from a coroutine running on it.
+        """
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._drain())
+
+    # ==================================================
+    # PRODUCER (ANY THREAD)
+    # ==================================================
+    def put(self, channel: str, message: dict) -> None:
+        if self._loop is None:
+            return
+
+        with self._lock:
+            self._pending.append((channel, message))
+            if self._armed:
+                return
+            self._armed = True
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ==================================================
+    # CONSUMER (EVENT LOOP)
+    # ==================================================
+    async def _drain(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.window)
+
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+                self._armed = False
+                self._wakeup.clear()
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        by_channel: Dict[str, List[dict]] = {}
+        for channel, message in batch:
+            by_channel.setdefault(channel, []).append(message)
+
+        for channel, messages in by_channel.items():
+            sink = self.sinks.get(channel)
+            if sink is None:
+                continue
+            if channel == "candle":
+                messages = coalesce_candles(messages)
+
+            for i in range(0, len(messages), self.max_batch):
+                chunk = messages[i:i + self.max_batch]
+                try:
+                    await sink(chunk)
+                except Exception as e:
+                    print(f"⚠️ {channel} broadcast failed: {e}")
+                    continue
+                self.batches_sent += 1
+                self.messages_sent += len(chunk)